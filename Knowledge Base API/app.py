@@ -5,7 +5,7 @@ import logging
 from datetime import datetime
 from functools import wraps
 import uuid
-from collections import defaultdict
+from collections import Counter, defaultdict
 #inicaliza app flask
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
@@ -149,9 +149,57 @@ def load_knowledge_base():
         }
     }
 
+# Campos de /api/stats (mesmo formato de kb/stats.py na versão principal)
+STAT_FIELDS = (
+    'total_languages',
+    'languages_by_category',
+    'paradigms_distribution',
+    'popularity_distribution',
+    'package_managers',
+    'creation_timeline',
+)
+
+def compute_statistics(knowledge_base):
+    """Agregados da base numa única passada"""
+    categories = Counter()
+    paradigms = Counter()
+    popularity = Counter()
+    package_managers = Counter()
+    timeline = {}
+    for lang in knowledge_base.values():
+        categories[lang['category']] += 1
+        package_managers[lang['package_manager']] += 1
+        paradigms.update(lang['paradigms'])
+        rank = lang['popularity_rank']
+        popularity['Top 3' if rank <= 3 else 'Top 6' if rank <= 6 else 'Others'] += 1
+        if lang.get('created_year'):
+            timeline.setdefault(str(lang['created_year']), []).append(lang['name'])
+    return {
+        'total_languages': len(knowledge_base),
+        'languages_by_category': dict(categories),
+        'paradigms_distribution': dict(paradigms),
+        'popularity_distribution': dict(popularity),
+        'package_managers': dict(package_managers),
+        'creation_timeline': dict(sorted(timeline.items())),
+    }
+
+def parse_fields(value, available):
+    """Converte 'a,b' em tupla de campos; levanta ValueError com os campos desconhecidos"""
+    if not value:
+        return tuple(available)
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return fields
+
 # Carregar base de conhecimento
 knowledge_base = load_knowledge_base()
 
+# Estatísticas calculadas uma única vez (a base é fixa durante a execução)
+knowledge_base_statistics = compute_statistics(knowledge_base)
+knowledge_base_loaded_at = datetime.now().isoformat()
+
 # Cache simples em memória
 cache = {}
 cache_timestamps = {}
@@ -359,35 +407,20 @@ def compare_languages():
 @app.route('/api/stats')
 @cache_response(timeout=3600)
 def get_statistics():
-    """Endpoint para estatísticas gerais do knowledge base"""
-    stats = {
-        'total_languages': len(knowledge_base),
-        'languages_by_category': defaultdict(int),
-        'paradigms_distribution': defaultdict(int),
-        'popularity_distribution': defaultdict(int),
-        'package_managers': defaultdict(int),
-        'creation_timeline': {}
-    }
-    
-    for lang_data in knowledge_base.values():
-        stats['languages_by_category'][lang_data['category']] += 1
-        stats['package_managers'][lang_data['package_manager']] += 1
-        stats['creation_timeline'][lang_data['created_year']] = lang_data['name']
-        
-        for paradigm in lang_data['paradigms']:
-            stats['paradigms_distribution'][paradigm] += 1
-        
-        if lang_data['popularity_rank'] <= 3:
-            stats['popularity_distribution']['Top 3'] += 1
-        elif lang_data['popularity_rank'] <= 6:
-            stats['popularity_distribution']['Top 6'] += 1
-        else:
-            stats['popularity_distribution']['Others'] += 1
+    """Endpoint para estatísticas gerais do knowledge base (?fields=a,b limita os campos)"""
+    try:
+        fields = parse_fields(request.args.get('fields', ''), STAT_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Campos desconhecidos: {e}",
+            "available_fields": list(STAT_FIELDS)
+        }), 400
     
     return jsonify({
         "success": True,
-        "statistics": dict(stats),
-        "generated_at": datetime.now().isoformat()
+        "statistics": {field: knowledge_base_statistics[field] for field in fields},
+        "generated_at": knowledge_base_loaded_at
     })
 
 # API para contato melhorada
@@ -14,7 +14,7 @@ class KnowledgeBaseAPI {
 
     async updateStats() {
         try {
-            const stats = await this.request('/api/stats');
+            const stats = await this.request('/api/stats?fields=total_languages');
             if (stats.success) {
                 this.displayStats(stats.statistics);
             }
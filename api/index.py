@@ -1,180 +1,574 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
-import json
+from flask import Flask, request, jsonify, render_template, send_from_directory, make_response, g, copy_current_request_context, stream_with_context
+import mimetypes
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from functools import wraps
-import uuid
+import hmac
+import time
+import sys
+import tempfile
+from urllib.parse import urlencode
 from collections import defaultdict
+from werkzeug.security import safe_join
+
+from kb import loader
+from kb.analysis import LANGUAGE_INFO, analyze
+from kb.batch import BatchInputError, default_workers, iter_results, open_batch
+from kb.compare import SimilarityMatrix
+from kb.contacts import ContactStore
+from kb.history import AnalysisHistory, InvalidCursor
+from kb.json_provider import FastJSONProvider, dumps
+from kb.logs import RequestSampler, DEFAULT_SAMPLE_RATES, setup_logging
+from kb.compression import AVAILABLE_ENCODINGS, FILE_SUFFIXES, compress, is_compressible, negotiate, variant_etag
+from kb.cache import CachedResponse, SingleFlight
+from kb.cache_backends import create_cache_backend
+from kb.prerender import PrerenderedPages
+from kb.projection import COMPACT_FIELDS, ProjectionCache
+from kb.ratelimit import DEFAULT_RATE_LIMITS, client_address, create_rate_limiter
+from kb.search import SearchIndex, TrigramIndex
+from kb.similar import FeatureIndex
+from kb.stats import STAT_FIELDS, compute_statistics, parse_fields, project_statistics
+from kb.watcher import KnowledgeBaseWatcher
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
+# jsonify com orjson/ujson quando instalados (kb/json_provider.py)
+app.json = FastJSONProvider(app)
 
 # Configurações para Vercel
 app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET', 'vercel-default-secret-key')
 
-# Configuração de logging para serverless
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
+# Configuração de logging para serverless: linhas JSON escritas por uma thread
+# separada (kb/logs.py), então a requisição só enfileira o registro
+setup_logging()
+access_logger = logging.getLogger('kb.access')
+request_sampler = RequestSampler(
+    os.environ.get('LOG_SAMPLE_RATES', DEFAULT_SAMPLE_RATES),
+    slow_seconds=float(os.environ.get('LOG_SLOW_SECONDS', 1.0))
 )
 
-# Base de conhecimento (mantida igual)
+# Base de conhecimento: knowledge_base.json + data/*.json, compilados num snapshot
+# (kb/loader.py) que é aberto com mmap e decodifica cada linguagem sob demanda
 def load_knowledge_base():
-    return {
-        "python": {
-            "name": "Python",
-            "version": "3.12",
-            "description": "Linguagem de alto nível para automação, IA, análise de dados e desenvolvimento web.",
-            "typing": "Dinâmica e forte",
-            "paradigms": ["OOP", "Funcional", "Imperativo"],
-            "package_manager": "pip",
-            "popularity_rank": 1,
-            "category": "General Purpose",
-            "frameworks": ["Django", "Flask", "FastAPI", "PyTorch", "TensorFlow"],
-            "use_cases": ["Web Development", "Data Science", "AI/ML", "Automation", "Scientific Computing"],
-            "learning_curve": "Beginner-friendly",
-            "community_size": "Very Large",
-            "job_market": "Excellent",
-            "syntax_example": "print('Hello, World!')",
-            "icon": "fab fa-python",
-            "color": "#3776ab",
-            "created_year": 1991,
-            "creator": "Guido van Rossum"
-        },
-        "javascript": {
-            "name": "JavaScript",
-            "version": "ES2024",
-            "description": "Linguagem versátil para desenvolvimento web front-end e back-end (Node.js).",
-            "typing": "Dinâmica e fraca",
-            "paradigms": ["OOP", "Funcional", "Prototipal"],
-            "package_manager": "npm",
-            "popularity_rank": 2,
-            "category": "Web",
-            "frameworks": ["React", "Vue.js", "Angular", "Node.js", "Express"],
-            "use_cases": ["Web Development", "Mobile Apps", "Desktop Apps", "Server-side"],
-            "learning_curve": "Moderate",
-            "community_size": "Very Large",
-            "job_market": "Excellent",
-            "syntax_example": "console.log('Hello, World!');",
-            "icon": "fab fa-js",
-            "color": "#f7df1e",
-            "created_year": 1995,
-            "creator": "Brendan Eich"
-        },
-        "java": {
-            "name": "Java",
-            "version": "21",
-            "description": "Linguagem robusta e multiplataforma para aplicações empresariais e Android.",
-            "typing": "Estática e forte",
-            "paradigms": ["Orientado a Objetos"],
-            "package_manager": "Maven/Gradle",
-            "popularity_rank": 3,
-            "category": "Empresarial",
-            "frameworks": ["Spring", "Spring Boot", "Hibernate", "Apache Struts"],
-            "use_cases": ["Enterprise Applications", "Android Development", "Web Services", "Big Data"],
-            "learning_curve": "Moderate to Advanced",
-            "community_size": "Very Large",
-            "job_market": "Excellent",
-            "syntax_example": "System.out.println(\"Hello, World!\");",
-            "icon": "fab fa-java",
-            "color": "#ed8b00",
-            "created_year": 1995,
-            "creator": "James Gosling"
-        },
-        "rust": {
-            "name": "Rust",
-            "version": "1.75",
-            "description": "Linguagem de sistemas focada em segurança, velocidade e concorrência.",
-            "typing": "Estática e forte",
-            "paradigms": ["Funcional", "Imperativo", "Concorrente"],
-            "package_manager": "Cargo",
-            "popularity_rank": 4,
-            "category": "Systems",
-            "frameworks": ["Tokio", "Actix", "Rocket", "Tauri"],
-            "use_cases": ["Systems Programming", "WebAssembly", "CLI Tools", "Blockchain"],
-            "learning_curve": "Advanced",
-            "community_size": "Growing",
-            "job_market": "Growing",
-            "syntax_example": "println!(\"Hello, World!\");",
-            "icon": "fas fa-cog",
-            "color": "#dea584",
-            "created_year": 2010,
-            "creator": "Mozilla Research"
-        }
-    }
+    return loader.load_knowledge_base(
+        os.environ.get('KB_DATA_DIR') or loader.DEFAULT_DATA_DIR,
+        snapshot_path=os.environ.get('KB_SNAPSHOT_PATH')
+    )
 
 knowledge_base = load_knowledge_base()
 
-# Cache para serverless (em memória, resetado a cada cold start)
-cache = {}
-cache_timestamps = {}
+# Versão da base (hash do conteúdo) e data de modificação dos arquivos, usados em ETag/Last-Modified.
+# kb_generation é incrementado a cada recarga a quente.
+kb_version = knowledge_base.version
+kb_last_modified = datetime.fromtimestamp(int(knowledge_base.last_modified), timezone.utc)
+kb_generation = 1
+
+# Índices de busca: construídos no primeiro uso e mantidos junto ao snapshot,
+# então são refeitos automaticamente quando a base é recarregada
+def get_search_index():
+    return knowledge_base.derived('search_index', SearchIndex)
+
+def get_trigram_index():
+    return knowledge_base.derived('trigram_index', TrigramIndex)
+
+def get_similarity_matrix():
+    return knowledge_base.derived('similarity_matrix', SimilarityMatrix)
+
+def get_feature_index():
+    return knowledge_base.derived('feature_index', FeatureIndex)
+
+def get_statistics_snapshot():
+    return knowledge_base.derived('statistics', compute_statistics)
+
+def encoded_language(key, fields):
+    """Registro (ou projeção pré-calculada) da linguagem já em JSON: a resposta copia os bytes em vez de recodificar"""
+    return knowledge_base.derived('projections', ProjectionCache).encoded(key, fields)
+
+def parse_projection(fields_param, compact=False):
+    """Campos pedidos em fields=; no modo compacto sem fields=, só os campos essenciais"""
+    if fields_param:
+        return parse_fields(fields_param, loader.RECORD_FIELDS)
+    return COMPACT_FIELDS if compact else None
+
+def invalid_fields_response(error):
+    return jsonify({
+        "success": False,
+        "error": f"Campos desconhecidos: {error}",
+        "available_fields": list(loader.RECORD_FIELDS)
+    }), 400
+
+def resolve_language(name):
+    """Chave exata da linguagem ou, se não existir, a correção mais provável (ex.: 'pyton')"""
+    key = name.lower().strip()
+    if key in knowledge_base:
+        return key
+    return get_trigram_index().resolve(key)
+
+def language_suggestions(name, limit=5):
+    """Linguagens com nome parecido, para respostas de 'não encontrada'"""
+    return [
+        {
+            'key': key,
+            'name': knowledge_base[key]['name'],
+            'category': knowledge_base[key]['category']
+        }
+        for key, _ in get_trigram_index().suggest(name.lower().strip(), limit=limit)
+    ]
+
+# Cache de respostas limitado em entradas e bytes. CACHE_BACKEND escolhe onde fica:
+# 'memory' (padrão, resetado a cada cold start), 'sqlite' (arquivo local, compartilhado
+# pelos workers) ou 'redis' (compartilhado entre máquinas e implantações via CACHE_NAMESPACE)
+response_cache = create_cache_backend(
+    os.environ.get('CACHE_BACKEND', 'memory'),
+    namespace=os.environ.get('CACHE_NAMESPACE', 'kb'),
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 512)),
+    max_bytes=int(os.environ.get('CACHE_MAX_BYTES', 8 * 1024 * 1024)),
+    sqlite_path=os.environ.get('CACHE_SQLITE_PATH'),
+    redis_url=os.environ.get('CACHE_REDIS_URL')
+)
+
+# Uma única recomputação por chave de cache em andamento neste processo
+single_flight = SingleFlight()
+
+# Recarga a quente: troca o snapshot e invalida só o que depende das linguagens alteradas
+def on_knowledge_base_change(old, new):
+    global knowledge_base, kb_version, kb_last_modified, kb_generation
+    changed = new.changed_keys(old)
+    knowledge_base = new
+    kb_version = new.version
+    kb_last_modified = datetime.fromtimestamp(int(new.last_modified), timezone.utc)
+    kb_generation += 1
+    if changed:
+        removed = response_cache.invalidate_tags({'kb:all'} | {f'lang:{key}' for key in changed})
+        logging.info(f"Base recarregada (versão {kb_version}): {sorted(changed)} alteradas, {removed} entradas de cache removidas")
+    if PRERENDER_MODE == 'startup':
+        warm_prerendered_pages()
+
+# Em processos longos (gunicorn) verifica os arquivos a cada KB_WATCH_INTERVAL segundos; 0 desativa
+kb_watcher = KnowledgeBaseWatcher(
+    knowledge_base,
+    on_knowledge_base_change,
+    data_dir=os.environ.get('KB_DATA_DIR') or loader.DEFAULT_DATA_DIR,
+    snapshot_path=os.environ.get('KB_SNAPSHOT_PATH'),
+    interval=float(os.environ.get('KB_WATCH_INTERVAL', 0 if os.environ.get('VERCEL') else 5))
+).start()
+
+# Limite de requisições por IP e rota (kb/ratelimit.py). RATE_LIMITS="prefixo=capacidade/segundos,...";
+# RATE_LIMIT_BACKEND=redis compartilha os limites entre workers (RATE_LIMIT_REDIS_URL ou CACHE_REDIS_URL)
+rate_limiter = create_rate_limiter(
+    os.environ.get('RATE_LIMITS', DEFAULT_RATE_LIMITS),
+    kind=os.environ.get('RATE_LIMIT_BACKEND', 'memory'),
+    namespace=os.environ.get('CACHE_NAMESPACE', 'kb'),
+    redis_url=os.environ.get('RATE_LIMIT_REDIS_URL') or os.environ.get('CACHE_REDIS_URL')
+)
+# Atrás de proxies (Vercel, nginx), o IP do cliente vem do X-Forwarded-For: TRUST_PROXY_HOPS é o número
+# de proxies confiáveis na frente da aplicação (0 usa o endereço da conexão; TRUST_PROXY=1 equivale a 1)
+TRUST_PROXY_HOPS = int(os.environ.get('TRUST_PROXY_HOPS')
+                       or os.environ.get('TRUST_PROXY', '1' if os.environ.get('VERCEL') else '0'))
+
+def client_ip():
+    return client_address(request.headers.getlist('X-Forwarded-For'), request.remote_addr, TRUST_PROXY_HOPS)
 
 # Middleware simplificado para Vercel
 @app.before_request
 def before_request():
-    request.start_time = datetime.now()
+    request.start_time = time.perf_counter()
+    g.rate_limit = rate_limiter.check(client_ip(), request.path)
+    if g.rate_limit is not None and not g.rate_limit.allowed:
+        return jsonify({
+            "success": False,
+            "error": "Muitas requisições. Tente novamente em instantes.",
+            "retry_after": int(g.rate_limit.headers()['Retry-After'])
+        }), 429
 
 @app.after_request
 def after_request(response):
-    duration = datetime.now() - request.start_time
-    response.headers['X-Response-Time'] = str(duration.total_seconds())
+    duration = time.perf_counter() - request.start_time
+    response.headers['X-Response-Time'] = f'{duration:.6f}'
     response.headers['Access-Control-Allow-Origin'] = '*'
-    logging.info(f"{request.method} {request.path} - {response.status} - {duration.total_seconds():.3f}s")
+    if g.get('rate_limit') is not None:
+        response.headers.update(g.rate_limit.headers())
+    compress_response(response)
+    sample_rate = request_sampler.sample(request.path, response.status_code, duration)
+    if sample_rate is not None:
+        access_logger.info('request', extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'cache': g.get('cache_status'),
+            'bytes': response.content_length,
+            'encoding': response.headers.get('Content-Encoding'),
+            'sample_rate': sample_rate,
+        }})
     return response
 
-# Decorator para cache
-def cache_response(timeout=300):
+# Corpos menores que COMPRESS_MIN_SIZE bytes não são comprimidos
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+
+def compress_response(response):
+    """Comprime na hora respostas que não vieram do cache nem de arquivo (nível rápido)"""
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers \
+            or response.status_code in (204, 304):
+        return
+    body = response.get_data()
+    if not is_compressible(response.mimetype, len(body), COMPRESS_MIN_SIZE):
+        return
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings, AVAILABLE_ENCODINGS)
+    if not encoding:
+        return
+    compressed = compress(body, encoding, fast=True)
+    if len(compressed) >= len(body):
+        return
+    etag, weak = response.get_etag()
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(variant_etag(etag, encoding), weak)
+
+# Decorator para cache (timeout = TTL da rota, em segundos).
+# Guarda os bytes finais da resposta e cria uma resposta nova a cada hit.
+# A view declara de quais linguagens depende com cache_tag(); sem tags, a entrada
+# depende da base inteira ('kb:all') e é invalidada em qualquer recarga.
+# Respostas 200 recebem ETag (hash do corpo) e Last-Modified (versão da base),
+# e requisições condicionais recebem 304 a partir de uma entrada 200 (do cache ou recém-gerada);
+# erros (404, 400...) nunca viram 304.
+# Num miss, só uma requisição por chave executa a view (single-flight); as outras
+# esperam e reutilizam o resultado. Com stale_while_revalidate > 0, uma entrada
+# expirada há menos desses segundos é servida na hora enquanto uma thread a recalcula.
+# As variantes gzip/br são geradas uma vez ao gravar a entrada e escolhidas por Accept-Encoding.
+def cache_response(timeout=300, stale_while_revalidate=0):
     def decorator(f):
+        def render(cache_key, *args, **kwargs):
+            """Executa a view e grava a entrada; retorna (entrada ou None se não cacheável, resposta)"""
+            generation = kb_generation
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.add_etag()
+                response.last_modified = kb_last_modified
+                response.cache_control.public = True
+                response.cache_control.max_age = timeout
+            if response.status_code >= 500 or response.is_streamed:
+                return None, response
+            entry = CachedResponse.from_response(response, fresh_until=time.time() + timeout,
+                                                 compress_min_size=COMPRESS_MIN_SIZE)
+            if generation != kb_generation:
+                # a base foi recarregada durante a view: o resultado pode ser da versão antiga
+                return None, response
+            tags = g.get('cache_tags') or {'kb:all'}
+            response_cache.set(cache_key, entry, ttl=timeout + stale_while_revalidate, size=entry.size, tags=tags)
+            if generation != kb_generation:
+                # recarga entre a verificação e o set: a invalidação pode ter rodado antes da gravação
+                response_cache.delete(cache_key)
+                return None, response
+            return entry, response
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
             cache_key = f"{request.path}?{request.query_string.decode() if request.query_string else ''}"
             
-            if cache_key in cache:
-                timestamp = cache_timestamps.get(cache_key, 0)
-                if datetime.now().timestamp() - timestamp < timeout:
-                    return cache[cache_key]
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                if cached.is_stale():
+                    if not stale_while_revalidate:
+                        cached = None
+                    else:
+                        single_flight.do_in_background(
+                            cache_key, copy_current_request_context(lambda: render(cache_key, *args, **kwargs))
+                        )
+            if cached is not None:
+                g.cache_status = 'stale' if cached.is_stale() else 'hit'
+                return _serve_cached(cached)
             
-            result = f(*args, **kwargs)
-            cache[cache_key] = result
-            cache_timestamps[cache_key] = datetime.now().timestamp()
-            return result
+            (entry, response), shared = single_flight.do(cache_key, lambda: render(cache_key, *args, **kwargs))
+            g.cache_status = 'coalesced' if shared else 'miss'
+            if entry is None:
+                # respostas não cacheáveis não são compartilhadas entre requisições
+                g.cache_status = 'bypass'
+                return make_response(f(*args, **kwargs)) if shared else response
+            return _serve_cached(entry)
         return decorated_function
     return decorator
 
-# Rota principal
-@app.route('/')
-@cache_response(timeout=300)
-def home():
+def _serve_cached(entry):
+    encoding = negotiate(request.accept_encodings, entry.variants)
+    if entry.status == 200 and _is_not_modified(variant_etag(entry.etag, encoding)):
+        return entry.not_modified(app.response_class, encoding)
+    return entry.to_response(app.response_class, encoding)
+
+def cache_tag(*tags):
+    """Marca a resposta em cache da requisição atual como dependente das tags informadas"""
+    g.setdefault('cache_tags', set()).update(tags)
+
+def _is_not_modified(etag):
+    """Avalia If-None-Match (prioritário) e If-Modified-Since para a requisição atual"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        return request.if_modified_since >= kb_last_modified
+    return False
+
+# Páginas HTML pré-renderizadas por versão da base (home e /query de cada linguagem).
+# PRERENDER: 'lazy' (padrão, gera cada página no primeiro acesso a ela), 'startup' (gera todas ao
+# iniciar e a cada recarga da base) ou 'off'.
+# PRERENDER_DIR: diretório gerado no build por `python app.py --prerender <dir>`.
+PRERENDER_MODE = os.environ.get('PRERENDER', 'lazy')
+PRERENDER_DIR = os.environ.get('PRERENDER_DIR')
+
+def render_home():
     stats = {
         'total_languages': len(knowledge_base),
         'popular_languages': [lang for lang in knowledge_base.values() if lang['popularity_rank'] <= 3],
-        'latest_update': datetime.now().isoformat()
+        'latest_update': kb_last_modified.isoformat()
     }
     return render_template('index.html', stats=stats, languages=knowledge_base)
 
+def render_query(language):
+    """HTML do /query; language vazio mostra a lista, desconhecido mostra sugestões"""
+    if not language:
+        return render_template('index.html', languages=knowledge_base)
+    
+    lang_key = resolve_language(language)
+    if lang_key:
+        lang_data = knowledge_base[lang_key]
+        return render_template('result.html', 
+                             language=lang_key, 
+                             data=lang_data['details'])
+    else:
+        return render_template('result.html', 
+                             language=language, 
+                             data=None,
+                             suggestions=language_suggestions(language))
+
+def prerendered_page_keys(snapshot):
+    return ['home', 'query:', *(f'query:{key}' for key in snapshot)]
+
+def render_prerendered(key):
+    """HTML da página `key` com a base atual; None para chaves sem página"""
+    if key == 'home':
+        with app.test_request_context('/'):
+            return render_home()
+    prefix, _, language = key.partition(':')
+    if prefix != 'query' or (language and language not in knowledge_base):
+        return None
+    with app.test_request_context('/query?' + urlencode({'language': language}) if language else '/query'):
+        return render_query(language)
+
+def build_prerendered_pages(snapshot, fast=True):
+    """Páginas da versão `snapshot`: lidas do PRERENDER_DIR ou renderizadas uma a uma no primeiro acesso"""
+    if PRERENDER_DIR:
+        pages = PrerenderedPages.load(PRERENDER_DIR, snapshot.version)
+        if pages is not None:
+            return pages
+
+    def render(key):
+        # durante uma recarga, páginas da versão nova não entram no conjunto da antiga
+        return render_prerendered(key) if snapshot is knowledge_base else None
+
+    return PrerenderedPages(snapshot.version, render=render, fast=fast)
+
+def get_prerendered_pages():
+    if PRERENDER_MODE == 'off':
+        return None
+    return knowledge_base.derived('prerendered_pages', build_prerendered_pages)
+
+def warm_prerendered_pages():
+    pages = get_prerendered_pages()
+    if pages is not None:
+        pages.warm(prerendered_page_keys(knowledge_base))
+
+def serve_prerendered(page_key):
+    """Serve a página pré-renderizada de page_key() quando existir; senão executa a view"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            pages = get_prerendered_pages()
+            page = pages.get(page_key()) if pages is not None else None
+            if page is None:
+                return f(*args, **kwargs)
+            g.cache_status = 'prerendered'
+            encoding = negotiate(request.accept_encodings, page.variants)
+            etag = variant_etag(page.etag, encoding)
+            if _is_not_modified(etag):
+                response = app.response_class(status=304)
+            else:
+                response = app.response_class(page.variants[encoding] if encoding else page.body,
+                                              mimetype='text/html')
+                if encoding:
+                    response.headers['Content-Encoding'] = encoding
+            response.set_etag(etag)
+            response.last_modified = kb_last_modified
+            response.cache_control.public = True
+            response.cache_control.max_age = 300
+            response.vary.add('Accept-Encoding')
+            return response
+        return decorated_function
+    return decorator
+
+def _query_page_key():
+    language = request.args.get('language', '').lower().strip()
+    return f'query:{language}' if not language or language in knowledge_base else None
+
+# Rota principal
+@app.route('/')
+@serve_prerendered(lambda: 'home')
+@cache_response(timeout=300, stale_while_revalidate=60)
+def home():
+    return render_home()
+
 # API para buscar linguagem específica
 @app.route('/api/language/<language_name>')
 @cache_response(timeout=60)
 def get_language_details(language_name):
-    language = language_name.lower().strip()
+    compact = request.args.get('compact') == '1'
+    try:
+        fields = parse_projection(request.args.get('fields', ''), compact)
+    except ValueError as e:
+        return invalid_fields_response(e)
     
-    if language in knowledge_base:
-        data = knowledge_base[language].copy()
-        data['query_timestamp'] = datetime.now().isoformat()
-        return jsonify({
+    language = resolve_language(language_name)
+    
+    if language:
+        payload = {
             "success": True,
             "language": language,
-            "data": data
-        })
+            "data": encoded_language(language, fields)
+        }
+        if language == language_name.lower().strip():
+            cache_tag(f'lang:{language}')
+        else:
+            # correções aproximadas dependem do conjunto de nomes: ficam com a tag padrão
+            payload["resolved_from"] = language_name
+        return jsonify(payload)
     else:
         return jsonify({
             "success": False,
             "error": f"Linguagem '{language_name}' não encontrada",
-            "available_languages": list(knowledge_base.keys())
+            "suggestions": language_suggestions(language_name)
         }), 404
 
+# API de linguagens parecidas (?k= quantidade, máximo MAX_SIMILAR)
+MAX_SIMILAR = 20
+
+@app.route('/api/language/<language_name>/similar')
+@cache_response(timeout=300)
+def get_similar_languages(language_name):
+    try:
+        k = int(request.args.get('k', 5))
+    except ValueError:
+        k = 0
+    if not 1 <= k <= MAX_SIMILAR:
+        return jsonify({
+            "success": False,
+            "error": f"Parâmetro 'k' deve ser um inteiro entre 1 e {MAX_SIMILAR}"
+        }), 400
+    
+    language = resolve_language(language_name)
+    if not language:
+        return jsonify({
+            "success": False,
+            "error": f"Linguagem '{language_name}' não encontrada",
+            "suggestions": language_suggestions(language_name)
+        }), 404
+    
+    similar = []
+    for key, score in get_feature_index().similar(language, k):
+        lang = knowledge_base[key]
+        similar.append({
+            'key': key,
+            'name': lang['name'],
+            'category': lang['category'],
+            'similarity': score
+        })
+    
+    payload = {
+        "success": True,
+        "language": language,
+        "similar": similar
+    }
+    if language != language_name.lower().strip():
+        payload["resolved_from"] = language_name
+    return jsonify(payload)
+
+# API para várias linguagens numa única requisição
+MAX_BATCH_SIZE = 50
+
+@app.route('/api/languages')
+@cache_response(timeout=60)
+def get_languages_batch():
+    names = [n for n in request.args.get('names', '').split(',') if n.strip()]
+    return _batch_response(names, request.args.get('fields', ''), request.args.get('compact') == '1')
+
+@app.route('/api/languages/batch', methods=['POST'])
+def post_languages_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "error": "Corpo deve ser um objeto JSON com o campo 'names'"
+        }), 400
+    names = data.get('names', [])
+    fields = data.get('fields', '')
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        return jsonify({
+            "success": False,
+            "error": "Campo 'names' deve ser uma lista de nomes"
+        }), 400
+    if isinstance(fields, list) and all(isinstance(f, str) for f in fields):
+        fields = ','.join(fields)
+    if not isinstance(fields, str):
+        return jsonify({
+            "success": False,
+            "error": "Campo 'fields' deve ser um texto ou uma lista de textos"
+        }), 400
+    return _batch_response([n for n in names if n.strip()], fields, bool(data.get('compact')))
+
+def _batch_response(names, fields_param, compact=False):
+    """Monta a resposta em lote; itens não encontrados vêm marcados com found=false"""
+    if not names:
+        return jsonify({
+            "success": False,
+            "error": "Informe ao menos um nome de linguagem"
+        }), 400
+    names = list(dict.fromkeys(n.strip() for n in names))
+    if len(names) > MAX_BATCH_SIZE:
+        return jsonify({
+            "success": False,
+            "error": f"Máximo de {MAX_BATCH_SIZE} linguagens por requisição"
+        }), 400
+    try:
+        fields = parse_projection(fields_param, compact)
+    except ValueError as e:
+        return invalid_fields_response(e)
+    
+    items = []
+    for name in names:
+        language = resolve_language(name)
+        if not language:
+            cache_tag('kb:all')
+            items.append({
+                "query": name,
+                "found": False,
+                "suggestions": language_suggestions(name)
+            })
+            continue
+        cache_tag(f'lang:{language}' if language == name.lower() else 'kb:all')
+        items.append({
+            "query": name,
+            "found": True,
+            "language": language,
+            "data": encoded_language(language, fields)
+        })
+    
+    return jsonify({
+        "success": True,
+        "results": items,
+        "total_requested": len(names),
+        "total_found": sum(1 for item in items if item['found'])
+    })
+
 # API para pesquisa
 @app.route('/api/search')
 def search_languages():
@@ -186,18 +580,9 @@ def search_languages():
             "error": "Parâmetro 'q' é obrigatório"
         }), 400
     
-    results = []
-    for key, lang in knowledge_base.items():
-        if (query in key.lower() or 
-            query in lang['name'].lower() or 
-            query in lang['description'].lower()):
-            results.append({
-                'key': key,
-                'name': lang['name'],
-                'description': lang['description'],
-                'popularity_rank': lang['popularity_rank'],
-                'category': lang['category']
-            })
+    # resumos pré-serializados: nenhum dicionário é montado por resultado
+    projections = knowledge_base.derived('projections', ProjectionCache)
+    results = [projections.summary(key) for key in get_search_index().search(query)]
     
     return jsonify({
         "success": True,
@@ -210,6 +595,7 @@ def search_languages():
 @app.route('/api/compare')
 def compare_languages():
     languages = request.args.getlist('lang')
+    compact = request.args.get('compact') == '1'
     
     if len(languages) < 2:
         return jsonify({
@@ -217,11 +603,19 @@ def compare_languages():
             "error": "Pelo menos 2 linguagens são necessárias para comparação"
         }), 400
     
+    try:
+        fields = parse_projection(request.args.get('fields', ''), compact)
+    except ValueError as e:
+        return invalid_fields_response(e)
+    
     comparison_data = []
+    keys = []
     for lang in languages:
         lang_key = lang.lower().strip()
         if lang_key in knowledge_base:
-            comparison_data.append(knowledge_base[lang_key])
+            if lang_key not in keys:
+                keys.append(lang_key)
+                comparison_data.append(encoded_language(lang_key, fields))
         else:
             return jsonify({
                 "success": False,
@@ -231,26 +625,47 @@ def compare_languages():
     return jsonify({
         "success": True,
         "languages": comparison_data,
+        "analysis": get_similarity_matrix().diff(keys),
         "comparison_timestamp": datetime.now().isoformat()
     })
 
+# API para estatísticas gerais (?fields=a,b limita os campos retornados)
+@app.route('/api/stats')
+@cache_response(timeout=3600)
+def get_statistics():
+    try:
+        fields = parse_fields(request.args.get('fields', ''), STAT_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Campos desconhecidos: {e}",
+            "available_fields": list(STAT_FIELDS)
+        }), 400
+    
+    return jsonify({
+        "success": True,
+        "statistics": project_statistics(get_statistics_snapshot(), fields),
+        "generated_at": kb_last_modified.isoformat()
+    })
+
 # Rota de query (para formulário HTML)
 @app.route('/query')
+@serve_prerendered(_query_page_key)
+@cache_response(timeout=300)
 def query_language():
-    language = request.args.get('language', '').lower().strip()
-    
-    if not language:
-        return render_template('index.html', languages=knowledge_base)
-    
-    if language in knowledge_base:
-        lang_data = knowledge_base[language]
-        return render_template('result.html', 
-                             language=language, 
-                             data=lang_data)
-    else:
-        return render_template('result.html', 
-                             language=language, 
-                             data=None)
+    return render_query(request.args.get('language', '').lower().strip())
+
+# Mensagens de contato gravadas em lote num SQLite local (kb/contacts.py).
+# CONTACTS_PATH aponta o arquivo (padrão: diretório temporário, criado com modo 0600); reenvios
+# idênticos dentro de CONTACT_DEDUP_WINDOW segundos retornam o id e o horário da mensagem original.
+contact_store = ContactStore(
+    os.environ.get('CONTACTS_PATH') or os.path.join(tempfile.gettempdir(), 'kb-contacts.sqlite3'),
+    dedup_window=float(os.environ.get('CONTACT_DEDUP_WINDOW', 86400))
+)
+CONTACT_ACK_TIMEOUT = float(os.environ.get('CONTACT_ACK_TIMEOUT', 2.0))
+
+# Tamanho máximo de página nas rotas paginadas por cursor
+MAX_PAGE_LIMIT = 200
 
 # API para contato
 @app.route('/api/contact', methods=['POST'])
@@ -264,22 +679,191 @@ def contact_api():
             "error": "Dados incompletos. Campos obrigatórios: name, email, message"
         }), 400
     
-    contact_record = {
-        "id": str(uuid.uuid4()),
-        "name": data['name'].strip(),
-        "email": data['email'].strip().lower(),
-        "message": data['message'].strip(),
-        "timestamp": datetime.now().isoformat(),
-        "status": "received"
-    }
+    receipt = contact_store.submit(data['name'].strip(), data['email'].strip().lower(), data['message'].strip())
+    # espera o commit do lote em que a mensagem entrou (ver kb/contacts.py)
+    if not receipt.wait(CONTACT_ACK_TIMEOUT) or receipt.error:
+        return jsonify({
+            "success": False,
+            "error": "Não foi possível registrar a mensagem. Tente novamente."
+        }), 503
     
-    logging.info(f"Nova mensagem de contato: {contact_record}")
+    # só metadados: nome, e-mail e texto da mensagem não vão para os logs
+    logging.info('Nova mensagem de contato', extra={'fields': {
+        'contact_id': receipt.contact_id,
+        'message_length': len(receipt.record['message']),
+        'duplicate': receipt.duplicate
+    }})
     
     return jsonify({
         "success": True,
         "message": "Mensagem recebida com sucesso!",
-        "contact_id": contact_record['id'],
-        "timestamp": contact_record['timestamp']
+        "contact_id": receipt.contact_id,
+        "timestamp": receipt.record['timestamp'],
+        "duplicate": receipt.duplicate
+    })
+
+# Leitura das mensagens (mais recentes primeiro, ?limit=50&cursor=<next_cursor>).
+# Exige "Authorization: Bearer <CONTACTS_ADMIN_TOKEN>"; sem o token configurado, a rota fica desativada.
+@app.route('/api/contacts')
+def list_contacts():
+    token = os.environ.get('CONTACTS_ADMIN_TOKEN')
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({
+            "success": False,
+            "error": "Não autorizado"
+        }), 401
+    
+    try:
+        limit = int(request.args.get('limit', 50))
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        if not 1 <= limit <= MAX_PAGE_LIMIT:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": f"Parâmetros inválidos: 'limit' deve ser um inteiro entre 1 e {MAX_PAGE_LIMIT} e 'cursor' um inteiro"
+        }), 400
+    
+    items, next_cursor = contact_store.page(limit, cursor)
+    response = jsonify({
+        "success": True,
+        "contacts": items,
+        "count": len(items),
+        "next_cursor": next_cursor,
+        "ingestion": contact_store.stats()
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# API de análise de código (mesmas regras do static/js/code-analysis.js, kb/analysis.py).
+# Corpo: {"code": "...", "language": "python"}; sem language, a linguagem é detectada.
+@app.route('/api/analyze', methods=['POST'])
+def analyze_code():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('code'), str) or not data['code'].strip():
+        return jsonify({
+            "success": False,
+            "error": "Campo 'code' é obrigatório"
+        }), 400
+    
+    language = data.get('language')
+    if language is not None:
+        language = str(language).lower().strip()
+        if language not in LANGUAGE_INFO:
+            return jsonify({
+                "success": False,
+                "error": f"Linguagem '{data['language']}' não suportada na análise",
+                "supported_languages": list(LANGUAGE_INFO)
+            }), 400
+    
+    analysis = analyze(data['code'].strip(), language)
+    analysis_history.record(analysis)
+    return jsonify({
+        "success": True,
+        "analysis": analysis
+    })
+
+# Análise em lote (kb/batch.py): corpo NDJSON ({"path", "code", "language"} por linha),
+# .tar(.gz) ou .zip (direto no corpo ou como arquivo multipart). A resposta é NDJSON
+# transmitido: uma linha por arquivo, na ordem em que terminam, e uma linha final
+# {"summary": ...}. Os limites de tempo ficam abaixo do maxDuration do vercel.json (10s).
+ANALYZE_WORKERS = int(os.environ.get('ANALYZE_WORKERS', default_workers()))
+# Limite por arquivo: aplicado nos processos do pool; com ANALYZE_WORKERS=0 só vale quando a
+# view roda na thread principal (ex.: gunicorn sync), não em servidores com threads
+ANALYZE_FILE_TIMEOUT = float(os.environ.get('ANALYZE_FILE_TIMEOUT', 2.0))
+ANALYZE_BATCH_BUDGET = float(os.environ.get('ANALYZE_BATCH_BUDGET', 8.0))
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    upload = next(iter(request.files.values()), None)
+    if upload is not None:
+        data, content_type = upload.read(), upload.mimetype
+    else:
+        data, content_type = request.get_data(), request.content_type or ''
+    if not data.strip():
+        return jsonify({
+            "success": False,
+            "error": "Envie NDJSON, .tar(.gz) ou .zip no corpo da requisição"
+        }), 400
+
+    try:
+        files = open_batch(data, content_type)
+    except BatchInputError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+
+    def generate():
+        analyses = []
+        try:
+            for result in iter_results(files, ANALYZE_WORKERS, ANALYZE_FILE_TIMEOUT, ANALYZE_BATCH_BUDGET):
+                if result.get('success'):
+                    analyses.append(result['analysis'])
+                yield dumps(result, sort_keys=False) + b'\n'
+        finally:
+            # um único commit no histórico para o lote inteiro (também se o cliente desconectar)
+            analysis_history.record_many(analyses, source='batch')
+
+    response = app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-store'
+    # proxies (nginx) não devem acumular a resposta antes de enviar
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Histórico de análises e estatísticas agregadas (kb/history.py), no lugar do localStorage.
+# ANALYSIS_HISTORY_PATH aponta o arquivo SQLite (padrão: diretório temporário).
+analysis_history = AnalysisHistory(
+    os.environ.get('ANALYSIS_HISTORY_PATH') or os.path.join(tempfile.gettempdir(), 'kb-analyses.sqlite3')
+)
+
+# ?limit=50&cursor=<next_cursor>&language=python&since=2024-01-01T00:00:00
+@app.route('/api/analyses')
+def list_analyses():
+    language = request.args.get('language', '').lower().strip() or None
+    try:
+        limit = int(request.args.get('limit', 50))
+        if not 1 <= limit <= MAX_PAGE_LIMIT:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": f"Parâmetro 'limit' deve ser um inteiro entre 1 e {MAX_PAGE_LIMIT}"
+        }), 400
+    
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "error": "Parâmetro 'since' deve ser uma data ISO 8601"
+            }), 400
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+    
+    try:
+        items, next_cursor = analysis_history.page(limit, request.args.get('cursor'), language, since or None)
+    except InvalidCursor:
+        return jsonify({
+            "success": False,
+            "error": "Parâmetro 'cursor' inválido"
+        }), 400
+    
+    return jsonify({
+        "success": True,
+        "analyses": items,
+        "count": len(items),
+        "next_cursor": next_cursor
+    })
+
+@app.route('/api/analyses/stats')
+def analyses_stats():
+    language = request.args.get('language', '').lower().strip() or None
+    return jsonify({
+        "success": True,
+        "stats": analysis_history.stats(language)
     })
 
 # Health check para Vercel
@@ -291,13 +875,36 @@ def health_check():
         "service": "Knowledge Base API",
         "version": "1.0.0",
         "environment": os.environ.get('VERCEL_ENV', 'production'),
-        "languages_count": len(knowledge_base)
+        "languages_count": len(knowledge_base),
+        "data_version": kb_version,
+        "data_generation": kb_generation,
+        "data_last_modified": kb_last_modified.isoformat(),
+        "cache": {**response_cache.stats(), **single_flight.stats()},
+        "rate_limit": rate_limiter.stats()
     })
 
-# Rota para servir arquivos estáticos
-@app.route('/static/<path:filename>')
+# Rota para servir arquivos estáticos.
+# Se existir arquivo.br/arquivo.gz ao lado (python -m kb.compression static), serve a
+# versão pré-comprimida aceita pelo cliente com o Content-Type do original.
+# Substitui a view do endpoint 'static' do Flask, que atende a mesma URL e tem precedência.
 def static_files(filename):
-    return send_from_directory(app.static_folder, filename, max_age=86400)
+    path = safe_join(app.static_folder, filename)
+    available = [encoding for encoding, suffix in FILE_SUFFIXES.items()
+                 if path and os.path.isfile(path + suffix)]
+    if not available:
+        return send_from_directory(app.static_folder, filename, max_age=86400)
+    encoding = negotiate(request.accept_encodings, available)
+    if not encoding:
+        response = send_from_directory(app.static_folder, filename, max_age=86400)
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(app.static_folder, filename + FILE_SUFFIXES[encoding],
+                                       mimetype=mimetype, max_age=86400)
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = static_files
 
 # Páginas de erro
 @app.errorhandler(404)
@@ -308,19 +915,48 @@ def page_not_found(e):
             "error": "Endpoint não encontrado",
             "available_endpoints": [
                 "/api/language/<name>",
+                "/api/language/<name>/similar",
+                "/api/languages?names=a,b",
+                "/api/languages/batch",
                 "/api/search",
                 "/api/compare",
-                "/api/contact"
+                "/api/stats",
+                "/api/contact",
+                "/api/contacts",
+                "/api/analyze",
+                "/api/analyze/batch",
+                "/api/analyses",
+                "/api/analyses/stats"
             ]
         }), 404
     return render_template('404.html'), 404
 
+@app.errorhandler(413)
+def request_too_large(e):
+    if request.path.startswith('/api/'):
+        return jsonify({
+            "success": False,
+            "error": f"Corpo da requisição excede o limite de {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"
+        }), 413
+    return e
+
 # Handler para Vercel
 def handler(event, context):
     """Handler para serverless functions do Vercel"""
     from vercel_wsgi import handle_request
     return handle_request(app, event, context)
 
+# Warm-up: gera as páginas na inicialização do processo (e a cada recarga da base)
+if PRERENDER_MODE == 'startup':
+    warm_prerendered_pages()
+
+# Build: `python app.py --prerender <dir>` grava as páginas (e .gz/.br) para PRERENDER_DIR
+if __name__ == '__main__' and len(sys.argv) > 2 and sys.argv[1] == '--prerender':
+    pages = build_prerendered_pages(knowledge_base, fast=False).warm(prerendered_page_keys(knowledge_base))
+    pages.write(sys.argv[2])
+    logging.info(f"{len(pages)} páginas geradas em {sys.argv[2]} (versão {knowledge_base.version})")
+    sys.exit(0)
+
 # Execução local apenas se não estiver no Vercel
 if __name__ == '__main__' and not os.environ.get('VERCEL'):
     port = int(os.environ.get('PORT', 5000))
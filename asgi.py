@@ -0,0 +1,216 @@
+"""Entrada ASGI: as mesmas rotas do app.py servidas por uvicorn.
+
+    uvicorn asgi:app --workers 2
+
+As views continuam sendo as do Flask (um único código para WSGI e ASGI). O que
+muda é quem espera pela rede: o event loop lê o corpo da requisição e envia a
+resposta, então um cliente lento (upload do formulário de contato, conexão
+móvel) não prende uma thread. As views só rodam, num pool de ASGI_THREADS
+threads, depois que o corpo inteiro chegou.
+"""
+import asyncio
+import concurrent.futures
+import io
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app, kb_watcher
+from kb.json_provider import dumps
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+# Pedaços da resposta em trânsito entre a thread da aplicação e o event loop
+STREAM_QUEUE_SIZE = 16
+
+
+class WSGIBridge:
+    """Adaptador ASGI -> WSGI com pool de threads limitado e corpo lido de forma assíncrona."""
+
+    def __init__(self, wsgi_app, max_threads=ASGI_THREADS, on_shutdown=None):
+        self.wsgi_app = wsgi_app
+        self.max_threads = max_threads
+        self.on_shutdown = on_shutdown
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='asgi')
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'websocket':
+            await send({'type': 'websocket.close', 'code': 1000})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.executor  # cria o pool antes da primeira requisição
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown is not None:
+                    self.on_shutdown()
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive, limit):
+        """Corpo completo; None se o cliente desconectou, False se passou do limite."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return False
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive, self.wsgi_app.config.get('MAX_CONTENT_LENGTH'))
+        if body is None:
+            return
+        if body is False:
+            await _send_simple(send, 413, {"success": False, "error": "Corpo da requisição muito grande"})
+            return
+
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        abandoned = threading.Event()
+        started = {}
+
+        def put(item):
+            """Entrega um item ao event loop; bloqueia a thread enquanto a fila está cheia."""
+            future = asyncio.run_coroutine_threadsafe(chunks.put(item), loop)
+            while True:
+                if abandoned.is_set():
+                    future.cancel()
+                    raise _Abandoned
+                try:
+                    return future.result(timeout=1)
+                except concurrent.futures.TimeoutError:
+                    continue
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+            return lambda data: put(data) if data else None
+
+        def run():
+            # view, iteração do corpo e close() numa única thread: respostas transmitidas
+            # (stream_with_context) abrem e fecham o contexto da requisição na mesma thread
+            try:
+                result = self.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk:
+                            put(chunk)
+                finally:
+                    close = getattr(result, 'close', None)
+                    if close is not None:
+                        close()
+                put(_END)
+            except _Abandoned:
+                pass
+            except Exception:
+                logging.exception("Erro ao executar a aplicação WSGI")
+                try:
+                    put(_FAILED)
+                except _Abandoned:
+                    pass
+
+        job = loop.run_in_executor(self.executor, run)
+        try:
+            await _send_chunks(send, chunks, started)
+        except BaseException:
+            # conexão encerrada ou servidor desligando: a thread para no próximo pedaço
+            abandoned.set()
+            raise
+        await job
+
+
+class _Abandoned(Exception):
+    """O event loop deixou de consumir a resposta."""
+
+
+_END = object()
+_FAILED = object()
+
+
+async def _send_chunks(send, chunks, started):
+    """Envia os pedaços produzidos pela thread da aplicação até o marcador de fim."""
+    response_started = False
+    while True:
+        item = await chunks.get()
+        if item is _FAILED:
+            if not response_started:
+                await _send_simple(send, 500, {"success": False, "error": "Erro interno do servidor"})
+                return
+            break
+        if not response_started:
+            await send({'type': 'http.response.start', 'status': started['status'],
+                        'headers': started['headers']})
+            response_started = True
+        if item is _END:
+            break
+        await send({'type': 'http.response.body', 'body': item, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _send_simple(send, status, payload):
+    """Resposta JSON gerada pelo próprio adaptador, quando a aplicação não chega a rodar"""
+    body = dumps(payload)
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode('ascii'))]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def build_environ(scope, body):
+    """Environ WSGI (PEP 3333) a partir do scope HTTP do ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+app = WSGIBridge(flask_app, on_shutdown=kb_watcher.stop)
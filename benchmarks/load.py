@@ -0,0 +1,201 @@
+"""Teste de carga: WSGI (gunicorn, app:app) x ASGI (uvicorn, asgi:app).
+
+Clientes rápidos repetem GETs numa rota da API enquanto clientes lentos enviam
+o corpo de um POST /api/contact aos poucos (como uma conexão móvel ruim). Com
+workers síncronos, cada cliente lento ocupa um worker inteiro; no ASGI, o corpo
+é lido pelo event loop e os clientes rápidos não esperam.
+
+Uso:
+    python benchmarks/load.py                       # sobe e compara os dois servidores
+    python benchmarks/load.py --url http://host:8000 # mede um servidor já em execução
+
+Requer gunicorn e uvicorn instalados. Só usa a biblioteca padrão no cliente.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    # mesmo número de processos; o WSGI tem 4 threads por worker (gthread)
+    'wsgi': ['gunicorn', 'app:app', '--workers', '2', '--threads', '4', '--bind', '127.0.0.1:{port}'],
+    'asgi': ['uvicorn', 'asgi:app', '--workers', '2', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+async def _read_response(reader):
+    """Lê status e corpo (Content-Length ou chunked); retorna (status, fechar conexão?)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexão fechada pelo servidor")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+class Client:
+    """Conexão keep-alive reaberta quando o servidor a fecha."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, head, body=b'', trickle=0.0):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.writer.write(head)
+            if trickle:
+                for i in range(0, len(body), 8):
+                    self.writer.write(body[i:i + 8])
+                    await self.writer.drain()
+                    await asyncio.sleep(trickle)
+            else:
+                self.writer.write(body)
+            await self.writer.drain()
+            status, close = await _read_response(self.reader)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            self.close()
+            raise
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def fast_client(host, port, path, deadline, latencies, errors):
+    client = Client(host, port)
+    head = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n\r\n".encode()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await client.request(head)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors.append('conexão')
+            await asyncio.sleep(0.01)
+            continue
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+    client.close()
+
+
+async def slow_client(host, port, deadline, trickle, completed):
+    client = Client(host, port)
+    body = json.dumps({"name": "Carga", "email": "carga@example.com", "message": "x" * 120}).encode()
+    head = (f"POST /api/contact HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode()
+    while time.perf_counter() < deadline:
+        try:
+            await client.request(head, body, trickle=trickle)
+            completed.append(1)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            await asyncio.sleep(0.01)
+    client.close()
+
+
+async def run_load(url, path, concurrency, slow, duration, trickle):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    deadline = time.perf_counter() + duration
+    latencies, errors, completed = [], [], []
+    tasks = [fast_client(host, port, path, deadline, latencies, errors) for _ in range(concurrency)]
+    tasks += [slow_client(host, port, deadline, trickle, completed) for _ in range(slow)]
+    await asyncio.gather(*tasks)
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+        'errors': len(errors),
+        'slow_posts': len(completed),
+    }
+
+
+def _wait_ready(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Servidor não respondeu em {url}")
+
+
+def run_server(kind, port, args):
+    command = [part.format(port=port) for part in SERVERS[kind]]
+    # sem limite de requisições: os clientes lentos repetem POST /api/contact
+    env = {**os.environ, 'KB_WATCH_INTERVAL': '0', 'RATE_LIMITS': ''}
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        _wait_ready(url)
+        return asyncio.run(run_load(url, args.path, args.concurrency, args.slow, args.duration, args.trickle))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', help='mede um servidor já em execução em vez de subir os dois')
+    parser.add_argument('--path', default='/api/language/python')
+    parser.add_argument('--concurrency', type=int, default=32, help='clientes rápidos')
+    parser.add_argument('--slow', type=int, default=8, help='clientes lentos (POST /api/contact)')
+    parser.add_argument('--trickle', type=float, default=0.05, help='pausa entre cada 8 bytes do corpo lento (s)')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.url:
+        results = {args.url: asyncio.run(run_load(args.url, args.path, args.concurrency, args.slow,
+                                                  args.duration, args.trickle))}
+    else:
+        results = {kind: run_server(kind, args.port + i, args) for i, kind in enumerate(SERVERS)}
+
+    columns = ('requests', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'errors', 'slow_posts')
+    print(f"{'':8}" + ''.join(f"{column:>12}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:8}" + ''.join(
+            f"{result[column]:12.1f}" if isinstance(result[column], float) else f"{result[column]:12}"
+            for column in columns
+        ))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
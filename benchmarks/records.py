@@ -0,0 +1,102 @@
+"""Alocações e tempo por requisição: registros imutáveis + JSON pré-serializado x caminho antigo.
+
+O caminho antigo é reproduzido aqui: base em dicionários, .copy() do registro
+para acrescentar query_timestamp, um dicionário de resumo por resultado da
+busca e tudo recodificado pelo json da biblioteca padrão. O novo chama as views
+reais (sem o cache de respostas); os dois rodam num contexto de requisição e
+geram um Response, então a sobrecarga do Flask é a mesma.
+
+Uso:  python benchmarks/records.py [iterações]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+LANGUAGE = 'python'
+QUERY = 'web'
+
+
+def _legacy_response(payload):
+    return app.app.response_class(json.dumps(payload), mimetype='application/json').get_data()
+
+
+def legacy_language(knowledge_base, key):
+    with app.app.test_request_context(f'/api/language/{key}'):
+        data = knowledge_base[key].copy()
+        data['query_timestamp'] = datetime.now().isoformat()
+        return _legacy_response({"success": True, "language": key, "data": data})
+
+
+def legacy_search(knowledge_base, query):
+    with app.app.test_request_context(f'/api/search?q={query}'):
+        return _legacy_search(knowledge_base, query)
+
+
+def _legacy_search(knowledge_base, query):
+    results = []
+    for key in app.get_search_index().search(query):
+        lang = knowledge_base[key]
+        results.append({
+            'key': key,
+            'name': lang['name'],
+            'description': lang['description'],
+            'popularity_rank': lang['popularity_rank'],
+            'category': lang['category']
+        })
+    return _legacy_response({"success": True, "query": query, "results": results,
+                             "total_found": len(results)})
+
+
+def current_language(key):
+    with app.app.test_request_context(f'/api/language/{key}'):
+        return app.get_language_details.__wrapped__(key).get_data()
+
+
+def current_search(query):
+    with app.app.test_request_context(f'/api/search?q={query}'):
+        return app.search_languages().get_data()
+
+
+def measure(fn, iterations):
+    """(pico de KiB alocados por chamada, µs por chamada)"""
+    fn()  # aquece índices e caches derivados
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - base
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return allocated / iterations / 1024, elapsed / iterations * 1e6
+
+
+def main(iterations=2000):
+    knowledge_base = {key: json.loads(app.knowledge_base.raw(key)) for key in app.knowledge_base}
+    cases = [
+        ('language  antigo', lambda: legacy_language(knowledge_base, LANGUAGE)),
+        ('language  atual ', lambda: current_language(LANGUAGE)),
+        ('search    antigo', lambda: legacy_search(knowledge_base, QUERY)),
+        ('search    atual ', lambda: current_search(QUERY)),
+    ]
+    print(f"{'caso':18} {'pico KiB/req':>13} {'µs/req':>9}")
+    for name, fn in cases:
+        kib, micros = measure(fn, iterations)
+        print(f"{name:18} {kib:13.2f} {micros:9.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1 @@
+"""Componentes internos da Knowledge Base API (cache, índices e carregamento de dados)."""
@@ -0,0 +1,302 @@
+"""Análise de código no servidor, com as mesmas regras do static/js/code-analysis.js.
+
+O analisador do navegador roda um code.includes() por regra e divide o código
+em linhas várias vezes. Aqui todas as regras de texto de uma linguagem viram
+uma única regex de literais (alternativas mais longas primeiro), percorrida
+uma vez sobre o código, sempre para a frente: cada ocorrência marca o literal
+encontrado e os contidos nele, que saem da regex (então o laço em Python roda
+no máximo uma vez por literal), e a varredura para quando não há mais nada a
+descobrir. O custo é linear no tamanho do código.
+
+Só a verificação de indentação precisa de estado por linha; ela percorre as
+linhas até a primeira violação.
+"""
+import re
+from functools import lru_cache
+
+# Mesmo conteúdo de getLanguageInfo() no JS (nome e boas práticas usados nas sugestões)
+LANGUAGE_INFO = {
+    'python': {
+        'name': 'Python',
+        'best_practices': ['Use docstrings para documentar funções e classes',
+                           'Prefira list comprehensions para loops simples',
+                           'Use context managers (with) para gerenciar recursos'],
+        'tools': ['Pylint', 'Black', 'Flake8', 'MyPy'],
+    },
+    'javascript': {
+        'name': 'JavaScript',
+        'best_practices': ['Use === em vez de == para comparações',
+                           'Trate erros com try-catch',
+                           'Evite funções muito longas'],
+        'tools': ['ESLint', 'Prettier', 'JSHint'],
+    },
+    'java': {
+        'name': 'Java',
+        'best_practices': ['Use Optional para valores que podem ser null',
+                           'Siga o princípio SOLID',
+                           'Trate exceções adequadamente'],
+        'tools': ['Checkstyle', 'PMD', 'SpotBugs'],
+    },
+    'cpp': {
+        'name': 'C++',
+        'best_practices': ['Siga a regra dos três/cinco/zero',
+                           'Evite macros quando possível',
+                           'Use namespaces para organizar código'],
+        'tools': ['Clang-Tidy', 'Cppcheck', 'PVS-Studio'],
+    },
+    'php': {
+        'name': 'PHP',
+        'best_practices': ['Siga PSR standards',
+                           'Use type hints e declare(strict_types=1)',
+                           'Evite funções globais quando possível'],
+        'tools': ['PHP_CodeSniffer', 'PHPStan', 'Psalm'],
+    },
+    'ruby': {
+        'name': 'Ruby',
+        'best_practices': ['Use blocos em vez de loops quando possível',
+                           'Documente com RDoc',
+                           'Mantenha métodos curtos'],
+        'tools': ['RuboCop', 'Reek', 'Fasterer'],
+    },
+    'rust': {
+        'name': 'Rust',
+        'best_practices': ['Siga as convenções do cargo clippy',
+                           'Use Result e Option em vez de exceções',
+                           'Evite unsafe code quando possível'],
+        'tools': ['Clippy', 'rustfmt', 'cargo-audit'],
+    },
+    'go': {
+        'name': 'Go',
+        'best_practices': ['Documente com godoc',
+                           'Mantenha funções pequenas',
+                           'Use interfaces quando apropriado'],
+        'tools': ['gofmt', 'golint', 'staticcheck'],
+    },
+    'swift': {
+        'name': 'Swift',
+        'best_practices': ['Use structs quando possível',
+                           'Prefira value types sobre reference types',
+                           'Use protocolos para abstração'],
+        'tools': ['SwiftLint', 'SwiftFormat', 'SwiftPM'],
+    },
+    'typescript': {
+        'name': 'TypeScript',
+        'best_practices': ['Evite any quando possível',
+                           'Use generics para código reutilizável',
+                           'Configure strict no tsconfig.json'],
+        'tools': ['ESLint', 'Prettier', 'TSLint'],
+    },
+}
+
+# Literais procurados em qualquer linguagem (estrutura, segurança, comentários, sugestões)
+COMMON_NEEDLES = (
+    'function', 'def', 'fn', 'public',
+    'password', 'senha', 'secret', 'SELECT *', 'FROM',
+    'TODO', 'FIXME', 'XXX',
+    '//', '#', '/*', '*/',
+)
+
+LANGUAGE_NEEDLES = {
+    'javascript': ('var ', '== ', '===', 'eval(', 'for (', '.length'),
+    'python': ('global ', 'print('),
+    'java': ('System.out.print', 'null', '.equals('),
+}
+
+# detectLanguage() do JS, na mesma ordem de prioridade
+DETECTION_RULES = (
+    ('python', ('def ', 'import ', 'print(')),
+    ('javascript', ('function', 'console.log', 'const ')),
+    ('java', ('public class', 'System.out.print')),
+    ('cpp', ('#include', 'std::')),
+)
+DETECTION_NEEDLES = tuple(needle for _, needles in DETECTION_RULES for needle in needles)
+DEFAULT_LANGUAGE = 'python'
+
+FUNCTION_RE = re.compile(r'function\s+\w+|def\s+\w+|fn\s+\w+|public\s+\w+\s+\w+\(')
+INDENT_CLOSERS = ('}', 'else', 'elif', 'except', 'finally')
+BLOCK_EXITS = ('return', 'break', 'continue')
+
+# Regex por conjunto de literais pendentes; a ordem de descoberta varia com o código
+MAX_CACHED_REGEXES = 512
+
+
+class Matcher:
+    """Regex única com os literais de uma linguagem que ainda não foram encontrados."""
+
+    def __init__(self, needles):
+        self.needles = frozenset(needles)
+        # numa posição a alternativa mais longa vence; as contidas nela também ocorrem
+        self.implied = {needle: frozenset(other for other in self.needles if other in needle)
+                        for needle in self.needles}
+        self._regexes = {}
+
+    def _regex(self, pending):
+        regex = self._regexes.get(pending)
+        if regex is None:
+            if len(self._regexes) >= MAX_CACHED_REGEXES:
+                self._regexes.clear()
+            ordered = sorted(pending, key=lambda needle: (-len(needle), needle))
+            regex = self._regexes[pending] = re.compile('|'.join(re.escape(needle) for needle in ordered))
+        return regex
+
+    def scan(self, code):
+        """(literais encontrados, há comentário /* ... */)"""
+        found = set()
+        block_open = None
+        block_comment = False
+        # '*/' só interessa depois de um '/*'
+        pending = self.needles - {'*/'}
+        position = 0
+        while pending:
+            match = self._regex(pending).search(code, position)
+            if match is None:
+                break
+            needle = match.group()
+            if needle == '*/':
+                if match.start() >= block_open + 2:
+                    block_comment = True
+                    pending = pending - {'*/'}
+            else:
+                found |= self.implied[needle]
+                pending = pending - self.implied[needle]
+                if needle == '/*' and '*/' in self.needles:
+                    block_open = match.start()
+                    pending = pending | {'*/'}
+            # continua na posição seguinte (não no fim do literal) para achar sobreposições
+            position = match.start() + 1
+        if block_comment:
+            found.add('*/')
+        return found, block_comment
+
+
+@lru_cache(maxsize=None)
+def get_matcher(language, detect):
+    needles = set(COMMON_NEEDLES)
+    languages = LANGUAGE_NEEDLES if detect else {language: LANGUAGE_NEEDLES.get(language, ())}
+    for extra in languages.values():
+        needles.update(extra)
+    if detect:
+        needles.update(DETECTION_NEEDLES)
+    return Matcher(needles)
+
+
+def detect_language(found):
+    for language, needles in DETECTION_RULES:
+        if any(needle in found for needle in needles):
+            return language
+    return DEFAULT_LANGUAGE
+
+
+def is_well_indented(code):
+    """isWellIndented() do JS: blocos abertos com '{' exigem 4 espaços a mais por nível."""
+    indent_level = 0
+    for line in code.split('\n'):
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        trimmed = stripped.rstrip()
+        current_indent = len(line) - len(stripped)
+        if current_indent < indent_level * 4 and not trimmed.startswith(INDENT_CLOSERS):
+            return False
+        if '{' in trimmed:
+            indent_level += 1
+        if '}' in trimmed or trimmed.startswith(BLOCK_EXITS):
+            indent_level = max(0, indent_level - 1)
+    return True
+
+
+def calculate_complexity(lines):
+    if lines < 20:
+        return 'Baixa'
+    if lines < 50:
+        return 'Média'
+    if lines < 100:
+        return 'Alta'
+    return 'Muito Alta'
+
+
+def detect_issues(language, found, lines):
+    issues = []
+    if lines > 100:
+        issues.append('Código muito longo - considere modularizar')
+    if not found & {'function', 'def', 'fn'}:
+        issues.append('Código sem estruturação em funções/métodos')
+
+    if language == 'javascript':
+        if 'var ' in found:
+            issues.append('Uso de "var" - prefira "const" ou "let"')
+        if '== ' in found and '===' not in found:
+            issues.append('Uso de comparação não estrita (==) em vez de (===)')
+        if 'eval(' in found:
+            issues.append('Uso de eval() - pode ser perigoso')
+    elif language == 'python':
+        if 'global ' in found:
+            issues.append('Uso de variáveis globais')
+        if 'print(' in found and lines > 10:
+            issues.append('Print statements em código de produção')
+    elif language == 'java':
+        if 'System.out.print' in found:
+            issues.append('Print statements em código Java')
+        if 'null' in found and '.equals(' in found:
+            issues.append('Possível NullPointerException ao usar .equals()')
+
+    if found & {'password', 'senha', 'secret'}:
+        issues.append('Possível exposição de credenciais no código')
+    if 'SELECT *' in found and 'FROM' in found:
+        issues.append('Uso de SELECT * - especifique as colunas necessárias')
+    return issues
+
+
+def generate_suggestions(language, found, lines, has_comments):
+    suggestions = list(LANGUAGE_INFO.get(language, LANGUAGE_INFO[DEFAULT_LANGUAGE])['best_practices'][:3])
+    if lines > 50:
+        suggestions.append('Considere dividir o código em funções/métodos menores')
+    if found & {'TODO', 'FIXME', 'XXX'}:
+        suggestions.append('Remova comentários TODO/FIXME antes do deploy')
+    if not has_comments:
+        suggestions.append('Adicione comentários para documentar a lógica complexa')
+    if language == 'javascript' and 'for (' in found and '.length' in found:
+        suggestions.append('Armazene o comprimento do array em uma variável antes do loop')
+    return suggestions
+
+
+def calculate_score(language, found, issues, has_comments, has_functions, well_indented):
+    score = 100 - len(issues) * 8
+    if has_comments:
+        score += 10
+    if has_functions:
+        score += 15
+    if well_indented:
+        score += 10
+    if language == 'javascript' and 'var ' in found:
+        score -= 15
+    if language == 'python' and 'global ' in found:
+        score -= 12
+    return max(0, min(100, score))
+
+
+def analyze(code, language=None):
+    """Mesmo resultado de performAnalysis(); language=None detecta a linguagem pelo código."""
+    detect = language is None
+    found, block_comment = get_matcher(language, detect).scan(code)
+    if detect:
+        language = detect_language(found)
+    lines = code.count('\n') + 1
+
+    has_comments = block_comment or bool(found & {'//', '#'})
+    has_functions = bool(found & {'function', 'def', 'fn', 'public'}) and FUNCTION_RE.search(code) is not None
+    issues = detect_issues(language, found, lines)
+    info = LANGUAGE_INFO.get(language, LANGUAGE_INFO[DEFAULT_LANGUAGE])
+    return {
+        'language': info['name'],
+        'language_key': language,
+        'detected': detect,
+        'lines': lines,
+        'characters': len(code),
+        'issues': issues,
+        'suggestions': generate_suggestions(language, found, lines, has_comments),
+        'score': calculate_score(language, found, issues, has_comments, has_functions,
+                                 is_well_indented(code)),
+        'complexity': calculate_complexity(lines),
+        'tools': info['tools'],
+    }
@@ -0,0 +1,368 @@
+"""Análise de muitos arquivos de uma vez (NDJSON, tar ou zip) num pool de processos.
+
+Os arquivos são lidos sob demanda da entrada e distribuídos entre os
+processos; cada resultado sai assim que fica pronto (iter_results), então a
+resposta pode ser transmitida em NDJSON. Dois limites de tempo protegem a
+função serverless: um por arquivo (aplicado com SIGALRM nos processos do pool
+ou quando a análise roda na thread principal) e um total para o lote,
+verificado a cada membro do arquivo compactado, inclusive os ignorados;
+esgotado o total, nada mais é lido nem enviado ao pool e os arquivos em
+andamento são reportados como não concluídos.
+
+Sem pool (workers=0) num servidor com threads, o SIGALRM não está disponível
+e o limite por arquivo não é aplicado: a análise é linear e cada arquivo tem
+no máximo MAX_FILE_BYTES, o que a mantém abaixo de ~0,3 s por arquivo.
+
+O tamanho declarado de cada membro (lido ou não) conta para MAX_TOTAL_BYTES
+antes de ele ser descompactado: para chegar ao membro seguinte, o tar
+precisa descompactar o atual, então um membro grande que não é código também
+custa CPU.
+"""
+import io
+import json
+import lzma
+import multiprocessing
+import os
+import posixpath
+import signal
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from kb.analysis import LANGUAGE_INFO, analyze
+
+EXTENSIONS = {
+    '.py': 'python',
+    '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript', '.jsx': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript',
+    '.java': 'java',
+    '.c': 'cpp', '.cc': 'cpp', '.cpp': 'cpp', '.cxx': 'cpp', '.h': 'cpp', '.hpp': 'cpp',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.rs': 'rust',
+    '.go': 'go',
+    '.swift': 'swift',
+}
+
+MAX_FILE_BYTES = 2 * 1024 * 1024
+MAX_TOTAL_BYTES = 32 * 1024 * 1024
+MAX_FILES = 5000
+
+
+# Erros de um arquivo compactado truncado ou corrompido, que só aparecem ao ler os membros
+ARCHIVE_ERRORS = (tarfile.TarError, zipfile.BadZipFile, EOFError, zlib.error, lzma.LZMAError, OSError,
+                  RuntimeError)
+
+
+class BatchInputError(ValueError):
+    """Entrada do lote ilegível (arquivo compactado corrompido, formato desconhecido...)."""
+
+
+class SourceFile:
+    __slots__ = ('path', 'code', 'language', 'error', 'size')
+
+    def __init__(self, path, code=None, language=None, error=None, size=None):
+        self.path = path
+        self.code = code
+        self.language = language
+        self.error = error
+        # bytes descompactados que o membro custa (declarados no arquivo compactado)
+        self.size = size if size is not None else len(code or '')
+
+    @property
+    def skipped(self):
+        """Membro que não é código-fonte: não é analisado, mas conta para os limites."""
+        return self.code is None and self.error is None
+
+
+def language_for_path(path):
+    return EXTENSIONS.get(posixpath.splitext(path)[1].lower())
+
+
+def _too_large(path, size):
+    return SourceFile(path, error=f"Arquivo maior que {MAX_FILE_BYTES // (1024 * 1024)} MB", size=size)
+
+
+def _decode(path, data, language, size):
+    if len(data) > MAX_FILE_BYTES:
+        return _too_large(path, size)
+    if b'\0' in data[:8192]:
+        return SourceFile(path, error="Arquivo binário", size=size)
+    return SourceFile(path, data.decode('utf-8', errors='replace').strip(), language, size=size)
+
+
+def detect_format(data, content_type=''):
+    """'zip', 'tar' ou 'ndjson', pelo Content-Type ou pelos primeiros bytes."""
+    content_type = content_type.split(';')[0].strip().lower()
+    if content_type in ('application/zip', 'application/x-zip-compressed') or data[:4] == b'PK\x03\x04':
+        return 'zip'
+    if content_type in ('application/x-tar', 'application/gzip', 'application/x-gzip', 'application/x-gtar') \
+            or data[:2] == b'\x1f\x8b' or data[:3] == b'BZh' or data[:6] == b'\xfd7zXZ\x00' \
+            or data[257:262] == b'ustar':
+        return 'tar'
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/json') \
+            or data.lstrip()[:1] == b'{':
+        return 'ndjson'
+    raise BatchInputError("Formato não reconhecido: envie NDJSON, .tar(.gz) ou .zip")
+
+
+def _iter_ndjson(data):
+    for number, line in enumerate(data.splitlines(), 1):
+        if not line.strip():
+            continue
+        path = f'linha {number}'
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield SourceFile(path, error="JSON inválido")
+            continue
+        if not isinstance(item, dict) or not isinstance(item.get('code'), str) or not item['code'].strip():
+            yield SourceFile(path, error="Campo 'code' é obrigatório")
+            continue
+        path = str(item.get('path') or path)
+        language = item.get('language')
+        if language is not None:
+            language = str(language).lower().strip()
+            if language not in LANGUAGE_INFO:
+                yield SourceFile(path, error=f"Linguagem '{item['language']}' não suportada na análise")
+                continue
+        else:
+            language = language_for_path(path)
+        yield SourceFile(path, item['code'].strip(), language)
+
+
+def _iter_tar(archive):
+    # todo membro é repassado (mesmo os ignorados) para que _limited e iter_results
+    # verifiquem os limites antes de o tar descompactá-lo ao avançar
+    with archive:
+        for member in archive:
+            language = language_for_path(member.name) if member.isfile() else None
+            if not language:
+                yield SourceFile(member.name, size=member.size)
+            elif member.size > MAX_FILE_BYTES:
+                yield _too_large(member.name, member.size)
+            else:
+                yield _decode(member.name, archive.extractfile(member).read(), language, member.size)
+
+
+def _iter_zip(archive):
+    with archive:
+        for info in archive.infolist():
+            language = language_for_path(info.filename) if not info.is_dir() else None
+            if not language:
+                yield SourceFile(info.filename, size=info.file_size)
+            elif info.file_size > MAX_FILE_BYTES:
+                yield _too_large(info.filename, info.file_size)
+            else:
+                try:
+                    with archive.open(info) as f:
+                        data = f.read(MAX_FILE_BYTES + 1)
+                except ARCHIVE_ERRORS as e:
+                    # o diretório central continua válido: só este membro é perdido
+                    yield SourceFile(info.filename, error=f"Membro corrompido: {e}", size=info.file_size)
+                    continue
+                yield _decode(info.filename, data, language, info.file_size)
+
+
+def _guarded(files):
+    """Repassa os membros; um erro de leitura no meio do arquivo encerra o lote com um resultado de erro."""
+    try:
+        yield from files
+    except ARCHIVE_ERRORS as e:
+        yield SourceFile('', error=f"Arquivo compactado corrompido ({e or type(e).__name__}); "
+                                   "o restante foi ignorado")
+
+
+def _limited(files):
+    """Interrompe a leitura ao passar de MAX_FILES arquivos ou MAX_TOTAL_BYTES descompactados.
+
+    O tamanho é conferido antes de o membro ser repassado, ou seja, antes de o
+    iterador do arquivo compactado avançar e descompactá-lo.
+    """
+    total = 0
+    count = 0
+    for source in files:
+        total += source.size
+        if total > MAX_TOTAL_BYTES:
+            yield SourceFile(source.path, error=f"Lote limitado a {MAX_TOTAL_BYTES // (1024 * 1024)} MB "
+                                                "descompactados; o restante foi ignorado")
+            return
+        if not source.skipped:
+            count += 1
+            if count > MAX_FILES:
+                yield SourceFile('', error=f"Lote limitado a {MAX_FILES} arquivos; o restante foi ignorado")
+                return
+        yield source
+
+
+def open_batch(data, content_type=''):
+    """Iterador de SourceFile; formatos inválidos falham aqui, antes de a resposta começar."""
+    kind = detect_format(data, content_type)
+    try:
+        if kind == 'zip':
+            files = _guarded(_iter_zip(zipfile.ZipFile(io.BytesIO(data))))
+        elif kind == 'tar':
+            files = _guarded(_iter_tar(tarfile.open(fileobj=io.BytesIO(data), mode='r:*')))
+        else:
+            files = _iter_ndjson(data)
+    except ARCHIVE_ERRORS as e:
+        raise BatchInputError(f"Arquivo compactado inválido: {e}") from e
+    return _limited(files)
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError
+
+
+def analyze_with_limit(code, language, time_limit):
+    """analyze() interrompido após time_limit segundos.
+
+    Só na thread principal do processo (SIGALRM); nas demais threads o limite é ignorado.
+    """
+    if not time_limit or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        return analyze(code, language)
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        return analyze(code, language)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Pool compartilhado entre requisições; None se processos não estão disponíveis (ex.: sem /dev/shm)."""
+    global _pool
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            try:
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            except (OSError, NotImplementedError):
+                return None
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _analyze_here(source, file_timeout):
+    try:
+        return _ok(source, analyze_with_limit(source.code, source.language, file_timeout))
+    except TimeoutError:
+        return _failed(source, "Tempo por arquivo esgotado")
+
+
+def _ok(source, analysis):
+    return {"path": source.path, "success": True, "analysis": analysis}
+
+
+def _failed(source, error):
+    return {"path": source.path, "success": False, "error": error}
+
+
+def iter_results(files, workers=0, file_timeout=2.0, total_budget=8.0, clock=time.monotonic):
+    """Resultados (dicts) na ordem em que terminam, seguidos de {'summary': {...}}."""
+    start = clock()
+    deadline = start + total_budget
+    stats = {'files': 0, 'analyzed': 0, 'failed': 0, 'skipped': 0, 'score_sum': 0}
+    budget_exhausted = False
+
+    def record(result):
+        stats['files'] += 1
+        if result['success']:
+            stats['analyzed'] += 1
+            stats['score_sum'] += result['analysis']['score']
+        else:
+            stats['failed'] += 1
+        return result
+
+    pool = get_pool(workers)
+    pending = {}
+    files = iter(files)
+    window = max(1, workers) * 2
+
+    for source in files:
+        if clock() >= deadline:
+            budget_exhausted = True
+            break
+        if source.skipped:
+            stats['skipped'] += 1
+            continue
+        if source.error:
+            yield record(_failed(source, source.error))
+            continue
+        if pool is not None:
+            try:
+                future = pool.submit(analyze_with_limit, source.code, source.language, file_timeout)
+            except (BrokenProcessPool, RuntimeError):
+                # processo morto (ex.: falta de memória) ou pool encerrado: segue sem processos
+                _discard_pool(pool)
+                pool = None
+        if pool is None:
+            yield record(_analyze_here(source, file_timeout))
+            continue
+        pending[future] = source
+        while len(pending) >= window:
+            yield from _drain(pool, pending, deadline, clock, record)
+            if clock() >= deadline:
+                break
+
+    while pending and clock() < deadline:
+        yield from _drain(pool, pending, deadline, clock, record)
+
+    if pending:
+        budget_exhausted = True
+        for future, source in pending.items():
+            future.cancel()
+            yield record(_failed(source, "Tempo total do lote esgotado"))
+
+    analyzed = stats['analyzed']
+    yield {"summary": {
+        "files": stats['files'],
+        "analyzed": analyzed,
+        "failed": stats['failed'],
+        "skipped": stats['skipped'],
+        "average_score": round(stats['score_sum'] / analyzed, 1) if analyzed else None,
+        "elapsed_ms": round((clock() - start) * 1000, 1),
+        "budget_exhausted": budget_exhausted,
+        "workers": workers if pool is not None else 0,
+    }}
+
+
+def _drain(pool, pending, deadline, clock, record):
+    """Espera ao menos um arquivo em andamento terminar (ou o prazo do lote)."""
+    done, _ = wait(pending, timeout=max(0.0, deadline - clock()), return_when=FIRST_COMPLETED)
+    for future in done:
+        source = pending.pop(future)
+        try:
+            yield record(_ok(source, future.result()))
+        except TimeoutError:
+            yield record(_failed(source, "Tempo por arquivo esgotado"))
+        except BrokenProcessPool:
+            # a próxima requisição cria um pool novo
+            _discard_pool(pool)
+            yield record(_failed(source, "Processo de análise interrompido"))
+        except Exception as e:  # erro inesperado num arquivo não derruba o lote
+            yield record(_failed(source, f"Falha na análise: {type(e).__name__}"))
+
+
+def default_workers():
+    """Um processo por CPU disponível (até 4); com uma CPU só, o pool apenas somaria custo de IPC."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    return min(4, cpus) if cpus > 1 else 0
@@ -0,0 +1,316 @@
+"""Cache LRU com TTL por entrada, limitado por número de entradas e bytes.
+
+ResponseCache é o backend em memória do processo; kb/cache_backends.py tem
+backends compartilhados (SQLite, Redis) com a mesma interface:
+get, set, delete, invalidate_tags, clear, sweep e stats.
+"""
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from kb.compression import compress_variants, is_compressible, variant_etag
+
+
+class ResponseCache:
+    """Cache em memória com despejo LRU, TTL por entrada e contadores."""
+
+    def __init__(self, max_entries=512, max_bytes=16 * 1024 * 1024,
+                 default_ttl=300, sweep_interval=30, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # chave -> (valor, expira_em, tamanho, tags); a ordem reflete o uso (LRU no início)
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._bytes = 0
+        self._last_sweep = clock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Retorna o valor em cache ou None se ausente/expirado."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _, _ = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, size=0, tags=()):
+        """Armazena um valor, despejando as entradas menos usadas se preciso.
+
+        As tags indicam de quais dados a entrada depende (ver invalidate_tags).
+        """
+        if size > self.max_bytes:
+            return False
+        now = self._clock()
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            if key in self._entries:
+                self._remove(key)
+            tags = frozenset(tags)
+            self._entries[key] = (value, now + ttl, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def invalidate_tags(self, tags):
+        """Remove as entradas marcadas com qualquer uma das tags; retorna quantas foram removidas."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def sweep(self):
+        """Remove todas as entradas expiradas; retorna quantas foram removidas."""
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _sweep(self, now):
+        expired = [key for key, (_, expires_at, _, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+    def _remove(self, key):
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# Headers repetidos numa resposta 304 (RFC 9110, seção 15.4.5)
+_NOT_MODIFIED_HEADERS = frozenset(('etag', 'last-modified', 'cache-control', 'expires', 'vary', 'content-location'))
+
+
+class CachedResponse:
+    """Resposta já serializada (corpo, status e headers) pronta para ser reconstruída.
+
+    variants guarda o corpo já comprimido por codificação ('br', 'gzip'), calculado
+    uma única vez quando a entrada é criada.
+    """
+
+    __slots__ = ('body', 'status', 'headers', 'etag', 'fresh_until', 'variants')
+
+    def __init__(self, body, status, headers, etag=None, fresh_until=None, variants=None):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.etag = etag
+        # instante (time.time) em que a entrada passa a ser "stale"; None = nunca
+        self.fresh_until = fresh_until
+        self.variants = variants or {}
+
+    @classmethod
+    def from_response(cls, response, fresh_until=None, compress_min_size=None):
+        """compress_min_size: gera as variantes comprimidas se o corpo for compressível (None = não comprime)"""
+        body = response.get_data()
+        # Content-Length é recalculado pela nova resposta
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'content-length']
+        variants = {}
+        if compress_min_size is not None and 'Content-Encoding' not in response.headers \
+                and is_compressible(response.mimetype, len(body), compress_min_size):
+            # preenchido numa falha de cache, dentro da requisição: níveis rápidos
+            variants = compress_variants(body, fast=True)
+            if variants:
+                headers.append(('Vary', 'Accept-Encoding'))
+        etag, _ = response.get_etag()
+        return cls(body, response.status_code, tuple(headers), etag, fresh_until, variants)
+
+    def is_stale(self, now=None):
+        return self.fresh_until is not None and (time.time() if now is None else now) >= self.fresh_until
+
+    def _headers_for(self, encoding, names=None):
+        headers = [(k, v) for k, v in self.headers if names is None or k.lower() in names]
+        if encoding:
+            etag = variant_etag(self.etag, encoding)
+            headers = [(k, f'"{etag}"' if k.lower() == 'etag' else v) for k, v in headers]
+            if names is None:
+                headers.append(('Content-Encoding', encoding))
+        return headers
+
+    def to_response(self, response_class, encoding=None):
+        """Cria uma nova resposta a cada hit, sem compartilhar objetos entre threads."""
+        body = self.variants[encoding] if encoding else self.body
+        return response_class(body, status=self.status, headers=self._headers_for(encoding))
+
+    def not_modified(self, response_class, encoding=None):
+        """Resposta 304 sem corpo, mantendo os headers de validação e cache."""
+        return response_class(status=304, headers=self._headers_for(encoding, _NOT_MODIFIED_HEADERS))
+
+    @property
+    def size(self):
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def to_bytes(self):
+        """Serialização para backends fora do processo: tamanho do cabeçalho + cabeçalho JSON + corpo + variantes."""
+        encodings = [[encoding, len(data)] for encoding, data in self.variants.items()]
+        meta = json.dumps([self.status, self.headers, self.etag, self.fresh_until, encodings],
+                          separators=(',', ':')).encode('utf-8')
+        return _META_LENGTH.pack(len(meta)) + meta + self.body + b''.join(self.variants.values())
+
+    @classmethod
+    def from_bytes(cls, data):
+        (meta_len,) = _META_LENGTH.unpack_from(data, 0)
+        start = _META_LENGTH.size
+        status, headers, etag, fresh_until, *rest = json.loads(data[start:start + meta_len])
+        # entradas gravadas antes das variantes comprimidas não têm a lista de codificações
+        encodings = rest[0] if rest else []
+        end = len(data)
+        variants = {}
+        for encoding, length in reversed(encodings):
+            variants[encoding] = bytes(data[end - length:end])
+            end -= length
+        body = bytes(data[start + meta_len:end])
+        return cls(body, status, tuple(map(tuple, headers)), etag, fresh_until, variants)
+
+
+_META_LENGTH = struct.Struct('<I')
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce execuções concorrentes por chave: uma thread calcula, as demais esperam o resultado.
+
+    Evita o "thundering herd" quando uma entrada popular expira e várias
+    requisições simultâneas recalculariam a mesma resposta.
+    """
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+        self.background = 0
+
+    def do(self, key, fn):
+        """Executa fn() uma vez por chave; retorna (resultado, compartilhado).
+
+        Quem chega enquanto outra thread calcula a mesma chave recebe o mesmo
+        resultado (ou a mesma exceção). Se a espera passar de timeout, calcula sozinho.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_in_background(self, key, fn):
+        """Dispara fn() numa thread se a chave não estiver em cálculo; retorna se disparou."""
+        with self._lock:
+            if key in self._calls:
+                return False
+            call = self._calls[key] = _Call()
+            self.background += 1
+
+        def run():
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                logging.getLogger(__name__).exception(f"Falha ao revalidar '{key}' em segundo plano")
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        threading.Thread(target=run, name='cache-revalidate', daemon=True).start()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "coalesced": self.coalesced, "revalidations": self.background}
@@ -0,0 +1,422 @@
+"""Backends de cache compartilhados entre workers e que sobrevivem a cold starts.
+
+Todos seguem a interface de kb.cache.ResponseCache e guardam CachedResponse
+serializado (CachedResponse.to_bytes). As chaves recebem o prefixo
+"<namespace>:" para que várias implantações possam usar o mesmo armazenamento.
+Falhas do armazenamento são registradas e tratadas como miss: o cache nunca
+derruba a requisição.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from kb.cache import CachedResponse, ResponseCache
+from kb.sqlite import connect, transaction
+
+logger = logging.getLogger(__name__)
+
+# Erros de CachedResponse.from_bytes com um valor corrompido: tratados como miss
+CORRUPT_ENTRY_ERRORS = (ValueError, TypeError, struct.error)
+
+
+class _Counters:
+    """Contadores locais do processo (hits/misses não são compartilhados)."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteCache:
+    """Cache em arquivo SQLite (WAL) no disco local, compartilhado pelos workers da máquina."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_cache_entries_expires ON cache_entries (expires_at);
+        CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed_at);
+        CREATE TABLE IF NOT EXISTS cache_tags (
+            tag TEXT NOT NULL,
+            key TEXT NOT NULL,
+            PRIMARY KEY (tag, key)
+        ) WITHOUT ROWID;
+    """
+
+    # Atualiza accessed_at (ordem LRU) no máximo uma vez por intervalo, evitando uma escrita por hit
+    TOUCH_INTERVAL = 5
+
+    def __init__(self, path, namespace='kb', max_entries=512, max_bytes=16 * 1024 * 1024,
+                 default_ttl=300, sweep_interval=30):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self._counters = _Counters()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _bounds(self):
+        """Intervalo [início, fim) das chaves deste namespace (';' vem logo depois de ':')."""
+        return f"{self.namespace}:", f"{self.namespace};"
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?', (self._key(key),)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._counters.misses += 1
+                return None
+            value = CachedResponse.from_bytes(row[0])
+            if now - row[2] >= self.TOUCH_INTERVAL:
+                conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, self._key(key)))
+        except sqlite3.Error as e:
+            self._counters.errors += 1
+            logger.warning(f"Cache SQLite indisponível: {e}")
+            return None
+        except CORRUPT_ENTRY_ERRORS as e:
+            self._counters.misses += 1
+            logger.warning(f"Entrada de cache corrompida ignorada ({key}): {e}")
+            return None
+        self._counters.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None, size=0, tags=()):
+        data = value.to_bytes()
+        if len(data) > self.max_bytes:
+            return False
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        namespaced = self._key(key)
+        try:
+            with transaction(self._connection()) as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (namespaced, data, len(data), now + ttl, now)
+                )
+                conn.execute('DELETE FROM cache_tags WHERE key = ?', (namespaced,))
+                conn.executemany(
+                    'INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)',
+                    [(self._key(tag), namespaced) for tag in tags]
+                )
+                if now - self._last_sweep >= self.sweep_interval:
+                    self._sweep(conn, now)
+                self._evict(conn)
+        except sqlite3.Error as e:
+            self._counters.errors += 1
+            logger.warning(f"Cache SQLite indisponível: {e}")
+            return False
+        return True
+
+    def _evict(self, conn):
+        """Remove as entradas menos usadas do namespace até respeitar os limites de entradas e bytes.
+
+        Os limites valem por namespace: implantações que dividem o arquivo não despejam umas às outras.
+        """
+        bounds = self._bounds()
+        count, total = conn.execute(
+            'SELECT COUNT(*), TOTAL(size) FROM cache_entries WHERE key >= ? AND key < ?', bounds
+        ).fetchone()
+        excess_entries = count - self.max_entries
+        excess_bytes = total - self.max_bytes
+        if excess_entries <= 0 and excess_bytes <= 0:
+            return
+        victims = []
+        for key, size in conn.execute(
+                'SELECT key, size FROM cache_entries WHERE key >= ? AND key < ? ORDER BY accessed_at', bounds):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            victims.append((key,))
+            excess_entries -= 1
+            excess_bytes -= size
+        self._delete_keys(conn, victims)
+
+    def _sweep(self, conn, now):
+        expired = conn.execute(
+            'SELECT key FROM cache_entries WHERE expires_at <= ? AND key >= ? AND key < ?', (now, *self._bounds())
+        ).fetchall()
+        self._delete_keys(conn, expired)
+        self._last_sweep = now
+        return len(expired)
+
+    @staticmethod
+    def _delete_keys(conn, keys):
+        conn.executemany('DELETE FROM cache_entries WHERE key = ?', keys)
+        conn.executemany('DELETE FROM cache_tags WHERE key = ?', keys)
+
+    def delete(self, key):
+        try:
+            conn = self._connection()
+            self._delete_keys(conn, [(self._key(key),)])
+        except sqlite3.Error as e:
+            logger.warning(f"Cache SQLite indisponível: {e}")
+
+    def invalidate_tags(self, tags):
+        try:
+            with transaction(self._connection()) as conn:
+                keys = set()
+                for tag in tags:
+                    keys.update(conn.execute('SELECT key FROM cache_tags WHERE tag = ?', (self._key(tag),)))
+                self._delete_keys(conn, list(keys))
+            return len(keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache SQLite indisponível: {e}")
+            return 0
+
+    def clear(self):
+        # intervalo em vez de LIKE: '_' e '%' no namespace não viram curingas
+        try:
+            with transaction(self._connection()) as conn:
+                conn.execute('DELETE FROM cache_entries WHERE key >= ? AND key < ?', self._bounds())
+                conn.execute('DELETE FROM cache_tags WHERE key >= ? AND key < ?', self._bounds())
+        except sqlite3.Error as e:
+            logger.warning(f"Cache SQLite indisponível: {e}")
+
+    def sweep(self):
+        try:
+            with transaction(self._connection()) as conn:
+                return self._sweep(conn, time.time())
+        except sqlite3.Error as e:
+            logger.warning(f"Cache SQLite indisponível: {e}")
+            return 0
+
+    def stats(self):
+        stats = {"backend": "sqlite", "path": self.path, "namespace": self.namespace}
+        try:
+            count, total = self._connection().execute(
+                'SELECT COUNT(*), TOTAL(size) FROM cache_entries WHERE key >= ? AND key < ?', self._bounds()
+            ).fetchone()
+            stats.update(entries=count, bytes=int(total))
+        except sqlite3.Error:
+            pass
+        stats.update(max_entries=self.max_entries, max_bytes=self.max_bytes, **self._counters.as_dict())
+        return stats
+
+
+class RedisError(Exception):
+    """Resposta de erro (-ERR ...) do servidor Redis."""
+
+
+class RedisClient:
+    """Cliente mínimo do protocolo Redis (RESP2), uma conexão por thread, sem dependências."""
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, timeout=1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or '127.0.0.1', parsed.port or 6379, db, parsed.password, **kwargs)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def execute(self, *args):
+        """Envia um comando e retorna a resposta; reconecta uma vez se a conexão caiu."""
+        if getattr(self._local, 'sock', None) is None:
+            self._connect()
+        try:
+            return self._call(*args)
+        except (OSError, ConnectionError):
+            self.close()
+            self._connect()
+            return self._call(*args)
+
+    def _call(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._local.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Conexão com o Redis encerrada")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Resposta RESP inválida: {line!r}")
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+
+class RedisCache:
+    """Cache num servidor Redis (ou compatível), compartilhado entre máquinas.
+
+    O limite de memória e a política de despejo ficam a cargo do servidor
+    (maxmemory / allkeys-lru); cada entrada expira sozinha pelo TTL (PX).
+    """
+
+    TAG_TTL_MS = 24 * 60 * 60 * 1000
+
+    def __init__(self, client, namespace='kb', max_bytes=16 * 1024 * 1024, default_ttl=300):
+        self.client = client
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._counters = _Counters()
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.namespace}:tag:{tag}"
+
+    def get(self, key):
+        try:
+            data = self.client.execute('GET', self._key(key))
+        except (OSError, RedisError) as e:
+            self._counters.errors += 1
+            logger.warning(f"Cache Redis indisponível: {e}")
+            return None
+        if data is None:
+            self._counters.misses += 1
+            return None
+        try:
+            value = CachedResponse.from_bytes(data)
+        except CORRUPT_ENTRY_ERRORS as e:
+            self._counters.misses += 1
+            logger.warning(f"Entrada de cache corrompida ignorada ({key}): {e}")
+            return None
+        self._counters.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None, size=0, tags=()):
+        data = value.to_bytes()
+        if len(data) > self.max_bytes:
+            return False
+        ttl_ms = int((self.default_ttl if ttl is None else ttl) * 1000)
+        namespaced = self._key(key)
+        try:
+            self.client.execute('SET', namespaced, data, 'PX', ttl_ms)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                self.client.execute('SADD', tag_key, namespaced)
+                # renovado a cada uso; membros de entradas já expiradas são inofensivos
+                self.client.execute('PEXPIRE', tag_key, max(ttl_ms, self.TAG_TTL_MS))
+        except (OSError, RedisError) as e:
+            self._counters.errors += 1
+            logger.warning(f"Cache Redis indisponível: {e}")
+            return False
+        return True
+
+    def delete(self, key):
+        try:
+            self.client.execute('DEL', self._key(key))
+        except (OSError, RedisError) as e:
+            logger.warning(f"Cache Redis indisponível: {e}")
+
+    def invalidate_tags(self, tags):
+        removed = 0
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = self.client.execute('SMEMBERS', tag_key) or []
+                if keys:
+                    removed += self.client.execute('DEL', *keys)
+                self.client.execute('DEL', tag_key)
+        except (OSError, RedisError) as e:
+            logger.warning(f"Cache Redis indisponível: {e}")
+        return removed
+
+    def clear(self):
+        cursor = b'0'
+        while True:
+            cursor, keys = self.client.execute('SCAN', cursor, 'MATCH', f"{self.namespace}:*", 'COUNT', 500)
+            if keys:
+                self.client.execute('DEL', *keys)
+            if cursor in (b'0', 0, '0'):
+                break
+
+    def sweep(self):
+        # o Redis expira as chaves sozinho
+        return 0
+
+    def stats(self):
+        stats = {"backend": "redis", "namespace": self.namespace, "max_bytes": self.max_bytes}
+        stats.update(self._counters.as_dict())
+        return stats
+
+
+def create_cache_backend(kind='memory', namespace='kb', max_entries=512,
+                         max_bytes=16 * 1024 * 1024, sqlite_path=None, redis_url=None):
+    """Cria o backend configurado: 'memory' (padrão), 'sqlite' ou 'redis'."""
+    if kind == 'sqlite':
+        path = sqlite_path or os.path.join(tempfile.gettempdir(), 'kb-cache.sqlite3')
+        return SQLiteCache(path, namespace=namespace, max_entries=max_entries, max_bytes=max_bytes)
+    if kind == 'redis':
+        client = RedisClient.from_url(redis_url or 'redis://127.0.0.1:6379/0')
+        return RedisCache(client, namespace=namespace, max_bytes=max_bytes)
+    if kind != 'memory':
+        raise ValueError(f"Backend de cache desconhecido: '{kind}'")
+    return ResponseCache(max_entries=max_entries, max_bytes=max_bytes)
@@ -0,0 +1,86 @@
+"""Comparação entre linguagens com matriz de similaridade pré-calculada por versão dos dados.
+
+A similaridade é a mesma de /api/language/<nome>/similar: cosseno entre os
+vetores de atributos de kb.similar.FeatureIndex, calculado para todos os pares
+uma vez por versão. Para o diff, cada conjunto (paradigmas, casos de uso,
+frameworks) vira um bitmap (int) por linguagem; o que é compartilhado ou
+exclusivo sai de & / | entre bitmaps, sem manipular sets.
+"""
+from itertools import combinations
+
+from kb.similar import FeatureIndex
+
+# Conjuntos comparados no diff
+SET_FEATURES = ('paradigms', 'use_cases', 'frameworks')
+
+
+class SimilarityMatrix:
+    """Similaridade (0..1) entre todos os pares de linguagens e diff estruturado de um grupo."""
+
+    def __init__(self, knowledge_base, index=None):
+        self.keys = list(knowledge_base)
+        self._position = {key: i for i, key in enumerate(self.keys)}
+        self._vocabulary = {}
+        self._bitmaps = {}
+        for feature in SET_FEATURES:
+            vocabulary = {}
+            bitmaps = []
+            for key in self.keys:
+                mask = 0
+                for value in knowledge_base[key][feature]:
+                    mask |= 1 << vocabulary.setdefault(value, len(vocabulary))
+                bitmaps.append(mask)
+            self._vocabulary[feature] = list(vocabulary)
+            self._bitmaps[feature] = bitmaps
+        self._typing = [knowledge_base[key]['typing'] for key in self.keys]
+        self._years = [knowledge_base[key].get('created_year') for key in self.keys]
+
+        index = index if index is not None else FeatureIndex(knowledge_base)
+        self._matrix = index.pairwise(self.keys)
+
+    def similarity(self, a, b):
+        return self._matrix[self._position[a]][self._position[b]]
+
+    def row(self, key):
+        """Similaridade de uma linguagem com todas as outras, na ordem de self.keys."""
+        return self._matrix[self._position[key]]
+
+    def _names(self, feature, mask):
+        vocabulary = self._vocabulary[feature]
+        return [vocabulary[bit] for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+    def diff(self, keys):
+        """Compartilhado/exclusivo por grupo, tipagem, diferença de anos e similaridade par a par."""
+        positions = [self._position[key] for key in keys]
+        analysis = {}
+        for feature in SET_FEATURES:
+            bitmaps = [self._bitmaps[feature][i] for i in positions]
+            shared = bitmaps[0]
+            for mask in bitmaps[1:]:
+                shared &= mask
+            unique = {}
+            for n, (key, mask) in enumerate(zip(keys, bitmaps)):
+                others = 0
+                for m, other in enumerate(bitmaps):
+                    if m != n:
+                        others |= other
+                unique[key] = self._names(feature, mask & ~others)
+            analysis[feature] = {'shared': self._names(feature, shared), 'unique': unique}
+
+        typing = {key: self._typing[i] for key, i in zip(keys, positions)}
+        analysis['typing'] = {'values': typing, 'same': len(set(typing.values())) == 1}
+
+        years = {key: self._years[i] for key, i in zip(keys, positions) if self._years[i]}
+        analysis['created_year'] = {
+            'values': years,
+            'span': max(years.values()) - min(years.values()) if years else None,
+        }
+
+        analysis['similarity'] = sorted(
+            (
+                {'languages': [a, b], 'score': self._matrix[i][j]}
+                for (a, i), (b, j) in combinations(zip(keys, positions), 2)
+            ),
+            key=lambda pair: -pair['score'],
+        )
+        return analysis
@@ -0,0 +1,94 @@
+"""Compressão gzip/brotli feita uma única vez por corpo, com negociação via Accept-Encoding.
+
+Uso como etapa de build (gera os .gz/.br servidos por /static):  python -m kb.compression static
+"""
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há variantes gzip
+    brotli = None
+
+# Em ordem de preferência do servidor
+PREFERENCE = ('br', 'gzip')
+AVAILABLE_ENCODINGS = PREFERENCE if brotli is not None else ('gzip',)
+
+# Extensão dos arquivos pré-comprimidos de cada codificação
+FILE_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# Abaixo disso o ganho não compensa os headers extras e o custo de descompressão
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                      'image/svg+xml')
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.html', '.svg', '.txt', '.xml', '.map')
+
+
+def compress(data, encoding, fast=False):
+    """fast=True usa níveis menores, para corpos comprimidos a cada requisição."""
+    if encoding == 'gzip':
+        # mtime fixo: o mesmo conteúdo gera sempre os mesmos bytes (ETag estável)
+        return gzip.compress(data, compresslevel=6 if fast else 9, mtime=0)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(data, quality=5 if fast else 11)
+    raise ValueError(f"Codificação não suportada: '{encoding}'")
+
+
+def compress_variants(data, encodings=AVAILABLE_ENCODINGS, fast=False):
+    """Variantes comprimidas que realmente ficam menores que o original.
+
+    Níveis máximos só no build (precompress_directory, páginas pré-renderizadas
+    em disco); durante uma requisição use fast=True.
+    """
+    variants = {}
+    for encoding in encodings:
+        compressed = compress(data, encoding, fast)
+        if len(compressed) < len(data):
+            variants[encoding] = compressed
+    return variants
+
+
+def is_compressible(mimetype, size, min_size=MIN_SIZE):
+    return size >= min_size and bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate(accept_encodings, available):
+    """Melhor codificação aceita pelo cliente entre as disponíveis (None = identidade)."""
+    if not available:
+        return None
+    ordered = [encoding for encoding in PREFERENCE if encoding in available]
+    return accept_encodings.best_match(ordered)
+
+
+def variant_etag(etag, encoding):
+    """Cada representação precisa de um ETag próprio (o corpo comprimido é outro)."""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def precompress_directory(directory, min_size=MIN_SIZE):
+    """Grava arquivo.gz/arquivo.br ao lado de cada arquivo de texto; retorna quantos foram gerados."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            variants = compress_variants(data) if len(data) >= min_size else {}
+            for encoding, suffix in FILE_SUFFIXES.items():
+                if encoding in variants:
+                    with open(path + suffix, 'wb') as f:
+                        f.write(variants[encoding])
+                    written += 1
+                elif os.path.exists(path + suffix):
+                    # variante de uma versão anterior do arquivo
+                    os.unlink(path + suffix)
+    return written
+
+
+if __name__ == '__main__':
+    for directory in sys.argv[1:] or ['static']:
+        print(f"{directory}: {precompress_directory(directory)} arquivos comprimidos")
@@ -0,0 +1,241 @@
+"""Fila durável das mensagens de contato (SQLite, WAL) com gravação em lote.
+
+A requisição só valida, coloca a mensagem numa fila em memória e espera o
+recibo. Uma thread escritora esvazia a fila: todas as mensagens que chegaram
+enquanto o commit anterior acontecia entram na mesma transação, e um único
+fsync (synchronous=FULL) confirma o lote inteiro (group commit). Com muitas
+requisições simultâneas, o custo do fsync é dividido entre elas.
+
+Reenvios idênticos (mesmo nome, e-mail e mensagem dentro de dedup_window
+segundos) não criam uma nova linha: o recibo traz o id e o horário da
+mensagem original.
+
+As mensagens têm nome e e-mail, então o arquivo é criado só com permissão do
+dono (0600); o SQLite cria os arquivos -wal/-shm com a mesma permissão.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from kb.sqlite import connect, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(name, email, message):
+    digest = hashlib.sha256()
+    for part in (name, email, message):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _create_private(path):
+    """Cria (ou restringe) o arquivo do banco com modo 0600, recusando links simbólicos."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    try:
+        os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+class Receipt:
+    """Resultado da gravação de uma mensagem, preenchido pela thread escritora."""
+
+    __slots__ = ('record', 'hash', 'contact_id', 'duplicate', 'error', '_done')
+
+    def __init__(self, record, record_hash):
+        self.record = record
+        self.hash = record_hash
+        self.contact_id = record['id']
+        self.duplicate = False
+        self.error = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """True se a gravação terminou (com sucesso ou erro) dentro do prazo."""
+        return self._done.wait(timeout)
+
+    def resolve(self, contact_id=None, duplicate=False, error=None, timestamp=None):
+        if contact_id is not None:
+            self.contact_id = contact_id
+        if timestamp is not None:
+            # reenvio: o horário é o da mensagem original
+            self.record['timestamp'] = timestamp
+        self.duplicate = duplicate
+        self.error = error
+        self._done.set()
+
+
+class ContactStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS contacts (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            content_hash TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            received_at REAL NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_contacts_hash ON contacts (content_hash, received_at);
+    """
+
+    INSERT = ('INSERT INTO contacts (id, content_hash, created_at, received_at, name, email, message, status) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+    COLUMNS = 'seq, id, created_at, name, email, message, status'
+
+    def __init__(self, path, max_batch=512, dedup_window=86400):
+        self.path = path
+        self.max_batch = max_batch
+        self.dedup_window = dedup_window
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.counters = {'submitted': 0, 'written': 0, 'duplicates': 0, 'batches': 0, 'errors': 0}
+        if path != ':memory:':
+            _create_private(path)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # fsync a cada commit: a mensagem confirmada sobrevive a uma queda da máquina
+            conn = self._local.conn = connect(self.path, synchronous='FULL')
+        return conn
+
+    def submit(self, name, email, message):
+        """Enfileira a mensagem e retorna o Receipt; use receipt.wait() para esperar o commit."""
+        record = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "email": email,
+            "message": message,
+            "timestamp": datetime.now().isoformat(),
+            "status": "received",
+        }
+        receipt = Receipt(record, content_hash(name, email, message))
+        self._ensure_writer()
+        self._count('submitted')
+        self._queue.put(receipt)
+        return receipt
+
+    def _count(self, name, n=1):
+        # incrementados pelas threads das requisições e pela escritora
+        with self._lock:
+            self.counters[name] += n
+
+    def _ensure_writer(self):
+        # a thread é criada no processo que vai usá-la (workers do gunicorn são forks)
+        if self._writer_running():
+            return
+        with self._lock:
+            if not self._writer_running():
+                if self._pid != os.getpid():
+                    # só depois de um fork: a fila herdada não tem escritora neste processo.
+                    # Se a thread morreu no mesmo processo, a fila (e os recibos pendentes) continua
+                    self._queue = queue.SimpleQueue()
+                    self._local = threading.local()
+                    self._pid = os.getpid()
+                    atexit.register(self.close)
+                self._thread = threading.Thread(target=self._run, name='kb-contacts', daemon=True)
+                self._thread.start()
+
+    def _writer_running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            receipt = self._queue.get()
+            if receipt is None:
+                return
+            batch = [receipt]
+            # tudo que chegou durante o commit anterior vai no mesmo lote
+            while len(batch) < self.max_batch:
+                try:
+                    receipt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if receipt is None:
+                    self._write(batch)
+                    return
+                batch.append(receipt)
+            self._write(batch)
+
+    def _write(self, batch):
+        now = time.time()
+        resolved = []
+        try:
+            with transaction(self._connection()) as conn:
+                seen = {}
+                for receipt in batch:
+                    original = seen.get(receipt.hash)
+                    if original is None:
+                        original = conn.execute(
+                            'SELECT id, created_at FROM contacts WHERE content_hash = ? AND received_at >= ? '
+                            'ORDER BY received_at LIMIT 1',
+                            (receipt.hash, now - self.dedup_window)
+                        ).fetchone()
+                    if original is not None:
+                        resolved.append((receipt, original, True))
+                        continue
+                    record = receipt.record
+                    conn.execute(self.INSERT, (record['id'], receipt.hash, record['timestamp'], now,
+                                               record['name'], record['email'], record['message'],
+                                               record['status']))
+                    seen[receipt.hash] = (record['id'], record['timestamp'])
+                    resolved.append((receipt, (record['id'], None), False))
+        except Exception as e:
+            # qualquer falha resolve o lote inteiro: nenhum recibo fica esperando até o timeout
+            self._count('errors', len(batch))
+            logger.error(f"Falha ao gravar {len(batch)} mensagens de contato: {e}")
+            for receipt in batch:
+                receipt.resolve(error=str(e) or type(e).__name__)
+            return
+        duplicates = sum(1 for _, _, duplicate in resolved if duplicate)
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['duplicates'] += duplicates
+            self.counters['written'] += len(resolved) - duplicates
+        for receipt, (contact_id, timestamp), duplicate in resolved:
+            receipt.resolve(contact_id, duplicate, timestamp=timestamp)
+
+    def close(self, timeout=5):
+        """Grava o que está na fila e encerra a thread escritora."""
+        if self._writer_running():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def page(self, limit=50, cursor=None):
+        """(mensagens mais recentes primeiro, cursor da próxima página ou None)."""
+        if cursor is not None:
+            rows = self._connection().execute(
+                f'SELECT {self.COLUMNS} FROM contacts WHERE seq < ? ORDER BY seq DESC LIMIT ?', (cursor, limit + 1)
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                f'SELECT {self.COLUMNS} FROM contacts ORDER BY seq DESC LIMIT ?', (limit + 1,)
+            ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        items = [
+            {"seq": seq, "id": contact_id, "timestamp": created_at, "name": name, "email": email,
+             "message": message, "status": status}
+            for seq, contact_id, created_at, name, email, message, status in rows[:limit]
+        ]
+        return items, next_cursor
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "queued": self._queue.qsize()}
@@ -0,0 +1,205 @@
+"""Histórico de análises de código e estatísticas agregadas (SQLite, WAL).
+
+Substitui o saveToHistory()/updateStats() do static/js/code-analysis.js, que
+guardam tudo no localStorage do navegador. Cada análise vira uma linha em
+`analyses` (só metadados: o código analisado não é guardado) e, na mesma
+transação, os totais da linguagem em `analysis_stats` são atualizados; as
+estatísticas nunca varrem o histórico.
+
+A paginação é por cursor (keyset): a próxima página começa depois do par
+(created_at, id) do último item, usando o índice em vez de OFFSET, então o
+custo de uma página não cresce com o tamanho do histórico.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from kb.sqlite import connect, transaction
+
+logger = logging.getLogger(__name__)
+
+CURSOR_RE = re.compile(r'^(\d+)-(\d+)$')
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginação malformado."""
+
+
+def encode_cursor(created_at, row_id):
+    return f"{created_at}-{row_id}"
+
+
+def decode_cursor(cursor):
+    match = CURSOR_RE.match(cursor)
+    if match is None:
+        raise InvalidCursor(cursor)
+    return int(match.group(1)), int(match.group(2))
+
+
+def _isoformat(created_at):
+    return datetime.fromtimestamp(created_at / 1000, timezone.utc).isoformat(timespec='milliseconds')
+
+
+class AnalysisHistory:
+    """Histórico persistente de análises, compartilhado pelos workers da máquina."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at INTEGER NOT NULL,
+            language TEXT NOT NULL,
+            detected INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            characters INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            complexity TEXT NOT NULL,
+            issues INTEGER NOT NULL,
+            source TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_analyses_created ON analyses (created_at);
+        CREATE INDEX IF NOT EXISTS ix_analyses_language_created ON analyses (language, created_at);
+        CREATE TABLE IF NOT EXISTS analysis_stats (
+            language TEXT PRIMARY KEY,
+            total INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            characters INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            issues INTEGER NOT NULL,
+            last_at INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    INSERT = ('INSERT INTO analyses (created_at, language, detected, lines, characters, score, complexity, '
+              'issues, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+
+    # agregados atualizados na mesma transação do INSERT
+    UPSERT_STATS = """
+        INSERT INTO analysis_stats (language, total, lines, characters, score_sum, issues, last_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (language) DO UPDATE SET
+            total = total + excluded.total,
+            lines = lines + excluded.lines,
+            characters = characters + excluded.characters,
+            score_sum = score_sum + excluded.score_sum,
+            issues = issues + excluded.issues,
+            last_at = MAX(last_at, excluded.last_at)
+    """
+
+    COLUMNS = 'id, created_at, language, detected, lines, characters, score, complexity, issues, source'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def record(self, analysis, source='api'):
+        """Grava uma análise (resultado de kb.analysis.analyze); retorna o id ou None em caso de falha."""
+        ids = self.record_many([analysis], source)
+        return ids[0] if ids else None
+
+    def record_many(self, analyses, source='api'):
+        """Grava várias análises numa única transação (um commit para o lote inteiro)."""
+        created_at = int(time.time() * 1000)
+        rows = [
+            (created_at, a['language_key'], int(a['detected']), a['lines'], a['characters'], a['score'],
+             a['complexity'], len(a['issues']), source)
+            for a in analyses
+        ]
+        if not rows:
+            return []
+        totals = {}
+        for row in rows:
+            item = totals.setdefault(row[1], [0, 0, 0, 0, 0])
+            item[0] += 1
+            item[1] += row[3]
+            item[2] += row[4]
+            item[3] += row[5]
+            item[4] += row[7]
+        try:
+            with transaction(self._connection()) as conn:
+                ids = [conn.execute(self.INSERT, row).lastrowid for row in rows]
+                conn.executemany(self.UPSERT_STATS, [
+                    (language, *values, created_at) for language, values in totals.items()
+                ])
+        except sqlite3.Error as e:
+            # o histórico nunca derruba a análise
+            logger.warning(f"Histórico de análises indisponível: {e}")
+            return []
+        return ids
+
+    def page(self, limit=50, cursor=None, language=None, since=None):
+        """(itens mais recentes primeiro, cursor da próxima página ou None)."""
+        conditions, params = [], []
+        if language:
+            conditions.append('language = ?')
+            params.append(language)
+        if since is not None:
+            conditions.append('created_at >= ?')
+            params.append(int(since.timestamp() * 1000))
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend((created_at, row_id))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        # um item a mais indica se existe próxima página
+        rows = self._connection().execute(
+            f'SELECT {self.COLUMNS} FROM analyses {where} ORDER BY created_at DESC, id DESC LIMIT ?',
+            (*params, limit + 1)
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._item(row) for row in rows[:limit]], next_cursor
+
+    @staticmethod
+    def _item(row):
+        row_id, created_at, language, detected, lines, characters, score, complexity, issues, source = row
+        return {
+            "id": row_id,
+            "timestamp": _isoformat(created_at),
+            "language_key": language,
+            "detected": bool(detected),
+            "lines": lines,
+            "characters": characters,
+            "score": score,
+            "complexity": complexity,
+            "issues": issues,
+            "source": source,
+        }
+
+    def stats(self, language=None):
+        """Totais gerais e por linguagem, lidos da tabela de agregados."""
+        query = 'SELECT language, total, lines, characters, score_sum, issues, last_at FROM analysis_stats'
+        params = ()
+        if language:
+            query += ' WHERE language = ?'
+            params = (language,)
+        by_language = {}
+        total = lines = score_sum = 0
+        for lang, count, lang_lines, characters, lang_score, issues, last_at in self._connection().execute(query, params):
+            by_language[lang] = {
+                "total": count,
+                "lines": lang_lines,
+                "characters": characters,
+                "average_score": round(lang_score / count, 1),
+                "issues": issues,
+                "last_analysis": _isoformat(last_at),
+            }
+            total += count
+            lines += lang_lines
+            score_sum += lang_score
+        by_language = dict(sorted(by_language.items(), key=lambda item: -item[1]['total']))
+        return {
+            "total": total,
+            "lines": lines,
+            "average_score": round(score_sum / total, 1) if total else None,
+            "top_language": next(iter(by_language), None),
+            "by_language": by_language,
+        }
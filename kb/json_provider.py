@@ -0,0 +1,115 @@
+"""Serialização JSON das respostas com o codificador mais rápido disponível.
+
+Ordem de escolha: orjson, ujson e, sem nenhum dos dois, o json da biblioteca
+padrão (JSON_BACKEND=orjson|ujson|json força um deles). A saída é sempre a
+mesma: UTF-8 sem escapes, sem espaços e com as chaves ordenadas.
+
+RawJSON marca um valor já serializado (ex.: o registro de uma linguagem no
+snapshot), que é inserido na saída sem ser decodificado e recodificado.
+"""
+import json
+import os
+import re
+import secrets
+from collections.abc import Mapping
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _select_backend(name):
+    if name == 'orjson' or (name is None and orjson is not None):
+        if orjson is None:
+            raise ImportError("JSON_BACKEND=orjson, mas o orjson não está instalado")
+        return 'orjson'
+    if name == 'ujson' or (name is None and ujson is not None):
+        if ujson is None:
+            raise ImportError("JSON_BACKEND=ujson, mas o ujson não está instalado")
+        return 'ujson'
+    return 'json'
+
+
+BACKEND = _select_backend(os.environ.get('JSON_BACKEND') or None)
+
+# orjson >= 3.9 insere fragmentos prontos nativamente; nos demais casos o valor
+# vira um marcador (com um token aleatório por processo) substituído depois
+_Fragment = getattr(orjson, 'Fragment', None) if BACKEND == 'orjson' else None
+_PLACEHOLDER = f'__kb_raw_{secrets.token_hex(8)}_'
+_PLACEHOLDER_RE = re.compile(rb'"' + _PLACEHOLDER.encode('ascii') + rb'(\d+)"')
+
+
+class RawJSON:
+    """Valor já codificado em JSON (bytes UTF-8)."""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _default_unsupported(obj):
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+def _encode(obj, default, sort_keys):
+    if BACKEND == 'orjson':
+        # datetimes passam pelo default para manter o formato do Flask (HTTP date)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    if BACKEND == 'ujson':
+        return ujson.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, escape_forward_slashes=False,
+                           default=default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(',', ':'),
+                      default=default).encode('utf-8')
+
+
+def dumps(obj, default=_default_unsupported, sort_keys=True):
+    """obj em JSON (bytes), inserindo os RawJSON sem recodificá-los."""
+    fragments = []
+
+    def encode_default(value):
+        if isinstance(value, RawJSON):
+            if _Fragment is not None:
+                return _Fragment(value.data)
+            fragments.append(value.data)
+            return f'{_PLACEHOLDER}{len(fragments) - 1}'
+        if isinstance(value, Mapping):
+            # registros imutáveis (LanguageRecord, MappingProxyType)
+            return dict(value)
+        return default(value)
+
+    data = _encode(obj, encode_default, sort_keys)
+    if fragments:
+        data = _PLACEHOLDER_RE.sub(lambda match: fragments[int(match[1])], data)
+    return data
+
+
+def loads(data):
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    if BACKEND == 'ujson':
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider do Flask sobre dumps/loads; jsonify gera bytes direto, sem str intermediária."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, kwargs.get('default', self.default)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, self.default), mimetype=self.mimetype)
@@ -0,0 +1,382 @@
+"""Carregamento da base de conhecimento a partir dos arquivos JSON.
+
+Os arquivos de dados (knowledge_base.json + data/*.json) são validados e
+compilados num snapshot binário: um índice com o offset de cada linguagem
+seguido dos registros em JSON compacto. O snapshot é aberto com mmap e cada
+registro só é decodificado quando uma requisição o acessa, como um
+LanguageRecord imutável. Os registros são gravados já no formato das respostas
+da API (UTF-8, chaves ordenadas), então os bytes podem ser copiados direto
+para a resposta.
+
+O snapshot é identificado pelo conteúdo dos arquivos de dados (sha256), não
+pelo mtime, então o knowledge_base.kbs versionado no repositório continua
+válido depois de um checkout ou deploy e a função serverless não recompila a
+base a cada cold start. Depois de editar os dados, gere-o de novo:
+
+    python -m kb.loader
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+DEFAULT_DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRIMARY_FILE = 'knowledge_base.json'
+EXTRA_DIR = 'data'
+SNAPSHOT_NAME = 'knowledge_base.kbs'
+
+SNAPSHOT_MAGIC = b'KBSNAP2\n'
+_HEADER = struct.Struct('<8sI')
+
+REQUIRED_FIELDS = {
+    'name': str,
+    'description': str,
+    'typing': str,
+    'paradigms': list,
+    'package_manager': str,
+    'popularity_rank': int,
+    'category': str,
+    'frameworks': list,
+    'use_cases': list,
+}
+
+OPTIONAL_DEFAULTS = {
+    'version': '',
+    'learning_curve': '',
+    'community_size': '',
+    'job_market': '',
+    'syntax_example': '',
+    'icon': 'fas fa-code',
+    'color': '#6c757d',
+    'created_year': None,
+    'creator': '',
+}
+
+# Todos os campos de um registro normalizado
+RECORD_FIELDS = tuple(REQUIRED_FIELDS) + tuple(OPTIONAL_DEFAULTS) + ('details',)
+
+
+class KnowledgeBaseError(ValueError):
+    """Arquivo de dados ausente, malformado ou com registro inválido."""
+
+
+def discover_sources(data_dir):
+    """Arquivos de dados na ordem de precedência (os últimos sobrescrevem campos dos primeiros)."""
+    sources = []
+    primary = os.path.join(data_dir, PRIMARY_FILE)
+    if os.path.isfile(primary):
+        sources.append(primary)
+    extra_dir = os.path.join(data_dir, EXTRA_DIR)
+    if os.path.isdir(extra_dir):
+        sources.extend(
+            os.path.join(extra_dir, name)
+            for name in sorted(os.listdir(extra_dir))
+            if name.endswith('.json')
+        )
+    if not sources:
+        raise KnowledgeBaseError(f"Nenhum arquivo de dados encontrado em '{data_dir}'")
+    return sources
+
+
+def source_signature(sources):
+    """Identifica o conjunto de arquivos pelo conteúdo (nome, tamanho, sha256)."""
+    signature = []
+    for path in sources:
+        with open(path, 'rb') as f:
+            data = f.read()
+        signature.append([os.path.basename(path), len(data), hashlib.sha256(data).hexdigest()])
+    return signature
+
+
+def source_mtime(sources):
+    """Instante da última alteração dos arquivos, em segundos (Last-Modified das respostas)."""
+    return max(os.stat(path).st_mtime_ns for path in sources) / 1e9
+
+
+def _from_details(key, raw):
+    """Converte uma entrada no formato detalhado do knowledge_base.json para o formato da API."""
+    traits = raw.get('caracteristicas', {})
+    frameworks = raw.get('frameworks', [])
+    if isinstance(frameworks, dict):
+        flat = []
+        for group in frameworks.values():
+            flat.extend(fw for fw in group if fw not in flat)
+        frameworks = flat
+    return {
+        'name': key.capitalize(),
+        'description': raw.get('intro', ''),
+        'typing': traits.get('tipagem', ''),
+        'paradigms': list(traits.get('paradigma', [])),
+        'package_manager': traits.get('gerenciador_pacotes', ''),
+        'version': str(traits.get('versao_atual', '')),
+        'created_year': traits.get('ano_criacao'),
+        'creator': traits.get('criador', ''),
+        'community_size': traits.get('comunidade', ''),
+        'frameworks': frameworks,
+        'use_cases': list(raw.get('principais_usos', [])),
+        'syntax_example': raw.get('exemplos', {}).get('hello_world', ''),
+        'details': raw,
+    }
+
+
+def _details_from_record(record):
+    """Monta o bloco usado pelo result.html quando a linguagem não tem entrada detalhada."""
+    return {
+        'intro': record['description'],
+        'principais_usos': record['use_cases'],
+        'caracteristicas': {
+            'tipagem': record['typing'],
+            'paradigma': record['paradigms'],
+            'gerenciador_pacotes': record['package_manager'],
+            'versao_atual': record['version'],
+            'ano_criacao': record['created_year'],
+            'criador': record['creator'],
+            'comunidade': record['community_size'],
+        },
+        'frameworks': {'principais': record['frameworks'][:5]},
+        'exemplos': {'hello_world': record['syntax_example']},
+    }
+
+
+def normalize_entry(key, raw):
+    if not isinstance(raw, dict):
+        raise KnowledgeBaseError(f"Entrada '{key}' deve ser um objeto JSON")
+    if 'intro' in raw:
+        return _from_details(key, raw)
+    return dict(raw)
+
+
+def validate_entry(key, record):
+    for field, expected in REQUIRED_FIELDS.items():
+        value = record.get(field)
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise KnowledgeBaseError(
+                f"Linguagem '{key}': campo '{field}' ausente ou inválido (esperado {expected.__name__})"
+            )
+    for field in ('paradigms', 'frameworks', 'use_cases'):
+        if not all(isinstance(item, str) for item in record[field]):
+            raise KnowledgeBaseError(f"Linguagem '{key}': '{field}' deve conter apenas textos")
+
+
+def read_sources(sources):
+    """Lê, mescla, completa e valida todos os arquivos; retorna {chave: registro}."""
+    merged = {}
+    for path in sources:
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise KnowledgeBaseError(f"Falha ao ler '{path}': {e}") from e
+        if not isinstance(data, dict):
+            raise KnowledgeBaseError(f"'{path}' deve conter um objeto {{chave: linguagem}}")
+        for key, raw in data.items():
+            key = key.lower().strip()
+            merged[key] = {**merged.get(key, {}), **normalize_entry(key, raw)}
+
+    records = {}
+    for key, record in merged.items():
+        for field, default in OPTIONAL_DEFAULTS.items():
+            if record.get(field) in (None, ''):
+                record[field] = default
+        validate_entry(key, record)
+        record.setdefault('details', _details_from_record(record))
+        # só os campos do esquema da API (os mesmos slots de LanguageRecord)
+        records[key] = {field: record[field] for field in RECORD_FIELDS}
+    return records
+
+
+def compile_snapshot(records, signature, last_modified):
+    """Serializa os registros no formato do snapshot (cabeçalho + índice + registros)."""
+    order = sorted(records, key=lambda key: (records[key]['popularity_rank'], key))
+    blobs = []
+    entries = []
+    offset = 0
+    digest = hashlib.sha1()
+    for key in order:
+        blob = json.dumps(records[key], ensure_ascii=False, sort_keys=True,
+                          separators=(',', ':')).encode('utf-8')
+        entries.append([key, offset, len(blob)])
+        blobs.append(blob)
+        digest.update(key.encode('utf-8') + b'\0' + blob)
+        offset += len(blob)
+    index = json.dumps({
+        'version': digest.hexdigest()[:12],
+        'last_modified': last_modified,
+        'sources': signature,
+        'entries': entries,
+    }, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(SNAPSHOT_MAGIC, len(index)) + index + b''.join(blobs)
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+class LanguageRecord(Mapping):
+    """Registro imutável de uma linguagem: um slot por campo, sem __dict__ por instância.
+
+    Compartilhado por todas as requisições; listas viram tuplas e objetos
+    aninhados (details) viram MappingProxyType, então ninguém altera o registro.
+    """
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, record):
+        for field in RECORD_FIELDS:
+            object.__setattr__(self, field, _freeze(record[field]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LanguageRecord é somente-leitura")
+
+    def __delattr__(self, name):
+        raise AttributeError("LanguageRecord é somente-leitura")
+
+    def __getitem__(self, field):
+        if field not in _RECORD_FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def __len__(self):
+        return len(RECORD_FIELDS)
+
+    def __repr__(self):
+        return f"LanguageRecord(name={self.name!r})"
+
+
+_RECORD_FIELD_SET = frozenset(RECORD_FIELDS)
+
+
+class Snapshot(Mapping):
+    """Mapping somente-leitura sobre um snapshot; decodifica cada registro no primeiro acesso."""
+
+    def __init__(self, buffer):
+        magic, index_len = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise KnowledgeBaseError("Snapshot com formato desconhecido")
+        start = _HEADER.size
+        index = json.loads(bytes(buffer[start:start + index_len]))
+        self._buffer = buffer
+        self._base = start + index_len
+        self._offsets = {key: (offset, length) for key, offset, length in index['entries']}
+        self._keys = [key for key, _, _ in index['entries']]
+        self._records = {}
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+        self.version = index['version']
+        self.last_modified = index['last_modified']
+        self.sources = index['sources']
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def raw(self, key):
+        """Bytes JSON do registro, sem decodificar."""
+        offset, length = self._offsets[key]
+        start = self._base + offset
+        return bytes(self._buffer[start:start + length])
+
+    def derived(self, name, factory):
+        """Estrutura derivada (índice, agregados...) calculada uma única vez por snapshot."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = factory(self)
+            return self._derived[name]
+
+    def changed_keys(self, other):
+        """Chaves adicionadas, removidas ou com conteúdo diferente em relação a outro snapshot."""
+        changed = set(self._offsets).symmetric_difference(other._offsets)
+        for key in self._offsets.keys() & other._offsets.keys():
+            if self.raw(key) != other.raw(key):
+                changed.add(key)
+        return changed
+
+    def __getitem__(self, key):
+        record = self._records.get(key)
+        if record is None:
+            record = LanguageRecord(json.loads(self.raw(key)))
+            self._records[key] = record
+        return record
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def snapshot_candidates(data_dir, snapshot_path=None):
+    if snapshot_path:
+        return [snapshot_path]
+    # o diretório do projeto pode ser somente-leitura (ex.: Vercel); /tmp é o fallback
+    return [os.path.join(data_dir, SNAPSHOT_NAME), os.path.join(tempfile.gettempdir(), SNAPSHOT_NAME)]
+
+
+def _open_if_fresh(path, signature):
+    try:
+        snapshot = Snapshot.open(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    return snapshot if snapshot.sources == signature else None
+
+
+def _write_atomic(path, payload):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.kbs-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_knowledge_base(data_dir=DEFAULT_DATA_DIR, snapshot_path=None):
+    """Abre um snapshot atualizado ou compila um novo a partir dos arquivos de dados."""
+    sources = discover_sources(data_dir)
+    signature = source_signature(sources)
+    candidates = snapshot_candidates(data_dir, snapshot_path)
+    for path in candidates:
+        snapshot = _open_if_fresh(path, signature)
+        if snapshot is not None:
+            return snapshot
+
+    payload = compile_snapshot(read_sources(sources), signature, source_mtime(sources))
+    for path in candidates:
+        try:
+            _write_atomic(path, payload)
+            return Snapshot.open(path)
+        except OSError:
+            continue
+    return Snapshot(payload)
+
+
+if __name__ == '__main__':
+    kb = load_knowledge_base(
+        os.environ.get('KB_DATA_DIR') or DEFAULT_DATA_DIR,
+        snapshot_path=os.environ.get('KB_SNAPSHOT_PATH'),
+    )
+    print(f"{len(kb)} linguagens, versão {kb.version}")
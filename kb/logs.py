@@ -0,0 +1,114 @@
+"""Logging estruturado (uma linha JSON por evento) escrito fora da thread da requisição.
+
+O root logger recebe um QueueHandler que só enfileira o LogRecord; a
+formatação e a escrita no stream acontecem na thread de um QueueListener.
+Campos estruturados vão em extra={'fields': {...}}.
+
+LOG_FORMAT=json (padrão) ou text; LOG_SAMPLE_RATES controla a amostragem do
+log de acesso por prefixo de rota (ex.: "/static/=0.05,/api/language/=0.2").
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+
+from kb.json_provider import dumps
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Rotas de alto volume: só uma fração das requisições bem-sucedidas é registrada
+DEFAULT_SAMPLE_RATES = '/static/=0.05,/health=0.05,/api/language/=0.2,/api/search=0.2'
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return dumps(entry, sort_keys=False).decode('utf-8')
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível do app, com os campos estruturados ao final da linha."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        return f"{line} {dumps(fields, sort_keys=False).decode('utf-8')}" if fields else line
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enfileira o registro como está; getMessage() e a formatação rodam no listener."""
+
+    def prepare(self, record):
+        return record
+
+
+_listener = None
+
+
+def setup_logging(level=logging.INFO, fmt=None, stream=None):
+    """Troca os handlers do root logger pela fila; idempotente (app.py e api/index.py chamam)."""
+    global _listener
+    if _listener is not None:
+        return _listener
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+    return _listener
+
+
+def parse_sample_rates(value):
+    """"prefixo=taxa,..." -> [(prefixo, taxa)], prefixos mais longos primeiro."""
+    rates = []
+    for item in value.split(','):
+        prefix, sep, rate = item.strip().rpartition('=')
+        if not sep or not prefix:
+            continue
+        rates.append((prefix, min(1.0, max(0.0, float(rate)))))
+    return sorted(rates, key=lambda item: -len(item[0]))
+
+
+class RequestSampler:
+    """Decide se uma requisição entra no log de acesso.
+
+    Erros (status >= 400) e requisições lentas são sempre registrados; as demais
+    seguem a taxa do prefixo de rota mais longo (1.0 se nenhum casar).
+    """
+
+    def __init__(self, rates=DEFAULT_SAMPLE_RATES, slow_seconds=1.0):
+        self.rates = parse_sample_rates(rates)
+        self.slow_seconds = slow_seconds
+
+    def rate_for(self, path):
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return 1.0
+
+    def sample(self, path, status, duration):
+        """Taxa com que a requisição foi amostrada, ou None se não deve ser registrada."""
+        if status >= 400 or duration >= self.slow_seconds:
+            return 1.0
+        rate = self.rate_for(path)
+        if rate >= 1.0 or (rate > 0.0 and random.random() < rate):
+            return rate
+        return None
@@ -0,0 +1,116 @@
+"""Páginas HTML pré-renderizadas por versão dos dados, em memória ou geradas em disco.
+
+Em memória, cada página é renderizada e comprimida no primeiro acesso à sua
+chave e reaproveitada depois; uma requisição nunca paga pelas demais páginas.
+
+Layout em disco (python app.py --prerender <dir>):
+    <dir>/manifest.json          versão dos dados e chave -> arquivo
+    <dir>/index.html             + .gz/.br
+    <dir>/query/<linguagem>.html + .gz/.br
+"""
+import hashlib
+import json
+import os
+import threading
+
+from kb.compression import FILE_SUFFIXES, compress_variants
+
+
+class PrerenderedPage:
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body, variants=None, fast=False):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.variants = variants if variants is not None else compress_variants(body, fast=fast)
+
+
+class PrerenderedPages:
+    """Conjunto de páginas de uma versão da base: chave -> PrerenderedPage.
+
+    render(chave) -> HTML (ou None para chaves sem página) gera as páginas que
+    ainda não existem; fast=True comprime em níveis rápidos, para páginas
+    geradas durante uma requisição.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, version, pages=None, render=None, fast=False):
+        self.version = version
+        self._pages = pages or {}
+        self._render = render
+        self._fast = fast
+        self._lock = threading.Lock()
+
+    def add(self, key, html):
+        page = PrerenderedPage(html.encode('utf-8'), fast=self._fast)
+        self._pages[key] = page
+        return page
+
+    def get(self, key):
+        page = self._pages.get(key)
+        if page is not None or self._render is None or key is None:
+            return page
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                html = self._render(key)
+                if html is not None:
+                    page = self.add(key, html)
+        return page
+
+    def warm(self, keys):
+        """Gera de uma vez as páginas que faltam (build ou inicialização, fora das requisições)."""
+        for key in keys:
+            self.get(key)
+        return self
+
+    def __len__(self):
+        return len(self._pages)
+
+    @staticmethod
+    def _filename(key):
+        # 'home' -> index.html, 'query:' -> query/index.html, 'query:rust' -> query/rust.html
+        if key == 'home':
+            return 'index.html'
+        prefix, _, name = key.partition(':')
+        return f"{prefix}/{name or 'index'}.html"
+
+    def write(self, directory):
+        """Grava HTML e variantes comprimidas (.gz/.br) para servir direto do disco ou de uma CDN."""
+        files = {}
+        for key, page in self._pages.items():
+            filename = self._filename(key)
+            path = os.path.join(directory, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(page.body)
+            for encoding, data in page.variants.items():
+                with open(path + FILE_SUFFIXES[encoding], 'wb') as f:
+                    f.write(data)
+            files[key] = filename
+        with open(os.path.join(directory, self.MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'pages': files}, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, version):
+        """Páginas geradas no build, ou None se o diretório não existe ou é de outra versão."""
+        try:
+            with open(os.path.join(directory, cls.MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != version:
+            return None
+        pages = {}
+        for key, filename in manifest['pages'].items():
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                body = f.read()
+            variants = {}
+            for encoding, suffix in FILE_SUFFIXES.items():
+                if os.path.exists(path + suffix):
+                    with open(path + suffix, 'rb') as f:
+                        variants[encoding] = f.read()
+            pages[key] = PrerenderedPage(body, variants)
+        return cls(version, pages)
@@ -0,0 +1,78 @@
+"""Projeções de registros (subconjuntos de campos), calculadas uma vez por versão dos dados."""
+import threading
+from collections import OrderedDict
+
+from kb.json_provider import RawJSON, dumps
+
+# Campos do modo compacto (clientes móveis: listagens e cards)
+COMPACT_FIELDS = ('name', 'popularity_rank', 'category')
+
+# Campos de cada item do resultado de /api/search (além de 'key')
+SUMMARY_FIELDS = ('name', 'description', 'popularity_rank', 'category')
+
+
+class ProjectionCache:
+    """Guarda, por conjunto de campos, o registro projetado de cada linguagem.
+
+    Mantida no snapshot (Snapshot.derived), então é descartada junto com ele na
+    recarga. Só os max_projections conjuntos de campos mais usados ficam em memória.
+    """
+
+    def __init__(self, knowledge_base, max_projections=64):
+        self._knowledge_base = knowledge_base
+        self._max_projections = max_projections
+        self._projections = OrderedDict()
+        self._encoded = OrderedDict()
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fields):
+        """Registro da linguagem apenas com os campos pedidos (None = registro completo)."""
+        record = self._knowledge_base[key]
+        if fields is None:
+            return record
+        with self._lock:
+            projection = self._projections.get(fields)
+            if projection is None:
+                projection = self._projections[fields] = {}
+                if len(self._projections) > self._max_projections:
+                    self._projections.popitem(last=False)
+            else:
+                self._projections.move_to_end(fields)
+            projected = projection.get(key)
+            if projected is None:
+                projected = projection[key] = {field: record[field] for field in fields}
+            return projected
+
+    def encoded(self, key, fields):
+        """Mesmo que get(), já em JSON (RawJSON) para ser inserido na resposta sem recodificar.
+
+        O registro completo são os próprios bytes do snapshot; as projeções são
+        codificadas no primeiro uso.
+        """
+        with self._lock:
+            encoded = self._encoded.get(fields)
+            if encoded is None:
+                encoded = self._encoded[fields] = {}
+                if len(self._encoded) > self._max_projections:
+                    self._encoded.popitem(last=False)
+            else:
+                self._encoded.move_to_end(fields)
+            raw = encoded.get(key)
+        if raw is None:
+            if fields is None:
+                raw = RawJSON(self._knowledge_base.raw(key))
+            else:
+                raw = RawJSON(dumps(self.get(key, fields)))
+            encoded[key] = raw
+        return raw
+
+    def summary(self, key):
+        """Resumo da linguagem (key + SUMMARY_FIELDS) já em JSON, montado uma vez por versão."""
+        raw = self._summaries.get(key)
+        if raw is None:
+            record = self._knowledge_base[key]
+            summary = {'key': key}
+            summary.update((field, record[field]) for field in SUMMARY_FIELDS)
+            raw = self._summaries[key] = RawJSON(dumps(summary))
+        return raw
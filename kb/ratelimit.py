@@ -0,0 +1,238 @@
+"""Limite de requisições por cliente e rota (token bucket).
+
+Cada par (IP, regra) tem um balde com até `capacity` fichas que se recarrega a
+capacity/period fichas por segundo; cada requisição gasta uma ficha e, com o
+balde vazio, a resposta é 429 com Retry-After. O estado de um cliente são
+dois números (fichas e instante da última atualização), e baldes parados
+tempo suficiente para encher de novo são descartados pela varredura
+periódica: um balde cheio equivale a não ter balde.
+
+RATE_LIMITS define as regras por prefixo de rota, no formato
+"prefixo=capacidade/segundos" (ex.: "/api/contact=5/60,/api/search=30/10");
+vazio desativa o limitador.
+
+O backend 'memory' vale para um processo; 'redis' compartilha os baldes entre
+workers e máquinas (script Lua atômico). Falhas do Redis liberam a
+requisição: o limitador nunca derruba a API.
+"""
+import logging
+import math
+import threading
+import time
+
+from kb.cache_backends import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITS = '/api/contact=5/60,/api/analyze=30/60,/api/search=60/10,/api/compare=60/10'
+
+
+def client_address(forwarded_for, remote_addr, trusted_hops=0):
+    """IP do cliente atrás de `trusted_hops` proxies confiáveis.
+
+    Cada proxy acrescenta à direita do X-Forwarded-For o endereço de quem o
+    chamou, então só as últimas trusted_hops entradas foram escritas por
+    proxies nossos; as anteriores vêm do cliente e podem ser forjadas.
+    """
+    if trusted_hops > 0:
+        chain = [addr.strip() for value in forwarded_for for addr in value.split(',') if addr.strip()]
+        if len(chain) >= trusted_hops:
+            return chain[-trusted_hops]
+    return remote_addr or ''
+
+
+class RateLimitRule:
+    __slots__ = ('name', 'prefix', 'capacity', 'period', 'rate', '_subpath')
+
+    def __init__(self, prefix, capacity, period):
+        self.name = prefix
+        self.prefix = prefix
+        self._subpath = prefix.rstrip('/') + '/'
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    def matches(self, path):
+        """O prefixo vale por segmento: '/api/contact' cobre '/api/contact/x', mas não '/api/contacts'."""
+        return path == self.prefix or path.startswith(self._subpath)
+
+    def __repr__(self):
+        return f"RateLimitRule({self.prefix!r}, {self.capacity}/{self.period:g}s)"
+
+
+def parse_rate_limits(value):
+    """"prefixo=capacidade/segundos,..." -> [RateLimitRule], prefixos mais longos primeiro."""
+    rules = []
+    for item in value.split(','):
+        prefix, sep, limit = item.strip().rpartition('=')
+        if not sep or not prefix:
+            continue
+        capacity, _, period = limit.partition('/')
+        capacity, period = int(capacity), float(period or 1)
+        if capacity <= 0 or period <= 0:
+            raise ValueError(f"Limite inválido em RATE_LIMITS: '{item.strip()}'")
+        rules.append(RateLimitRule(prefix, capacity, period))
+    return sorted(rules, key=lambda rule: -len(rule.prefix))
+
+
+class Decision:
+    """Resultado de uma verificação: allowed, fichas restantes e espera até a próxima ficha."""
+
+    __slots__ = ('rule', 'allowed', 'remaining', 'retry_after')
+
+    def __init__(self, rule, allowed, remaining, retry_after):
+        self.rule = rule
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.rule.capacity),
+            'X-RateLimit-Remaining': str(int(self.remaining)),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class MemoryBuckets:
+    """Baldes no dicionário do processo; O(1) por requisição e por cliente ativo."""
+
+    def __init__(self, sweep_interval=60, clock=time.monotonic):
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+        self.evicted = 0
+
+    def take(self, key, rule):
+        """(permitido, fichas restantes, segundos até a próxima ficha)"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = rule.capacity
+            else:
+                tokens = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            if tokens >= 1:
+                tokens -= 1
+                allowed, wait = True, 0.0
+            else:
+                allowed, wait = False, (1 - tokens) / rule.rate
+            self._buckets[key] = (tokens, now, rule.period)
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+        return allowed, tokens, wait
+
+    def _sweep(self, now):
+        # parado por um período inteiro, o balde já estaria cheio de novo
+        idle = [key for key, (_, updated, period) in self._buckets.items() if now - updated >= period]
+        for key in idle:
+            del self._buckets[key]
+        self.evicted += len(idle)
+        self._last_sweep = now
+
+    def stats(self):
+        return {"backend": "memory", "active_buckets": len(self._buckets), "evicted": self.evicted}
+
+
+class RedisBuckets:
+    """Baldes num Redis compartilhado; cada verificação é um EVALSHA atômico."""
+
+    # fichas e instante ficam num hash que expira quando o balde estaria cheio
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1])
+        if tokens == nil then
+            tokens = capacity
+        else
+            tokens = math.min(capacity, tokens + math.max(0, now - tonumber(bucket[2])) * rate)
+        end
+        local allowed = 0
+        local wait = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        else
+            wait = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+        return {allowed, tostring(tokens), tostring(wait)}
+    """
+
+    def __init__(self, client, namespace='kb'):
+        self.client = client
+        self.namespace = namespace
+        self._sha = None
+        self.errors = 0
+
+    def take(self, key, rule):
+        args = (f"{self.namespace}:rl:{key}", rule.capacity, repr(rule.rate), repr(time.time()))
+        try:
+            if self._sha is None:
+                self._sha = self.client.execute('SCRIPT', 'LOAD', self.SCRIPT).decode('ascii')
+            try:
+                allowed, tokens, wait = self.client.execute('EVALSHA', self._sha, 1, *args)
+            except RedisError as e:
+                if not str(e).startswith('NOSCRIPT'):
+                    raise
+                # servidor reiniciado: o script precisa ser carregado de novo
+                allowed, tokens, wait = self.client.execute('EVAL', self.SCRIPT, 1, *args)
+        except (OSError, RedisError) as e:
+            self.errors += 1
+            logger.warning(f"Limitador Redis indisponível, requisição liberada: {e}")
+            return True, rule.capacity, 0.0
+        return bool(allowed), float(tokens), float(wait)
+
+    def stats(self):
+        return {"backend": "redis", "namespace": self.namespace, "errors": self.errors}
+
+
+class RateLimiter:
+    """Escolhe a regra da rota, consulta os baldes e mantém contadores por regra."""
+
+    def __init__(self, rules, buckets):
+        self.rules = rules
+        self.buckets = buckets
+        self.counters = {rule.name: {'allowed': 0, 'limited': 0} for rule in rules}
+
+    def rule_for(self, path):
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    def check(self, client, path):
+        """Decision para a requisição, ou None se a rota não tem limite."""
+        rule = self.rule_for(path)
+        if rule is None:
+            return None
+        allowed, remaining, wait = self.buckets.take(f"{rule.name}|{client}", rule)
+        self.counters[rule.name]['allowed' if allowed else 'limited'] += 1
+        return Decision(rule, allowed, remaining, wait)
+
+    def stats(self):
+        return {
+            **self.buckets.stats(),
+            "rules": {
+                rule.name: {"capacity": rule.capacity, "period": rule.period, **self.counters[rule.name]}
+                for rule in self.rules
+            },
+        }
+
+
+def create_rate_limiter(rules=DEFAULT_RATE_LIMITS, kind='memory', namespace='kb', redis_url=None):
+    """Cria o limitador: backend 'memory' (padrão, por processo) ou 'redis' (compartilhado)."""
+    rules = parse_rate_limits(rules)
+    if kind == 'redis':
+        return RateLimiter(rules, RedisBuckets(RedisClient.from_url(redis_url or 'redis://127.0.0.1:6379/0'),
+                                               namespace=namespace))
+    if kind != 'memory':
+        raise ValueError(f"Backend do limitador desconhecido: '{kind}'")
+    return RateLimiter(rules, MemoryBuckets())
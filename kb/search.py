@@ -0,0 +1,130 @@
+"""Índices de busca sobre a base de conhecimento."""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+
+# Peso de cada campo na pontuação (mesma ordem de relevância do calculate_match_score legado)
+FIELD_WEIGHTS = (
+    ('key', 10),
+    ('name', 8),
+    ('description', 3),
+    ('frameworks', 2),
+    ('paradigms', 1),
+    ('use_cases', 1),
+)
+
+# Fator aplicado quando o termo casa apenas como prefixo de um token
+PREFIX_FACTOR = 0.5
+
+
+def fold(text):
+    """Minúsculas e sem acentos ("Dinâmica" -> "dinamica")."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    """Índice invertido token -> {chave: peso}, construído uma vez por versão da base."""
+
+    def __init__(self, knowledge_base):
+        postings = defaultdict(lambda: defaultdict(float))
+        for key, lang in knowledge_base.items():
+            for field, weight in FIELD_WEIGHTS:
+                value = key if field == 'key' else lang.get(field, '')
+                texts = value if isinstance(value, (list, tuple)) else (value,)
+                tokens = set()
+                for text in texts:
+                    tokens.update(tokenize(str(text)))
+                for token in tokens:
+                    postings[token][key] += weight
+        self._postings = {token: dict(docs) for token, docs in postings.items()}
+        self._vocabulary = sorted(self._postings)
+        self._ranks = {key: lang.get('popularity_rank', float('inf')) for key, lang in knowledge_base.items()}
+
+    def search(self, query):
+        """Chaves que casam com todos os termos da query, da mais para a menos relevante."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token in self._expand(term):
+                factor = 1.0 if token == term else PREFIX_FACTOR
+                for key, weight in self._postings[token].items():
+                    term_scores[key] = max(term_scores.get(key, 0.0), weight * factor)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda key: (-scores[key], self._ranks[key], key))
+
+    def _expand(self, term):
+        """Tokens do vocabulário que começam com o termo (inclui o próprio termo)."""
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            yield vocabulary[i]
+            i += 1
+
+
+def trigrams(text):
+    """Trigramas com padding no estilo pg_trgm ("go" -> "  g", " go", "go ")."""
+    padded = f"  {fold(text).strip()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Índice de trigramas sobre chaves e nomes para busca tolerante a erros de digitação."""
+
+    # Similaridade (coeficiente de Dice) mínima para sugerir e para corrigir automaticamente
+    SUGGEST_THRESHOLD = 0.3
+    RESOLVE_THRESHOLD = 0.5
+
+    def __init__(self, knowledge_base):
+        postings = defaultdict(set)
+        self._variants = {}
+        for key, lang in knowledge_base.items():
+            # cada variante (chave, nome) é indexada separadamente: (chave, nº de trigramas)
+            for text in {key, lang.get('name', key)}:
+                grams = trigrams(text)
+                variant = len(self._variants)
+                self._variants[variant] = (key, len(grams))
+                for gram in grams:
+                    postings[gram].add(variant)
+        self._postings = dict(postings)
+
+    def suggest(self, term, limit=5, threshold=None):
+        """Lista de (chave, similaridade) ordenada da mais para a menos parecida."""
+        threshold = self.SUGGEST_THRESHOLD if threshold is None else threshold
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for variant in self._postings.get(gram, ()):
+                shared[variant] += 1
+        best = {}
+        for variant, count in shared.items():
+            key, size = self._variants[variant]
+            score = 2.0 * count / (len(grams) + size)
+            if score >= threshold and score > best.get(key, 0.0):
+                best[key] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def resolve(self, term):
+        """Chave corrigida quando há um único candidato claramente mais parecido, senão None."""
+        candidates = self.suggest(term, limit=2, threshold=self.RESOLVE_THRESHOLD)
+        if not candidates:
+            return None
+        if len(candidates) > 1 and candidates[0][1] == candidates[1][1]:
+            return None
+        return candidates[0][0]
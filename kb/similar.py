@@ -0,0 +1,97 @@
+"""Recomendação de linguagens parecidas por similaridade de cosseno entre vetores de atributos."""
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: sem ele o produto matriz-vetor é feito em Python puro
+    np = None
+
+from kb.search import tokenize
+
+# Peso de cada grupo de atributos no vetor (one-hot ponderado)
+FEATURE_WEIGHTS = (
+    ('category', 1.5),
+    ('paradigms', 1.0),
+    ('typing', 1.0),
+    ('use_cases', 1.0),
+    ('frameworks', 0.5),
+)
+
+
+def _features(lang):
+    for feature, weight in FEATURE_WEIGHTS:
+        value = lang.get(feature)
+        if feature == 'typing':
+            # "Estática e forte" -> estatica, forte
+            values = [token for token in tokenize(value or '') if len(token) > 1]
+        elif isinstance(value, (list, tuple)):
+            values = value
+        else:
+            values = [value] if value else []
+        for item in values:
+            yield (feature, item), weight
+
+
+class FeatureIndex:
+    """Matriz linguagens × atributos com linhas normalizadas (norma L2 = 1).
+
+    Com as linhas normalizadas, o produto da matriz pelo vetor de uma linguagem
+    dá a similaridade de cosseno dela com todas as outras de uma vez.
+    """
+
+    def __init__(self, knowledge_base):
+        self.keys = list(knowledge_base)
+        self._position = {key: i for i, key in enumerate(self.keys)}
+        columns = {}
+        rows = []
+        for key in self.keys:
+            row = {}
+            for column, weight in _features(knowledge_base[key]):
+                row[columns.setdefault(column, len(columns))] = weight
+            norm = math.sqrt(sum(w * w for w in row.values())) or 1.0
+            rows.append({col: w / norm for col, w in row.items()})
+
+        if np is not None:
+            self._matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+            for i, row in enumerate(rows):
+                for col, weight in row.items():
+                    self._matrix[i, col] = weight
+        else:
+            self._matrix = rows
+
+    def pairwise(self, keys=None):
+        """Matriz de similaridade (listas, 4 casas) entre as linguagens de keys, na mesma ordem."""
+        positions = [self._position[key] for key in (self.keys if keys is None else keys)]
+        if np is not None:
+            rows = self._matrix[positions]
+            matrix = [[round(score, 4) for score in row] for row in (rows @ rows.T).tolist()]
+        else:
+            rows = [self._matrix[i] for i in positions]
+            matrix = [
+                [round(sum(weight * b.get(col, 0.0) for col, weight in a.items()), 4) for b in rows]
+                for a in rows
+            ]
+        for i in range(len(matrix)):
+            matrix[i][i] = 1.0
+        return matrix
+
+    def similar(self, key, k=5):
+        """As k linguagens mais parecidas: lista de (chave, similaridade) em ordem decrescente."""
+        i = self._position[key]
+        if np is not None:
+            scores = self._matrix @ self._matrix[i]
+            scores[i] = -1.0
+            k = min(k, len(self.keys) - 1)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(self.keys[j], round(float(scores[j]), 4)) for j in top]
+
+        target = self._matrix[i]
+        scores = (
+            (sum(weight * target.get(col, 0.0) for col, weight in row.items()), j)
+            for j, row in enumerate(self._matrix) if j != i
+        )
+        return [(self.keys[j], round(score, 4)) for score, j in heapq.nlargest(k, scores, key=lambda s: s[0])]
@@ -0,0 +1,27 @@
+"""Conexões SQLite compartilhadas por cache, histórico de análises e mensagens de contato.
+
+Cada thread tem a sua conexão em modo autocommit (isolation_level=None) e WAL,
+então leitores não esperam o escritor; escritas agrupadas usam transaction().
+"""
+import sqlite3
+from contextlib import contextmanager
+
+
+def connect(path, synchronous='NORMAL', timeout=5):
+    """Conexão em autocommit com WAL; synchronous='FULL' faz fsync a cada commit."""
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={synchronous}')
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK em caso de erro): reserva a escrita já no início."""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
@@ -0,0 +1,64 @@
+"""Estatísticas agregadas da base de conhecimento, calculadas uma vez por versão dos dados."""
+from collections import Counter
+from types import MappingProxyType
+
+STAT_FIELDS = (
+    'total_languages',
+    'languages_by_category',
+    'paradigms_distribution',
+    'popularity_distribution',
+    'package_managers',
+    'creation_timeline',
+)
+
+
+def _popularity_bucket(rank):
+    if rank <= 3:
+        return 'Top 3'
+    if rank <= 6:
+        return 'Top 6'
+    return 'Others'
+
+
+def compute_statistics(knowledge_base):
+    """Agregados somente-leitura no mesmo formato do /api/stats legado."""
+    categories = Counter()
+    paradigms = Counter()
+    popularity = Counter()
+    package_managers = Counter()
+    timeline = {}
+    for lang in knowledge_base.values():
+        categories[lang['category']] += 1
+        package_managers[lang['package_manager']] += 1
+        paradigms.update(lang['paradigms'])
+        popularity[_popularity_bucket(lang['popularity_rank'])] += 1
+        if lang.get('created_year'):
+            timeline.setdefault(str(lang['created_year']), []).append(lang['name'])
+    return MappingProxyType({
+        'total_languages': len(knowledge_base),
+        'languages_by_category': MappingProxyType(dict(categories)),
+        'paradigms_distribution': MappingProxyType(dict(paradigms)),
+        'popularity_distribution': MappingProxyType(dict(popularity)),
+        'package_managers': MappingProxyType(dict(package_managers)),
+        'creation_timeline': MappingProxyType({year: tuple(names) for year, names in sorted(timeline.items())}),
+    })
+
+
+def parse_fields(value, available):
+    """Converte 'a,b' em tupla de campos; levanta ValueError com os campos desconhecidos."""
+    if not value:
+        return tuple(available)
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(', '.join(unknown))
+    return fields
+
+
+def project_statistics(statistics, fields):
+    """Cópia serializável apenas com os campos pedidos."""
+    projected = {}
+    for field in fields:
+        value = statistics[field]
+        projected[field] = dict(value) if isinstance(value, MappingProxyType) else value
+    return projected
@@ -0,0 +1,55 @@
+"""Recarga a quente da base de conhecimento por polling do conteúdo dos arquivos de dados."""
+import logging
+import threading
+
+from kb import loader
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeBaseWatcher:
+    """Verifica periodicamente os arquivos de dados e troca o snapshot quando eles mudam.
+
+    on_change(antigo, novo) é chamado com o novo snapshot já validado; se a
+    leitura falhar (ex.: arquivo sendo salvo), o snapshot atual é mantido e a
+    verificação é repetida no próximo ciclo.
+    """
+
+    def __init__(self, snapshot, on_change, data_dir=loader.DEFAULT_DATA_DIR,
+                 snapshot_path=None, interval=5.0):
+        self.snapshot = snapshot
+        self.on_change = on_change
+        self.data_dir = data_dir
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Recarrega se os arquivos mudaram; retorna True quando houve troca de snapshot."""
+        with self._lock:
+            try:
+                signature = loader.source_signature(loader.discover_sources(self.data_dir))
+                if signature == self.snapshot.sources:
+                    return False
+                new = loader.load_knowledge_base(self.data_dir, snapshot_path=self.snapshot_path)
+            except (OSError, loader.KnowledgeBaseError) as e:
+                logger.warning(f"Recarga da base ignorada: {e}")
+                return False
+            old, self.snapshot = self.snapshot, new
+        self.on_change(old, new)
+        return True
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='kb-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
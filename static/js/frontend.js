@@ -3,6 +3,7 @@ class KnowledgeBaseAPI {
         this.baseURL = window.location.origin;
         this.cache = new Map();
         this.cacheTimeout = 5 * 60 * 1000; // 5 minutos
+        this.batchSize = 50; // MAX_BATCH_SIZE da API
         this.init();
     }
 
@@ -10,11 +11,40 @@ class KnowledgeBaseAPI {
         this.setupEventListeners();
         this.setupSearch();
         this.updateStats(); // Novo bloco incorporado
+        this.prefetchLanguages();
+    }
+
+    // Busca os detalhes de todos os cards em lotes de até batchSize nomes e preenche o cache local
+    async prefetchLanguages() {
+        const names = [...document.querySelectorAll('.language-card .card-header h4')]
+            .map(el => el.textContent.trim());
+        if (!names.length) return;
+        const chunks = [];
+        for (let i = 0; i < names.length; i += this.batchSize) {
+            chunks.push(names.slice(i, i + this.batchSize));
+        }
+        try {
+            const batches = await Promise.all(chunks.map(chunk =>
+                this.request(`/api/languages?names=${encodeURIComponent(chunk.join(','))}`)
+            ));
+            const found = batches.filter(batch => batch.success)
+                .flatMap(batch => batch.results)
+                .filter(item => item.found);
+            found.forEach(item => {
+                const endpoint = `/api/language/${encodeURIComponent(item.query)}`;
+                this.cache.set(`${endpoint}_${JSON.stringify({})}`, {
+                    data: { success: true, language: item.language, data: item.data },
+                    timestamp: Date.now()
+                });
+            });
+        } catch (error) {
+            console.error('Erro ao pré-carregar linguagens:', error);
+        }
     }
 
     async updateStats() {
         try {
-            const stats = await this.request('/api/stats');
+            const stats = await this.request('/api/stats?fields=total_languages');
             if (stats.success) {
                 this.displayStats(stats.statistics);
             }
@@ -142,14 +172,14 @@ class KnowledgeBaseAPI {
                         <div class="mt-4">
                             <h6>Linguagens Relacionadas:</h6>
                             <ul>
-                                ${data.related_languages
+                                ${(data.related_languages || [])
                                     .map(rl => `<li>${rl.name} (score: ${rl.similarity_score})</li>`)
                                     .join('')}
                             </ul>
                         </div>
                     </div>
                     <div class="modal-footer">
-                        <small class="text-muted">Consulta: ${new Date(data.query_timestamp).toLocaleString()}</small>
+                        <small class="text-muted">Consulta: ${new Date(data.query_timestamp || Date.now()).toLocaleString()}</small>
                         <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Fechar</button>
                     </div>
                 </div>
@@ -0,0 +1,33 @@
+"""Configuração comum: app.py grava históricos e mensagens em SQLite, então os
+caminhos apontam para um diretório temporário antes de o app ser importado."""
+import os
+import tempfile
+
+import pytest
+
+_data_dir = tempfile.mkdtemp(prefix='kb-tests-')
+os.environ.setdefault('ANALYSIS_HISTORY_PATH', os.path.join(_data_dir, 'analyses.sqlite3'))
+os.environ.setdefault('CONTACTS_PATH', os.path.join(_data_dir, 'contacts.sqlite3'))
+os.environ.setdefault('KB_SNAPSHOT_PATH', os.path.join(_data_dir, 'knowledge_base.kbs'))
+os.environ.setdefault('KB_WATCH_INTERVAL', '0')
+os.environ.setdefault('RATE_LIMITS', '')
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    app_module.response_cache.clear()
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def redis_server():
+    from resp_server import RESPServer
+    server = RESPServer().start()
+    yield server
+    server.stop()
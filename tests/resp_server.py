@@ -0,0 +1,149 @@
+"""Servidor RESP2 mínimo, em processo, para testar os backends Redis sem um redis-server.
+
+Implementa só os comandos usados por kb.cache_backends.RedisCache; o relógio
+das expirações pode ser adiantado com advance().
+"""
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class CommandError(Exception):
+    pass
+
+
+class RESPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.lock = threading.Lock()
+        self._offset = 0.0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def advance(self, seconds):
+        self._offset += seconds
+
+    def now(self):
+        return time.monotonic() + self._offset
+
+    def execute(self, name, *args):
+        with self.lock:
+            self.commands.append(name)
+            handler = getattr(self, f"cmd_{name.lower()}", None)
+            if handler is None:
+                raise CommandError(f"ERR unknown command '{name}'")
+            return handler(*args)
+
+    def _live(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= self.now():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def cmd_ping(self):
+        return 'PONG'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self._live(key)
+
+    def cmd_set(self, key, value, *options):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if options and options[0].upper() == b'PX':
+            self.expires[key] = self.now() + int(options[1]) / 1000
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key) is not None:
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    def cmd_sadd(self, key, *members):
+        members_set = self._live(key)
+        if members_set is None:
+            members_set = self.data[key] = set()
+        added = len(set(members) - members_set)
+        members_set.update(members)
+        return added
+
+    def cmd_smembers(self, key):
+        return sorted(self._live(key) or ())
+
+    def cmd_pexpire(self, key, ms):
+        if self._live(key) is None:
+            return 0
+        self.expires[key] = self.now() + int(ms) / 1000
+        return 1
+
+    def cmd_pttl(self, key):
+        if self._live(key) is None:
+            return -2
+        expires_at = self.expires.get(key)
+        return -1 if expires_at is None else int((expires_at - self.now()) * 1000)
+
+    def cmd_scan(self, cursor, *options):
+        pattern = '*'
+        if b'MATCH' in options:
+            pattern = options[options.index(b'MATCH') + 1].decode()
+        keys = [key for key in list(self.data) if self._live(key) is not None
+                and fnmatch.fnmatchcase(key.decode(), pattern)]
+        return [b'0', keys]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            try:
+                reply = self.server.execute(args[0].decode().upper(), *args[1:])
+            except CommandError as e:
+                self.wfile.write(b'-%s\r\n' % str(e).encode())
+                continue
+            self.wfile.write(_encode(reply))
+
+
+def _encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(_encode(item) for item in value)
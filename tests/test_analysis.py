@@ -0,0 +1,218 @@
+"""O analisador do servidor deve dar o mesmo resultado do static/js/code-analysis.js.
+
+js_reference() é uma tradução literal do performAnalysis() do navegador (um
+includes() por regra), usada como oráculo para o analisador de varredura única.
+"""
+import re
+import time
+
+import pytest
+
+from kb import analysis
+from kb.analysis import LANGUAGE_INFO, analyze
+
+
+def _js_has_comments(code):
+    return any(re.search(pattern, code) for pattern in (r'//.*', r'#.*', r'/\*[\s\S]*?\*/'))
+
+
+def _js_has_functions(code):
+    return any(re.search(pattern, code)
+               for pattern in (r'function\s+\w+', r'def\s+\w+', r'fn\s+\w+', r'public\s+\w+\s+\w+\('))
+
+
+def _js_well_indented(code):
+    level = 0
+    for line in code.split('\n'):
+        trimmed = line.strip()
+        if not trimmed:
+            continue
+        indent = len(re.match(r'^\s*', line).group())
+        if indent < level * 4 and not re.match(r'^(}|else|elif|except|finally)', trimmed):
+            return False
+        if '{' in trimmed:
+            level += 1
+        if '}' in trimmed or re.match(r'^(return|break|continue)', trimmed):
+            level = max(0, level - 1)
+    return True
+
+
+def _js_detect(code):
+    if 'def ' in code or 'import ' in code or 'print(' in code:
+        return 'python'
+    if 'function' in code or 'console.log' in code or 'const ' in code:
+        return 'javascript'
+    if 'public class' in code or 'System.out.print' in code:
+        return 'java'
+    if '#include' in code or 'std::' in code:
+        return 'cpp'
+    return 'python'
+
+
+def js_reference(code, language):
+    lines = len(code.split('\n'))
+    issues = []
+    if lines > 100:
+        issues.append('Código muito longo - considere modularizar')
+    if 'function' not in code and 'def' not in code and 'fn' not in code:
+        issues.append('Código sem estruturação em funções/métodos')
+    if language == 'javascript':
+        if 'var ' in code:
+            issues.append('Uso de "var" - prefira "const" ou "let"')
+        if '== ' in code and '===' not in code:
+            issues.append('Uso de comparação não estrita (==) em vez de (===)')
+        if 'eval(' in code:
+            issues.append('Uso de eval() - pode ser perigoso')
+    elif language == 'python':
+        if 'global ' in code:
+            issues.append('Uso de variáveis globais')
+        if 'print(' in code and lines > 10:
+            issues.append('Print statements em código de produção')
+    elif language == 'java':
+        if 'System.out.print' in code:
+            issues.append('Print statements em código Java')
+        if 'null' in code and '.equals(' in code:
+            issues.append('Possível NullPointerException ao usar .equals()')
+    if 'password' in code or 'senha' in code or 'secret' in code:
+        issues.append('Possível exposição de credenciais no código')
+    if 'SELECT *' in code and 'FROM' in code:
+        issues.append('Uso de SELECT * - especifique as colunas necessárias')
+
+    suggestions = list(LANGUAGE_INFO[language]['best_practices'][:3])
+    if lines > 50:
+        suggestions.append('Considere dividir o código em funções/métodos menores')
+    if 'TODO' in code or 'FIXME' in code or 'XXX' in code:
+        suggestions.append('Remova comentários TODO/FIXME antes do deploy')
+    if not _js_has_comments(code):
+        suggestions.append('Adicione comentários para documentar a lógica complexa')
+    if 'for (' in code and '.length' in code and language == 'javascript':
+        suggestions.append('Armazene o comprimento do array em uma variável antes do loop')
+
+    score = 100 - len(issues) * 8
+    score += 10 if _js_has_comments(code) else 0
+    score += 15 if _js_has_functions(code) else 0
+    score += 10 if _js_well_indented(code) else 0
+    if language == 'javascript' and 'var ' in code:
+        score -= 15
+    if language == 'python' and 'global ' in code:
+        score -= 12
+    complexity = 'Baixa' if lines < 20 else 'Média' if lines < 50 else 'Alta' if lines < 100 else 'Muito Alta'
+    return {'lines': lines, 'issues': issues, 'suggestions': suggestions,
+            'score': max(0, min(100, score)), 'complexity': complexity}
+
+
+SAMPLES = {
+    'python': [
+        'def soma(a, b):\n    """Soma."""\n    return a + b\n',
+        'global contador\n' + 'print(contador)\n' * 12,
+        'import os\nsenha = "123"  # TODO trocar\n',
+        'x = 1\n' * 120,
+    ],
+    'javascript': [
+        'function soma(a, b) {\n    return a + b;\n}\n',
+        'var x = 1;\nif (x == 2) { eval("x") }\n',
+        '// lista\nconst itens = [];\nfor (let i = 0; i < itens.length; i++) {\n    console.log(itens[i]);\n}\n',
+        'const ok = a === b && c == d;\n',
+    ],
+    'java': [
+        'public class App {\n    public static void main(String[] args) {\n'
+        '        System.out.println("oi");\n    }\n}\n',
+        'if (nome != null && nome.equals("x")) {}\n',
+        '/* consulta */\nString q = "SELECT * FROM users";\n',
+    ],
+    'cpp': [
+        '#include <iostream>\nint main() {\n    std::cout << "oi";\n    return 0;\n}\n',
+        'int x = 0; /* fim */',
+    ],
+    'php': ['<?php\nfunction ola($nome) {\n    echo "Olá $nome";\n}\n', '<?php $secret = "x"; ?>'],
+    'ruby': ['def ola(nome)\n  puts "Olá #{nome}"\nend\n', 'puts "FIXME"\n'],
+    'rust': ['fn main() {\n    println!("oi");\n}\n', 'let x = 5; // XXX\n'],
+    'go': ['package main\n\nfunc main() {\n    fmt.Println("oi")\n}\n', '// Comentário\nvar x = 1\n'],
+    'swift': ['func ola() {\n    print("oi")\n}\n', 'let password = "abc"\n'],
+    'typescript': ['function f(x: number): number {\n    return x;\n}\n', 'const a: any = 1;\n'],
+}
+
+# Literais dentro de strings e comentários contam, como no includes() do navegador
+EDGE_CASES = [
+    'const url = "http://exemplo.com";\n',
+    'x = "/* não fecha"\n',
+    'a = 1 */ b = 2 /* c\n',
+    'y = "/*/"\n',
+    'z = "/**/"\n',
+    's = "def function fn"\n',
+    'msg = "== ==="\n',
+    '/* function dentro de comentário */\n',
+    'q = "select * from t"  # minúsculas não contam\n',
+    'SELECT *\nFROM t\n',
+    '',
+    '\n\n\n',
+]
+
+
+@pytest.mark.parametrize('language, code', [(lang, code) for lang, codes in SAMPLES.items() for code in codes])
+def test_matches_browser_analyzer(language, code):
+    result = analyze(code, language)
+    expected = js_reference(code, language)
+    assert {field: result[field] for field in expected} == expected
+    assert result['language'] == LANGUAGE_INFO[language]['name']
+    assert result['detected'] is False
+    assert result['characters'] == len(code)
+
+
+@pytest.mark.parametrize('code', EDGE_CASES + [code for codes in SAMPLES.values() for code in codes])
+def test_detection_matches_browser(code):
+    result = analyze(code)
+    language = _js_detect(code)
+    assert result['detected'] is True
+    assert result['language_key'] == language
+    expected = js_reference(code, language)
+    assert {field: result[field] for field in expected} == expected
+
+
+@pytest.mark.parametrize('code, language', [
+    ('import sys', 'python'),
+    ('console.log(1)', 'javascript'),
+    ('public class A {}', 'java'),
+    ('#include <x>', 'cpp'),
+    ('fn main() {}', 'python'),
+    # 'def ' tem prioridade sobre 'function'
+    ('function a() {}\ndef b(): pass', 'python'),
+])
+def test_detect_language(code, language):
+    assert analyze(code)['language_key'] == language
+
+
+def test_comment_and_keyword_tokens_inside_literals():
+    assert 'Adicione comentários para documentar a lógica complexa' not in \
+        analyze('const url = "http://exemplo.com";', 'javascript')['suggestions']
+    assert 'Adicione comentários para documentar a lógica complexa' in \
+        analyze('a = 1 */ b = 2 /* c', 'python')['suggestions']
+    assert 'Adicione comentários para documentar a lógica complexa' in analyze('y = "/*/"', 'cpp')['suggestions']
+    assert 'Código sem estruturação em funções/métodos' not in analyze('s = "fn"', 'rust')['issues']
+
+
+def test_scan_is_linear_in_the_input(monkeypatch):
+    searches = 0
+    original = analysis.Matcher._regex
+
+    class Counting:
+        def __init__(self, regex):
+            self.regex = regex
+
+        def search(self, *args):
+            nonlocal searches
+            searches += 1
+            return self.regex.search(*args)
+
+    monkeypatch.setattr(analysis.Matcher, '_regex', lambda self, pending: Counting(original(self, pending)))
+    unit = 'function f(x) {\n    // TODO\n    var y = x == 1; /* ok */ print(y)\n}\n'
+    code = unit * 20000
+
+    started = time.perf_counter()
+    result = analyze(code)
+    elapsed = time.perf_counter() - started
+
+    # uma busca por literal distinto, não por ocorrência
+    assert searches <= len(analysis.get_matcher(None, True).needles) + 2
+    assert result['lines'] == code.count('\n') + 1
+    assert elapsed < 2.0
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+
+from flask import Flask, Response, request, stream_with_context
+
+from asgi import WSGIBridge
+
+
+def call(bridge, method='GET', path='/', body=b'', headers=()):
+    """Executa uma requisição ASGI e devolve as mensagens enviadas pela ponte."""
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(name.encode(), value.encode()) for name, value in headers],
+        'client': ('127.0.0.1', 1234), 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(bridge(scope, receive, send))
+    return messages
+
+
+def body_of(messages):
+    return b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+
+
+def test_streamed_response_keeps_request_context_on_one_thread():
+    flask_app = Flask(__name__)
+    threads, closed = [], []
+
+    @flask_app.route('/stream')
+    def stream():
+        def generate():
+            try:
+                for i in range(5):
+                    threads.append(threading.get_ident())
+                    yield f"{request.path}:{i}\n"
+            finally:
+                closed.append(threading.get_ident())
+        return Response(stream_with_context(generate()))
+
+    bridge = WSGIBridge(flask_app, max_threads=4)
+    messages = call(bridge, path='/stream')
+
+    assert messages[0]['status'] == 200
+    assert body_of(messages).decode().splitlines() == [f"/stream:{i}" for i in range(5)]
+    assert messages[-1] == {'type': 'http.response.body', 'body': b''}
+    assert len(set(threads + closed)) == 1
+
+
+def test_wsgi_error_before_start_becomes_500():
+    flask_app = Flask(__name__)
+
+    def broken(environ, start_response):
+        raise RuntimeError('boom')
+
+    flask_app.wsgi_app = broken
+    messages = call(WSGIBridge(flask_app), path='/boom')
+    assert messages[0]['status'] == 500
+    assert json.loads(body_of(messages))['success'] is False
+
+
+def test_batch_route_through_bridge(app_module):
+    body = b'\n'.join(json.dumps({"path": f"f{i}.py", "code": "print(1)"}).encode() for i in range(3))
+    messages = call(WSGIBridge(app_module.app), 'POST', '/api/analyze/batch', body,
+                    headers=[('content-type', 'application/x-ndjson'), ('content-length', str(len(body)))])
+
+    lines = [json.loads(line) for line in body_of(messages).splitlines()]
+    assert messages[0]['status'] == 200
+    assert lines[-1]['summary']['analyzed'] == 3
+    assert messages[-1] == {'type': 'http.response.body', 'body': b''}
@@ -0,0 +1,151 @@
+import io
+import json
+import tarfile
+import time
+import zipfile
+
+import pytest
+
+from kb import batch
+
+
+def make_tar(members, mode='w:gz'):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode) as archive:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def run(data, **kwargs):
+    results = list(batch.iter_results(batch.open_batch(data), **kwargs))
+    return results[:-1], results[-1]['summary']
+
+
+def run_sources(sources, **kwargs):
+    results = list(batch.iter_results(iter(sources), **kwargs))
+    return results[:-1], results[-1]['summary']
+
+
+def test_ndjson_lines_and_errors():
+    body = b'\n'.join([
+        json.dumps({"path": "a.js", "code": "var x = 1"}).encode(),
+        b'{quebrado',
+        json.dumps({"code": "x", "language": "cobol"}).encode(),
+    ])
+    results, summary = run(body)
+    assert [r['success'] for r in results] == [True, False, False]
+    assert results[0]['analysis']['language_key'] == 'javascript'
+    assert summary['analyzed'] == 1 and summary['failed'] == 2
+
+
+def test_archive_skips_non_source_members():
+    data = make_tar([('repo/a.py', b'def f():\n    pass\n'), ('repo/README.md', b'oi'), ('repo/b.bin.py', b'\0\0')])
+    results, summary = run(data)
+    assert {r['path']: r['success'] for r in results} == {'repo/a.py': True, 'repo/b.bin.py': False}
+    assert summary['skipped'] == 1
+
+
+def test_zip_is_detected_by_magic_bytes():
+    results, summary = run(make_zip([('src/main.go', 'func main() {}'), ('src/x.rs', 'fn main() {}')]))
+    assert summary['analyzed'] == 2
+
+
+def test_invalid_archive_is_rejected_before_streaming():
+    with pytest.raises(batch.BatchInputError):
+        batch.open_batch(b'PK\x03\x04lixo')
+    with pytest.raises(batch.BatchInputError):
+        batch.open_batch(b'texto qualquer', 'text/plain')
+
+
+def test_truncated_tar_ends_with_error_and_summary():
+    members = [(f'f{i}.py', ('x = %d\n' % i).encode() * 4000) for i in range(6)]
+    data = make_tar(members)
+    results, summary = run(data[:len(data) // 2])
+
+    assert results[-1]['success'] is False
+    assert 'corrompido' in results[-1]['error']
+    assert summary['files'] == len(results)
+    assert summary['analyzed'] == len(results) - 1 >= 1
+
+
+def test_corrupted_zip_member_is_reported_and_batch_continues():
+    code = b''.join(b'def f%d(x):\n    return x * %d\n' % (i, i) for i in range(500))
+    data = bytearray(make_zip([('a.py', code), ('b.py', code), ('c.py', code)]))
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as archive:
+        info = archive.getinfo('b.py')
+    start = info.header_offset + 30 + len(info.filename) + len(info.extra)
+    data[start:start + 64] = bytes(64)
+
+    results, summary = run(bytes(data))
+    by_path = {result['path']: result for result in results}
+    assert by_path['a.py']['success'] and by_path['c.py']['success']
+    assert by_path['b.py']['error'].startswith('Membro corrompido')
+    assert (summary['files'], summary['analyzed'], summary['failed']) == (3, 2, 1)
+
+
+def test_route_emits_summary_for_truncated_archive(client):
+    data = make_tar([(f'f{i}.py', b'print(%d)\n' % i * 3000) for i in range(4)])
+    response = client.post('/api/analyze/batch', data=data[:len(data) // 2], content_type='application/gzip')
+    lines = [json.loads(line) for line in response.get_data().splitlines()]
+    assert response.status_code == 200
+    assert 'summary' in lines[-1]
+    assert lines[-2]['success'] is False
+
+
+def test_large_non_source_member_counts_toward_total(monkeypatch):
+    monkeypatch.setattr(batch, 'MAX_TOTAL_BYTES', 1024 * 1024)
+    data = make_tar([('assets/zeros.bin', bytes(8 * 1024 * 1024)), ('src/a.py', b'def f(): pass\n')], mode='w:xz')
+    start = time.process_time()
+    results, summary = run(data)
+    # parou antes de descompactar o membro grande para chegar ao próximo
+    assert time.process_time() - start < 0.5
+    assert [r['path'] for r in results] == ['assets/zeros.bin']
+    assert 'descompactados' in results[0]['error']
+    assert summary['analyzed'] == 0
+
+
+def test_oversized_source_member_is_rejected_without_reading(monkeypatch):
+    monkeypatch.setattr(batch, 'MAX_FILE_BYTES', 1024)
+    results, _ = run(make_zip([('big.py', 'x = 1\n' * 1000), ('ok.py', 'x = 1\n')]))
+    assert {r['path']: r['success'] for r in results} == {'big.py': False, 'ok.py': True}
+
+
+def test_deadline_is_checked_for_skipped_members():
+    data = make_tar([(f'docs/{i}.md', b'oi') for i in range(50)] + [('src/a.py', b'def f(): pass\n')])
+    ticks = iter(range(1000))
+    results, summary = run(data, total_budget=10, clock=lambda: next(ticks))
+    assert summary['budget_exhausted'] is True
+    assert summary['analyzed'] == 0
+
+
+def test_per_file_timeout_in_main_thread():
+    source = batch.SourceFile('big.py', 'def f(): pass\n' * 200000, 'python')
+    results, summary = run_sources([source], file_timeout=0.001)
+    assert results[0]['error'] == "Tempo por arquivo esgotado"
+
+
+def test_batch_route_streams_ndjson(client):
+    body = b'\n'.join(json.dumps({"path": f"f{i}.py", "code": "print(1)"}).encode() for i in range(3))
+    response = client.post('/api/analyze/batch', data=body, content_type='application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data().splitlines()]
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert lines[-1]['summary']['analyzed'] == 3
+
+
+def test_batch_route_rejects_empty_and_unknown_bodies(client):
+    assert client.post('/api/analyze/batch', data=b'').status_code == 400
+    response = client.post('/api/analyze/batch', data=b'ola', content_type='text/plain')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,228 @@
+import gzip
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, Response, g, jsonify
+
+from kb import cache as cache_module
+from kb.cache import CachedResponse, ResponseCache, SingleFlight
+from kb.compression import compress
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.set('a', 1, size=10)
+    cache.set('b', 2, size=10)
+    cache.get('a')
+    cache.set('c', 3, size=10)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+
+    cache.set('d', 4, size=95)
+    assert list(cache._entries) == ['d']
+    assert cache.stats()['evictions'] == 3
+    assert not cache.set('e', 5, size=101)
+
+
+def test_ttl_expiration_and_sweep():
+    clock = FakeClock()
+    cache = ResponseCache(default_ttl=10, sweep_interval=1000, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=30)
+    clock.now += 10
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    clock.now += 20
+    assert cache.sweep() == 1
+    assert len(cache) == 0
+    assert cache.stats()['expirations'] == 2
+
+
+def test_invalidate_tags():
+    cache = ResponseCache()
+    cache.set('a', 1, tags={'lang:python'})
+    cache.set('b', 2, tags={'lang:rust', 'kb:all'})
+    cache.set('c', 3, tags={'lang:python', 'kb:all'})
+    assert cache.invalidate_tags({'lang:python'}) == 2
+    assert 'b' in cache and len(cache) == 1
+    assert cache.invalidate_tags({'lang:python'}) == 0
+
+
+def test_route_is_served_from_cache(client):
+    first = client.get('/api/language/python')
+    second = client.get('/api/language/python')
+    assert first.get_data() == second.get_data()
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert client.get('/health').get_json()['cache']['hits'] >= 1
+
+
+def test_runtime_fill_uses_fast_compression():
+    body = b'{"linguagem": "python", "descricao": "texto repetido"}' * 200
+    cached = CachedResponse.from_response(Response(body, mimetype='application/json'), compress_min_size=1024)
+
+    assert cached.variants['gzip'] == compress(body, 'gzip', fast=True)
+    assert gzip.decompress(cached.variants['gzip']) == body
+    assert ('Vary', 'Accept-Encoding') in cached.headers
+
+
+def test_small_bodies_are_not_compressed():
+    cached = CachedResponse.from_response(Response(b'{}', mimetype='application/json'), compress_min_size=1024)
+    assert cached.variants == {}
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condição não atingida a tempo'
+        time.sleep(0.005)
+
+
+def run_followers(flight, key, fn, count):
+    """Dispara count chamadas concorrentes de flight.do(key, fn); devolve a lista de resultados/exceções."""
+    results = []
+
+    def follower():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=follower) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release, calls = threading.Event(), []
+
+    def leader():
+        calls.append('leader')
+        release.wait(5)
+        return 'resultado'
+
+    threads, results = run_followers(flight, 'k', leader, 1)
+    wait_until(lambda: calls)
+    followers, shared = run_followers(flight, 'k', lambda: calls.append('follower'), 5)
+    wait_until(lambda: flight.coalesced == 5)
+    release.set()
+    for thread in threads + followers:
+        thread.join(5)
+
+    assert calls == ['leader']
+    assert results == [('resultado', False)]
+    assert shared == [('resultado', True)] * 5
+    assert flight.stats() == {"in_flight": 0, "coalesced": 5, "revalidations": 0}
+
+
+def test_single_flight_follower_computes_alone_after_timeout():
+    flight = SingleFlight(timeout=0.05)
+    release, started = threading.Event(), threading.Event()
+
+    def leader():
+        started.set()
+        release.wait(5)
+        return 'lento'
+
+    threads, results = run_followers(flight, 'k', leader, 1)
+    started.wait(5)
+    assert flight.do('k', lambda: 'próprio') == ('próprio', False)
+    release.set()
+    threads[0].join(5)
+    assert results == [('lento', False)]
+
+
+def test_single_flight_propagates_leader_exception_to_followers():
+    flight = SingleFlight()
+    release, started = threading.Event(), threading.Event()
+    error = ValueError('falhou')
+
+    def leader():
+        started.set()
+        release.wait(5)
+        raise error
+
+    threads, results = run_followers(flight, 'k', leader, 1)
+    started.wait(5)
+    followers, shared = run_followers(flight, 'k', lambda: 'não deveria rodar', 3)
+    wait_until(lambda: flight.coalesced == 3)
+    release.set()
+    for thread in threads + followers:
+        thread.join(5)
+
+    assert results == [error]
+    assert shared == [error] * 3
+    # a chave é liberada: a próxima chamada calcula de novo
+    assert flight.do('k', lambda: 'ok') == ('ok', False)
+
+
+def test_do_in_background_skips_keys_in_flight():
+    flight = SingleFlight()
+    release = threading.Event()
+    assert flight.do_in_background('k', lambda: release.wait(5))
+    assert not flight.do_in_background('k', lambda: None)
+    release.set()
+    wait_until(lambda: flight.stats()['in_flight'] == 0)
+    # erros em segundo plano são registrados e liberam a chave
+    assert flight.do_in_background('k', lambda: 1 / 0)
+    wait_until(lambda: flight.stats()['in_flight'] == 0)
+    assert flight.stats()['revalidations'] == 2
+
+
+@pytest.fixture
+def swr_client(app_module, monkeypatch):
+    """App mínimo com uma rota cache_response(timeout=10, stale_while_revalidate=5) e relógio falso."""
+    clock = FakeClock()
+    monkeypatch.setattr(app_module, 'time', SimpleNamespace(time=clock))
+    monkeypatch.setattr(cache_module, 'time', SimpleNamespace(time=clock))
+    monkeypatch.setattr(app_module, 'response_cache', ResponseCache(clock=clock))
+    monkeypatch.setattr(app_module, 'single_flight', SingleFlight())
+
+    flask_app = Flask(__name__)
+    renders, statuses = [], []
+
+    @flask_app.route('/versao')
+    @app_module.cache_response(timeout=10, stale_while_revalidate=5)
+    def versao():
+        renders.append(clock.now)
+        return jsonify({"success": True, "versao": len(renders)})
+
+    @flask_app.after_request
+    def record_status(response):
+        statuses.append(g.get('cache_status'))
+        return response
+
+    return SimpleNamespace(client=flask_app.test_client(), clock=clock, renders=renders, statuses=statuses,
+                           flight=app_module.single_flight)
+
+
+def test_stale_entry_is_served_while_revalidating(swr_client):
+    client, clock = swr_client.client, swr_client.clock
+    assert client.get('/versao').get_json()['versao'] == 1
+
+    clock.now += 10
+    assert client.get('/versao').get_json()['versao'] == 1
+    wait_until(lambda: len(swr_client.renders) == 2 and swr_client.flight.stats()['in_flight'] == 0)
+    assert client.get('/versao').get_json()['versao'] == 2
+
+    assert swr_client.statuses == ['miss', 'stale', 'hit']
+    assert swr_client.flight.stats()['revalidations'] == 1
+
+
+def test_entry_past_the_stale_window_is_recomputed_inline(swr_client):
+    client, clock = swr_client.client, swr_client.clock
+    client.get('/versao')
+    clock.now += 15
+    assert client.get('/versao').get_json()['versao'] == 2
+    assert swr_client.statuses == ['miss', 'miss']
+    assert swr_client.flight.stats()['revalidations'] == 0
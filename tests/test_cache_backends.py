@@ -0,0 +1,145 @@
+import pytest
+
+from kb.cache import CachedResponse
+from kb.cache_backends import RedisCache, RedisClient, SQLiteCache, create_cache_backend
+from kb.ratelimit import RateLimiter, RedisBuckets, parse_rate_limits
+
+
+def entry(body=b'{"ok": true}', **kwargs):
+    headers = (('Content-Type', 'application/json'), ('ETag', '"abc"'))
+    return CachedResponse(body, 200, headers, 'abc', kwargs.pop('fresh_until', 1234.5), kwargs.pop('variants', {}))
+
+
+@pytest.fixture
+def redis_cache(redis_server):
+    cache = create_cache_backend('redis', namespace='t', redis_url=redis_server.url)
+    yield cache
+    cache.client.close()
+
+
+@pytest.fixture(params=['redis', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        yield SQLiteCache(str(tmp_path / 'cache.sqlite3'), namespace='t')
+    else:
+        yield request.getfixturevalue('redis_cache')
+
+
+def test_bytes_round_trip():
+    original = entry(variants={'gzip': b'\x1f\x8bgz', 'br': b'brotli'})
+    restored = CachedResponse.from_bytes(original.to_bytes())
+    assert (restored.body, restored.status, restored.headers, restored.etag, restored.fresh_until) == \
+        (original.body, original.status, original.headers, original.etag, original.fresh_until)
+    assert restored.variants == original.variants
+
+
+def test_get_set_round_trip(backend):
+    assert backend.get('/api/x?') is None
+    assert backend.set('/api/x?', entry(variants={'gzip': b'gz'}), ttl=60, tags={'lang:python'})
+
+    cached = backend.get('/api/x?')
+    assert cached.body == b'{"ok": true}'
+    assert cached.variants == {'gzip': b'gz'}
+    assert backend.stats()['hits'] == 1
+    assert backend.stats()['misses'] == 1
+
+
+def test_tag_invalidation(backend):
+    backend.set('/a', entry(), tags={'lang:python'})
+    backend.set('/b', entry(), tags={'lang:rust'})
+    backend.set('/c', entry(), tags={'lang:python', 'lang:rust'})
+
+    assert backend.invalidate_tags({'lang:python'}) == 2
+    assert backend.get('/a') is None and backend.get('/c') is None
+    assert backend.get('/b') is not None
+
+
+def test_oversized_entries_are_refused(backend):
+    backend.max_bytes = 64
+    assert not backend.set('/big', entry(b'x' * 100))
+    assert backend.get('/big') is None
+
+
+def test_corrupt_entry_is_a_miss(backend):
+    backend.set('/a', entry())
+    if isinstance(backend, SQLiteCache):
+        backend._connection().execute("UPDATE cache_entries SET value = x'00ff' WHERE key = 't:/a'")
+    else:
+        backend.client.execute('SET', 't:/a', b'\x05\x00\x00\x00lixo')
+    assert backend.get('/a') is None
+    assert backend.stats()['misses'] == 1
+
+
+def test_sqlite_limits_are_per_namespace(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    mine = SQLiteCache(path, namespace='a', max_entries=2)
+    other = SQLiteCache(path, namespace='b', max_entries=2)
+    other.set('/x', entry())
+    other.set('/y', entry())
+    for i in range(4):
+        mine.set(f'/{i}', entry())
+
+    assert other.get('/x') is not None and other.get('/y') is not None
+    assert mine.stats()['entries'] == 2 and other.stats()['entries'] == 2
+
+
+def test_sqlite_sweep_and_clear_stay_in_namespace(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    mine = SQLiteCache(path, namespace='a_b', sweep_interval=float('inf'))
+    other = SQLiteCache(path, namespace='axb', sweep_interval=float('inf'))
+    mine.set('/old', entry(), ttl=-1)
+    other.set('/old', entry(), ttl=-1)
+    other.set('/keep', entry())
+
+    assert mine.sweep() == 1
+    assert other.stats()['entries'] == 2
+    # '_' seria curinga num LIKE e apagaria também o namespace 'axb'
+    mine.clear()
+    assert other.get('/keep') is not None
+
+
+def test_sqlite_errors_fail_open(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), namespace='t')
+    cache._connection().execute('DROP TABLE cache_entries')
+    assert cache.get('/a') is None
+    assert not cache.set('/a', entry())
+    cache.clear()
+    assert cache.sweep() == 0
+
+
+def test_redis_ttl(redis_server, redis_cache):
+    redis_cache.set('/a', entry(), ttl=2, tags={'kb:all'})
+    assert 1500 < redis_server.execute('PTTL', b't:/a') <= 2000
+    # a tag vive mais que as entradas que aponta
+    assert redis_server.execute('PTTL', b't:tag:kb:all') > 2000
+
+    redis_server.advance(2.1)
+    assert redis_cache.get('/a') is None
+
+
+def test_redis_clear_keeps_other_namespaces(redis_server, redis_cache):
+    other = RedisCache(RedisClient.from_url(redis_server.url), namespace='outro')
+    redis_cache.set('/a', entry())
+    other.set('/a', entry())
+
+    redis_cache.clear()
+    assert redis_cache.get('/a') is None
+    assert other.get('/a') is not None
+
+
+def test_redis_unavailable_is_a_miss(redis_server):
+    url = redis_server.url
+    redis_server.stop()
+    cache = create_cache_backend('redis', redis_url=url)
+    assert cache.get('/a') is None
+    assert not cache.set('/a', entry())
+    assert cache.stats()['errors'] == 2
+
+
+def test_redis_rate_limiter_fails_open(redis_server):
+    # o servidor de teste não executa Lua: o erro libera a requisição
+    buckets = RedisBuckets(RedisClient.from_url(redis_server.url))
+    limiter = RateLimiter(parse_rate_limits('/api=1/60'), buckets)
+    assert limiter.check('1.1.1.1', '/api').allowed
+    assert limiter.check('1.1.1.1', '/api').allowed
+    assert buckets.errors == 2
@@ -0,0 +1,30 @@
+import pytest
+
+FUTURE = 'Wed, 01 Jan 2098 00:00:00 GMT'
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/language/doesnotexist', 404),
+    ('/api/language/python?fields=bogus', 400),
+    ('/api/stats?fields=zzz', 400),
+    ('/api/language/python/similar?k=99', 400),
+])
+def test_if_modified_since_does_not_hide_errors(client, path, status):
+    assert client.get(path, headers={'If-Modified-Since': FUTURE}).status_code == status
+    # a segunda requisição passa pela entrada em cache
+    assert client.get(path, headers={'If-Modified-Since': FUTURE}).status_code == status
+
+
+def test_if_modified_since_on_success(client):
+    assert client.get('/api/language/python', headers={'If-Modified-Since': FUTURE}).status_code == 304
+    assert client.get('/api/language/python', headers={'If-Modified-Since': FUTURE}).status_code == 304
+
+
+def test_if_none_match_round_trip(client):
+    first = client.get('/api/languages?names=python,rust')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    again = client.get('/api/languages?names=python,rust', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert client.get('/api/languages?names=python,rust', headers={'If-None-Match': '"outro"'}).status_code == 200
@@ -0,0 +1,135 @@
+import os
+import stat
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from kb import contacts
+from kb.contacts import ContactStore, Receipt, content_hash
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ContactStore(str(tmp_path / 'contacts.sqlite3'))
+    yield store
+    store.close()
+
+
+def submit(store, *args):
+    receipt = store.submit(*args)
+    assert receipt.wait(5)
+    assert receipt.error is None
+    return receipt
+
+
+def test_database_is_private(tmp_path, store):
+    submit(store, 'Ana', 'ana@example.com', 'Olá')
+    for name in os.listdir(tmp_path):
+        assert stat.S_IMODE(os.stat(tmp_path / name).st_mode) == 0o600, name
+
+
+def test_existing_file_is_restricted(tmp_path):
+    path = tmp_path / 'old.sqlite3'
+    path.touch(mode=0o644)
+    os.chmod(path, 0o644)
+    ContactStore(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_duplicate_returns_original_id_and_timestamp(store):
+    first = submit(store, 'Ana', 'ana@example.com', 'Olá')
+    time.sleep(0.01)
+    again = submit(store, 'Ana', 'ana@example.com', 'Olá')
+
+    assert again.duplicate and not first.duplicate
+    assert again.contact_id == first.contact_id
+    assert again.record['timestamp'] == first.record['timestamp']
+    assert store.stats()['written'] == 1 and store.stats()['duplicates'] == 1
+
+
+def test_duplicates_in_the_same_batch(store):
+    receipts = [store.submit('Bia', 'bia@example.com', 'Oi') for _ in range(3)]
+    for receipt in receipts:
+        assert receipt.wait(5)
+    assert len({receipt.contact_id for receipt in receipts}) == 1
+    assert len({receipt.record['timestamp'] for receipt in receipts}) == 1
+    assert store.page()[0][0]['id'] == receipts[0].contact_id
+
+
+def test_unexpected_error_resolves_the_batch(store, monkeypatch):
+    @contextmanager
+    def broken(conn):
+        raise RuntimeError('disco cheio')
+        yield conn
+
+    monkeypatch.setattr(contacts, 'transaction', broken)
+    receipt = store.submit('Ana', 'ana@example.com', 'Olá')
+    assert receipt.wait(5)
+    assert receipt.error == 'disco cheio'
+    assert store.stats()['errors'] == 1
+
+    monkeypatch.undo()
+    assert submit(store, 'Ana', 'ana@example.com', 'Olá').error is None
+
+
+def test_restarted_writer_keeps_pending_messages(store):
+    submit(store, 'Ana', 'ana@example.com', 'Primeira')
+    store.close()
+    assert not store._writer_running()
+    # recibo enfileirado enquanto a escritora estava parada
+    record = {'id': 'pendente', 'name': 'Bia', 'email': 'bia@example.com', 'message': 'Pendente',
+              'timestamp': '2026-01-01T00:00:00', 'status': 'received'}
+    pending = Receipt(record, content_hash('Bia', 'bia@example.com', 'Pendente'))
+    store._queue.put(pending)
+
+    submit(store, 'Caio', 'caio@example.com', 'Depois')
+    assert pending.wait(5) and pending.error is None
+    assert store.stats()['written'] == 3
+
+
+def test_counters_from_many_threads(store):
+    receipts = []
+
+    def send(i):
+        for j in range(20):
+            receipts.append(store.submit('Ana', 'ana@example.com', f'{i}-{j % 10}'))
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(receipt.wait(5) for receipt in receipts)
+    stats = store.stats()
+    assert stats['submitted'] == 160
+    assert (stats['written'], stats['duplicates']) == (80, 80)
+
+
+def test_page_cursor(store):
+    for i in range(5):
+        submit(store, 'Ana', 'ana@example.com', f'Mensagem {i}')
+    items, cursor = store.page(limit=3)
+    rest, end = store.page(limit=3, cursor=cursor)
+    assert [item['message'] for item in items + rest] == [f'Mensagem {i}' for i in range(4, -1, -1)]
+    assert end is None
+
+
+def test_contact_route(client):
+    body = {'name': 'Caio', 'email': 'Caio@Example.com', 'message': 'Teste de rota'}
+    first = client.post('/api/contact', json=body).get_json()
+    again = client.post('/api/contact', json=body).get_json()
+    assert first['success'] and not first['duplicate']
+    assert again['duplicate']
+    assert (again['contact_id'], again['timestamp']) == (first['contact_id'], first['timestamp'])
+    assert client.post('/api/contact', json={'name': 'Caio'}).status_code == 400
+
+
+def test_list_contacts_requires_token(client, monkeypatch):
+    assert client.get('/api/contacts').status_code == 401
+    monkeypatch.setenv('CONTACTS_ADMIN_TOKEN', 'segredo')
+    assert client.get('/api/contacts', headers={'Authorization': 'Bearer errado'}).status_code == 401
+    response = client.get('/api/contacts', headers={'Authorization': 'Bearer segredo'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
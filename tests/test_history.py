@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from kb import history as history_module
+from kb.analysis import analyze
+from kb.history import AnalysisHistory, InvalidCursor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(history_module, 'time', SimpleNamespace(time=clock))
+    return clock
+
+
+@pytest.fixture
+def history(tmp_path, clock):
+    return AnalysisHistory(str(tmp_path / 'analyses.sqlite3'))
+
+
+def analysis(language='python', code='def f():\n    return 1\n'):
+    return analyze(code, language)
+
+
+def all_pages(history, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        items, cursor = history.page(limit, cursor, **filters)
+        pages.append([item['id'] for item in items])
+        if cursor is None:
+            return pages
+
+
+def test_pagination_is_stable_across_equal_timestamps(history, clock):
+    # cada lote grava todas as linhas com o mesmo created_at
+    first = history.record_many([analysis() for _ in range(5)])
+    clock.now += 1
+    second = history.record_many([analysis() for _ in range(4)])
+
+    pages = all_pages(history, 2)
+    ids = [row_id for page in pages for row_id in page]
+    assert ids == sorted(first + second, reverse=True)
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 1]
+
+    items, cursor = history.page(3)
+    assert cursor == history_module.encode_cursor(int(clock.now * 1000), second[1])
+    assert [item['id'] for item in items] == second[:0:-1]
+
+
+def test_page_filters_by_language_and_since(history, clock):
+    old = history.record_many([analysis('python'), analysis('javascript', 'function f() {}')])
+    clock.now += 60
+    since = datetime.fromtimestamp(clock.now, timezone.utc)
+    recent = history.record_many([analysis('python'), analysis('python'), analysis('java', 'class A {}')])
+
+    assert all_pages(history, 10, language='python') == [[recent[1], recent[0], old[0]]]
+    assert all_pages(history, 10, since=since) == [recent[::-1]]
+    assert all_pages(history, 1, language='python', since=since) == [[recent[1]], [recent[0]]]
+    assert history.page(10, language='rust') == ([], None)
+
+
+@pytest.mark.parametrize('cursor', ['abc', '123', '1-2-3', '-1-2', '1-x', ' 1-2'])
+def test_malformed_cursor_is_rejected(history, cursor):
+    with pytest.raises(InvalidCursor):
+        history.page(10, cursor)
+
+
+def test_record_many_updates_stats_totals(history, clock):
+    batch = [
+        analysis('python'),
+        analysis('python', 'x = 1\n' * 30),
+        analysis('javascript', 'var x = 1;\n'),
+    ]
+    history.record_many(batch)
+    clock.now += 5
+    history.record(analysis('python'))
+
+    python = [a for a in batch if a['language_key'] == 'python'] + [analysis('python')]
+    stats = history.stats()
+    assert stats['total'] == 4
+    assert stats['lines'] == sum(a['lines'] for a in batch) + python[-1]['lines']
+    assert stats['top_language'] == 'python'
+    assert stats['by_language']['python'] == {
+        "total": 3,
+        "lines": sum(a['lines'] for a in python),
+        "characters": sum(a['characters'] for a in python),
+        "average_score": round(sum(a['score'] for a in python) / 3, 1),
+        "issues": sum(len(a['issues']) for a in python),
+        "last_analysis": history_module._isoformat(int(clock.now * 1000)),
+    }
+    assert stats['by_language']['javascript']['total'] == 1
+    assert stats['by_language']['javascript']['issues'] == len(batch[2]['issues'])
+    assert history.stats('javascript')['total'] == 1
+    assert history.stats('rust') == {"total": 0, "lines": 0, "average_score": None,
+                                     "top_language": None, "by_language": {}}
+
+
+def test_endpoint_pages_with_cursor(client, app_module, history, monkeypatch):
+    monkeypatch.setattr(app_module, 'analysis_history', history)
+    ids = history.record_many([analysis() for _ in range(3)])
+
+    first = client.get('/api/analyses?limit=2').get_json()
+    second = client.get(f"/api/analyses?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [item['id'] for item in first['analyses'] + second['analyses']] == ids[::-1]
+    assert second['next_cursor'] is None
+
+
+def test_endpoint_rejects_malformed_cursor(client):
+    response = client.get('/api/analyses?cursor=nao-e-cursor')
+    assert response.status_code == 400
+    assert response.get_json() == {"success": False, "error": "Parâmetro 'cursor' inválido"}
@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [
+    ['python'],
+    'python',
+    {'names': 'python'},
+    {'names': [1, 2]},
+    {'names': ['python'], 'fields': 5},
+    {'names': ['python'], 'fields': ['name', 3]},
+    {'names': []},
+])
+def test_invalid_bodies_return_400(client, body):
+    response = client.post('/api/languages/batch', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_non_json_body_returns_400(client):
+    assert client.post('/api/languages/batch', data=b'names=python').status_code == 400
+
+
+def test_fields_as_string_or_list(client):
+    for fields in ('name', ['name']):
+        response = client.post('/api/languages/batch', json={'names': ['python', 'nada'], 'fields': fields})
+        results = response.get_json()['results']
+        assert response.status_code == 200
+        assert results[0]['data'] == {'name': 'Python'}
+        assert results[1]['found'] is False
+
+
+def test_batch_size_limit(app_module, client):
+    names = [f'lang{i}' for i in range(app_module.MAX_BATCH_SIZE + 1)]
+    assert client.post('/api/languages/batch', json={'names': names}).status_code == 400
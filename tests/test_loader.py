@@ -0,0 +1,38 @@
+import os
+import shutil
+
+from kb import loader
+
+
+def copy_data(tmp_path):
+    shutil.copy(os.path.join(loader.DEFAULT_DATA_DIR, loader.PRIMARY_FILE), tmp_path)
+    shutil.copytree(os.path.join(loader.DEFAULT_DATA_DIR, loader.EXTRA_DIR), tmp_path / loader.EXTRA_DIR)
+    return str(tmp_path)
+
+
+def test_committed_snapshot_matches_data_files():
+    sources = loader.discover_sources(loader.DEFAULT_DATA_DIR)
+    snapshot = loader.Snapshot.open(os.path.join(loader.DEFAULT_DATA_DIR, loader.SNAPSHOT_NAME))
+    assert snapshot.sources == loader.source_signature(sources), "rode python -m kb.loader"
+
+
+def test_snapshot_survives_mtime_change(tmp_path):
+    data_dir = copy_data(tmp_path)
+    first = loader.load_knowledge_base(data_dir)
+    path = os.path.join(data_dir, loader.PRIMARY_FILE)
+    os.utime(path, (0, 0))
+    os.utime(os.path.join(data_dir, loader.SNAPSHOT_NAME), (0, 0))
+
+    again = loader.load_knowledge_base(data_dir)
+    assert again.last_modified == first.last_modified
+
+
+def test_content_change_rebuilds_snapshot(tmp_path):
+    data_dir = copy_data(tmp_path)
+    first = loader.load_knowledge_base(data_dir)
+    with open(os.path.join(data_dir, loader.EXTRA_DIR, 'zz.json'), 'w', encoding='utf-8') as f:
+        f.write('{"python": {"description": "Outra descrição"}}')
+
+    again = loader.load_knowledge_base(data_dir)
+    assert again.version != first.version
+    assert again['python']['description'] == "Outra descrição"
@@ -0,0 +1,36 @@
+from kb.compression import compress
+from kb.prerender import PrerenderedPages
+
+
+def test_pages_render_one_key_on_demand():
+    rendered = []
+
+    def render(key):
+        rendered.append(key)
+        return None if key == 'missing' else f"<p>{key}</p>" * 200
+
+    pages = PrerenderedPages('v1', render=render, fast=True)
+    page = pages.get('query:rust')
+
+    assert rendered == ['query:rust']
+    assert page.variants['gzip'] == compress(page.body, 'gzip', fast=True)
+    assert pages.get('query:rust') is page
+    assert pages.get('missing') is None and pages.get('missing') is None
+    assert rendered == ['query:rust', 'missing', 'missing']
+    assert len(pages) == 1
+
+
+def test_first_request_renders_only_its_page(app_module, client):
+    app_module.knowledge_base._derived.pop('prerendered_pages', None)
+    response = client.get('/query?language=python')
+
+    pages = app_module.get_prerendered_pages()
+    assert response.status_code == 200
+    assert len(pages) == 1
+    assert client.get('/query?language=python').get_data() == response.get_data()
+
+
+def test_warm_renders_every_page(app_module):
+    pages = app_module.build_prerendered_pages(app_module.knowledge_base)
+    pages.warm(app_module.prerendered_page_keys(app_module.knowledge_base))
+    assert len(pages) == len(app_module.knowledge_base) + 2
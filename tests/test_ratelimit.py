@@ -0,0 +1,76 @@
+import pytest
+
+from kb.ratelimit import MemoryBuckets, RateLimiter, client_address, create_rate_limiter, parse_rate_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rate_limits_longest_prefix_first():
+    rules = parse_rate_limits('/api=100/60, /api/contact=5/60')
+    assert [rule.prefix for rule in rules] == ['/api/contact', '/api']
+    assert rules[0].matches('/api/contact/x') and not rules[0].matches('/api/contacts')
+    with pytest.raises(ValueError):
+        parse_rate_limits('/api=0/60')
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    limiter = RateLimiter(parse_rate_limits('/api/search=2/10'), MemoryBuckets(clock=clock))
+
+    assert limiter.check('1.1.1.1', '/api/search').allowed
+    assert limiter.check('1.1.1.1', '/api/search').allowed
+    denied = limiter.check('1.1.1.1', '/api/search')
+    assert not denied.allowed
+    assert denied.headers()['Retry-After'] == '5'
+    assert limiter.check('2.2.2.2', '/api/search').allowed
+    assert limiter.check('1.1.1.1', '/api/languages') is None
+
+    clock.now += 5
+    assert limiter.check('1.1.1.1', '/api/search').allowed
+
+
+def test_idle_buckets_are_swept():
+    clock = FakeClock()
+    buckets = MemoryBuckets(sweep_interval=60, clock=clock)
+    limiter = RateLimiter(parse_rate_limits('/api=5/10'), buckets)
+    limiter.check('1.1.1.1', '/api')
+    clock.now += 61
+    limiter.check('2.2.2.2', '/api')
+    assert buckets.stats()['active_buckets'] == 1
+    assert buckets.evicted == 1
+
+
+@pytest.mark.parametrize('forwarded, hops, expected', [
+    ([], 1, '10.0.0.1'),
+    (['203.0.113.7'], 0, '10.0.0.1'),
+    (['203.0.113.7'], 1, '203.0.113.7'),
+    (['6.6.6.6, 203.0.113.7'], 1, '203.0.113.7'),
+    (['6.6.6.6, 203.0.113.7, 192.168.0.2'], 2, '203.0.113.7'),
+    (['6.6.6.6', '203.0.113.7'], 1, '203.0.113.7'),
+    (['203.0.113.7'], 2, '10.0.0.1'),
+])
+def test_client_address_ignores_spoofed_entries(forwarded, hops, expected):
+    assert client_address(forwarded, '10.0.0.1', hops) == expected
+
+
+def test_route_returns_429_per_client(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'rate_limiter', create_rate_limiter('/api/search=2/60'))
+    monkeypatch.setattr(app_module, 'TRUST_PROXY_HOPS', 1)
+
+    def search(forwarded):
+        return client.get('/api/search?q=py', headers={'X-Forwarded-For': forwarded})
+
+    assert search('6.6.6.1, 203.0.113.7').status_code == 200
+    # trocar a entrada forjada à esquerda não gera um balde novo
+    assert search('6.6.6.2, 203.0.113.7').status_code == 200
+    limited = search('6.6.6.3, 203.0.113.7')
+    assert limited.status_code == 429
+    assert limited.get_json()['success'] is False
+    assert int(limited.headers['Retry-After']) >= 1
+    assert search('203.0.113.8').status_code == 200
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from kb import loader
+from kb.watcher import KnowledgeBaseWatcher
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    shutil.copy(os.path.join(loader.DEFAULT_DATA_DIR, loader.PRIMARY_FILE), tmp_path)
+    shutil.copytree(os.path.join(loader.DEFAULT_DATA_DIR, loader.EXTRA_DIR), tmp_path / loader.EXTRA_DIR)
+    return tmp_path
+
+
+def override(data_dir, content):
+    (data_dir / loader.EXTRA_DIR / 'zz.json').write_text(content, encoding='utf-8')
+
+
+def test_watcher_swaps_snapshot_on_content_change(data_dir):
+    changes = []
+    snapshot = loader.load_knowledge_base(str(data_dir))
+    watcher = KnowledgeBaseWatcher(snapshot, lambda old, new: changes.append(new.changed_keys(old)),
+                                   data_dir=str(data_dir), interval=0)
+    assert not watcher.check()
+
+    override(data_dir, json.dumps({"rust": {"description": "Nova descrição"}}))
+    assert watcher.check()
+    assert changes == [{'rust'}]
+    assert watcher.snapshot['rust']['description'] == "Nova descrição"
+
+
+def test_watcher_keeps_snapshot_on_invalid_data(data_dir):
+    snapshot = loader.load_knowledge_base(str(data_dir))
+    watcher = KnowledgeBaseWatcher(snapshot, lambda old, new: None, data_dir=str(data_dir), interval=0)
+    override(data_dir, '{"rust": ')
+    assert not watcher.check()
+    assert watcher.snapshot is snapshot
+
+
+def test_reload_invalidates_only_changed_languages(app_module, client, data_dir):
+    old = app_module.knowledge_base
+    override(data_dir, json.dumps({"python": {"description": "Descrição recarregada"}}))
+    new = loader.load_knowledge_base(str(data_dir))
+
+    client.get('/api/language/python')
+    client.get('/api/language/rust')
+    app_module.on_knowledge_base_change(old, new)
+    try:
+        assert client.get('/api/language/python').get_json()['data']['description'] == "Descrição recarregada"
+        assert '/api/language/rust?' in app_module.response_cache
+        assert '/api/language/python?' in app_module.response_cache
+    finally:
+        app_module.on_knowledge_base_change(new, old)
+    assert client.get('/api/language/python').get_json()['data']['description'] != "Descrição recarregada"
+
+
+def test_reload_during_render_is_not_cached(app_module, client, data_dir, monkeypatch):
+    old = app_module.knowledge_base
+    override(data_dir, json.dumps({"rust": {"category": "Outra categoria"}}))
+    new = loader.load_knowledge_base(str(data_dir))
+    project = app_module.project_statistics
+
+    def reload_midway(statistics, fields):
+        # a view já leu os agregados da base antiga quando a recarga acontece
+        app_module.on_knowledge_base_change(old, new)
+        return project(statistics, fields)
+
+    monkeypatch.setattr(app_module, 'project_statistics', reload_midway)
+    try:
+        stale = client.get('/api/stats').get_json()
+        assert 'Outra categoria' not in stale['statistics']['languages_by_category']
+        assert '/api/stats?' not in app_module.response_cache
+        monkeypatch.setattr(app_module, 'project_statistics', project)
+        fresh = client.get('/api/stats').get_json()
+        assert 'Outra categoria' in fresh['statistics']['languages_by_category']
+    finally:
+        app_module.on_knowledge_base_change(new, old)
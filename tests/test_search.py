@@ -0,0 +1,154 @@
+import pytest
+
+from kb.search import SearchIndex, TrigramIndex, fold, tokenize, trigrams
+
+KB = {
+    'python': {'name': 'Python', 'description': 'Linguagem dinâmica para automação', 'paradigms': ('Funcional',),
+               'use_cases': ('Web',), 'frameworks': ('Django',), 'popularity_rank': 1},
+    'javascript': {'name': 'JavaScript', 'description': 'Linguagem da web', 'use_cases': ('Web', 'Mobile'),
+                   'frameworks': ('React',), 'popularity_rank': 2},
+    'java': {'name': 'Java', 'description': 'Plataforma empresarial', 'use_cases': ('Web',), 'popularity_rank': 3},
+    'ruby': {'name': 'Ruby', 'description': 'Linguagem dinâmica para web', 'frameworks': ('Rails',),
+             'popularity_rank': 4},
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex(KB)
+
+
+def test_fold_and_tokenize():
+    assert fold('Dinâmica Automação') == 'dinamica automacao'
+    assert tokenize('C++, C# e Orientação-a-Objetos') == ['c++', 'c#', 'e', 'orientacao', 'a', 'objetos']
+
+
+@pytest.mark.parametrize('query, expected', [
+    # descrição (3) + caso de uso (1) > descrição > caso de uso; empates pela popularidade
+    ('web', ['javascript', 'ruby', 'python', 'java']),
+    # todos os termos precisam casar; os pesos se somam
+    ('dinamica web', ['ruby', 'python']),
+    ('web react', ['javascript']),
+    ('web cobol', []),
+])
+def test_multi_term_ranking(index, query, expected):
+    assert index.search(query) == expected
+
+
+@pytest.mark.parametrize('query', ['dinâmica', 'DINÂMICA', 'dinamica', 'Dinámica'])
+def test_accents_are_folded_in_query_and_index(index, query):
+    assert index.search(query) == ['python', 'ruby']
+
+
+@pytest.mark.parametrize('query, expected', [
+    # só prefixo nos dois: empate desfeito pela popularidade
+    ('jav', ['javascript', 'java']),
+    ('auto', ['python']),
+    ('automaç', ['python']),
+    ('rail', ['ruby']),
+    ('rails', ['ruby']),
+    ('lingua dinam', ['python', 'ruby']),
+])
+def test_prefix_matching(index, query, expected):
+    assert index.search(query) == expected
+
+
+def test_exact_match_outranks_prefix(index):
+    # 'java': exato em java (chave + nome = 18) e só prefixo em javascript (18 * 0.5)
+    assert index.search('java') == ['java', 'javascript']
+    # só prefixos ('dinamica', 'da': 3 * 0.5 cada): empate desfeito pela popularidade
+    assert index.search('d') == ['python', 'javascript', 'ruby']
+
+
+@pytest.mark.parametrize('query', ['', '   ', '!!!', 'cobol'])
+def test_queries_without_matches(index, query):
+    assert index.search(query) == []
+
+
+def test_search_endpoint_folds_accents(client):
+    plain = client.get('/api/search?q=dinamica').get_json()
+    accented = client.get('/api/search?q=Din%C3%A2mica').get_json()
+    assert [item['key'] for item in accented['results']] == [item['key'] for item in plain['results']]
+    assert accented['total_found'] >= 1
+
+
+TRIGRAM_KB = {
+    'python': {'name': 'Python'},
+    'javascript': {'name': 'JavaScript'},
+    'java': {'name': 'Java'},
+    'rust': {'name': 'Rust'},
+    'ruby': {'name': 'Ruby'},
+    'swift': {'name': 'Swift'},
+    'csharp': {'name': 'C#'},
+}
+
+
+@pytest.fixture(scope='module')
+def trigram_index():
+    return TrigramIndex(TRIGRAM_KB)
+
+
+def test_trigrams_are_padded():
+    assert trigrams('Go') == {'  g', ' go', 'go '}
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('pyton', 'python'),
+    ('pythn', 'python'),
+    ('javascrpt', 'javascript'),
+    ('jav', 'java'),
+    ('rubi', 'ruby'),
+    # o nome também é indexado, não só a chave
+    ('c#', 'csharp'),
+])
+def test_resolve_typos(trigram_index, term, expected):
+    assert trigram_index.resolve(term) == expected
+
+
+def test_near_miss_is_suggested_but_not_resolved(trigram_index):
+    # 5 trigramas em comum de 11 + 11: 10/22 ≈ 0.45, abaixo do limiar de correção (0.5)
+    [(key, score)] = trigram_index.suggest('typescript')
+    assert key == 'javascript'
+    assert TrigramIndex.SUGGEST_THRESHOLD <= score < TrigramIndex.RESOLVE_THRESHOLD
+    assert trigram_index.resolve('typescript') is None
+    # 0.33: sugerido, mas não corrigido
+    assert [key for key, _ in trigram_index.suggest('swfit')] == ['swift']
+    assert trigram_index.resolve('swfit') is None
+
+
+def test_similarity_threshold(trigram_index):
+    assert trigram_index.suggest('kotlin') == []
+    assert trigram_index.suggest('swfit', threshold=0.34) == []
+    assert trigram_index.suggest('python') == [('python', 1.0)]
+    ranked = trigram_index.suggest('javascrpt')
+    assert [key for key, _ in ranked] == ['javascript', 'java']
+    assert ranked[0][1] > ranked[1][1] >= TrigramIndex.RESOLVE_THRESHOLD
+    assert trigram_index.suggest('javascrpt', limit=1) == ranked[:1]
+
+
+def test_tied_candidates_are_not_resolved(trigram_index):
+    # 'ru' é igualmente parecido com rust e ruby (0.5)
+    assert [score for _, score in trigram_index.suggest('ru')] == [0.5, 0.5]
+    assert trigram_index.resolve('ru') is None
+
+
+def test_language_endpoint_reports_resolved_from(client):
+    data = client.get('/api/language/Pyton').get_json()
+    assert data['language'] == 'python' and data['resolved_from'] == 'Pyton'
+    assert 'resolved_from' not in client.get('/api/language/Python').get_json()
+
+    missing = client.get('/api/language/typescript')
+    assert missing.status_code == 404
+    assert 'javascript' in [item['key'] for item in missing.get_json()['suggestions']]
+
+
+def test_similar_endpoint_reports_resolved_from(client):
+    data = client.get('/api/language/Pyton/similar').get_json()
+    assert data['language'] == 'python' and data['resolved_from'] == 'Pyton'
+    exact = client.get('/api/language/Python/similar').get_json()
+    assert 'resolved_from' not in exact
+    assert exact['similar'] == data['similar']
+
+    missing = client.get('/api/language/typescript/similar')
+    assert missing.status_code == 404
+    assert 'javascript' in [item['key'] for item in missing.get_json()['suggestions']]
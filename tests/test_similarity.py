@@ -0,0 +1,33 @@
+import pytest
+
+from kb import similar
+from kb.compare import SimilarityMatrix
+from kb.similar import FeatureIndex
+
+
+def test_compare_and_similar_use_the_same_score(app_module, client):
+    compared = client.get('/api/compare?lang=rust&lang=go').get_json()
+    scores = {item['key']: item['similarity']
+              for item in client.get('/api/language/rust/similar?k=20').get_json()['similar']}
+
+    assert compared['analysis']['similarity'][0]['score'] == scores['go']
+
+
+def test_pure_python_fallback_matches_numpy(app_module, monkeypatch):
+    if similar.np is None:
+        pytest.skip("numpy não instalado")
+    kb = app_module.knowledge_base
+    expected = FeatureIndex(kb).pairwise()
+    monkeypatch.setattr(similar, 'np', None)
+    fallback = FeatureIndex(kb)
+    assert fallback.pairwise() == expected
+    keys = list(kb)
+    assert SimilarityMatrix(kb, fallback).similarity('rust', 'go') == expected[keys.index('rust')][keys.index('go')]
+
+
+def test_diff_shared_and_unique(app_module):
+    kb = app_module.knowledge_base
+    analysis = SimilarityMatrix(kb).diff(['rust', 'go'])
+    shared = set(kb['rust']['paradigms']) & set(kb['go']['paradigms'])
+    assert set(analysis['paradigms']['shared']) == shared
+    assert set(analysis['paradigms']['unique']['rust']) == set(kb['rust']['paradigms']) - shared